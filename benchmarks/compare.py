@@ -0,0 +1,82 @@
+"""
+Compare two benchmark result files (pytest-benchmark JSON) and flag regressions.
+
+A benchmark regresses when its median wall time grows, or its throughput
+(entities/s, output bytes/s) drops, or its peak RSS grows by more than the
+threshold. Exits with status 1 if any regression is found.
+
+Usage:
+    python benchmarks/compare.py baseline.json latest.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+# metric -> (where to read it, True if higher is better)
+METRICS = {
+    "median_s": ("stats", False),
+    "entities_per_s": ("extra_info", True),
+    "output_bytes_per_s": ("extra_info", True),
+    "peak_rss_mb": ("extra_info", False),
+}
+
+
+def load(path: str) -> dict:
+    """Map benchmark name -> {metric: value} from a pytest-benchmark JSON file."""
+    with open(path) as f:
+        data = json.load(f)
+    results = {}
+    for bench in data.get("benchmarks", []):
+        values = {}
+        for metric, (section, _) in METRICS.items():
+            source = bench.get(section, {})
+            key = "median" if metric == "median_s" else metric
+            if key in source:
+                values[metric] = source[key]
+        results[bench["name"]] = values
+    return results
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """
+    Return a list of (name, metric, baseline value, current value, change %) regressions.
+    """
+    regressions = []
+    for name, values in sorted(current.items()):
+        base_values = baseline.get(name)
+        if not base_values:
+            continue
+        for metric, (_, higher_is_better) in METRICS.items():
+            base, now = base_values.get(metric), values.get(metric)
+            if not base or now is None:
+                continue
+            change = (now - base) / base * 100
+            worse = -change if higher_is_better else change
+            if worse > threshold:
+                regressions.append((name, metric, base, now, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flag benchmark regressions between two result files")
+    parser.add_argument("baseline", help="Baseline pytest-benchmark JSON")
+    parser.add_argument("current", help="Current pytest-benchmark JSON")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Allowed change in percent before a metric counts as a regression (default: 10)")
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    missing = sorted(set(baseline) - set(current))
+    regressions = compare(baseline, current, args.threshold)
+
+    for name in missing:
+        print(f"MISSING     {name}")
+    for name, metric, base, now, change in regressions:
+        print(f"REGRESSION  {name}  {metric}: {base:.4g} -> {now:.4g} ({change:+.1f}%)")
+    compared = len(set(baseline) & set(current))
+    print(f"{compared} benchmark(s) compared, {len(regressions)} regression(s) above {args.threshold:.0f}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Shared fixtures for the ifc2lbd benchmark suite (run in the perf-test environment)."""
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS = Path(__file__).resolve().parent
+ROOT = BENCHMARKS.parent
+TEST_FILES = ROOT / "test_files"
+
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(BENCHMARKS))
+
+from synthetic import scale_ifc  # noqa: E402
+
+# Real models shipped with the repository
+MODELS = ["Duplex.ifc", "InfraBridge.ifc"]
+# Synthetic models: (source model, replication factor)
+SYNTHETIC_MODELS = [("Duplex.ifc", 4), ("InfraBridge.ifc", 8)]
+
+
+def pytest_addoption(parser):
+    parser.addoption("--bench-rounds", type=int, default=3, help="Rounds per conversion benchmark")
+    parser.addoption("--bench-scale", type=int, default=None,
+                     help="Override the replication factor of the synthetic models")
+
+
+@pytest.fixture(scope="session")
+def bench_rounds(request):
+    return request.config.getoption("--bench-rounds")
+
+
+@pytest.fixture(scope="session")
+def synthetic_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("synthetic")
+
+
+@pytest.fixture(scope="session")
+def model_path(request, synthetic_dir):
+    """Resolve a model id ('Duplex.ifc' or 'Duplex.ifc-x4') to an IFC path, generating synthetic ones."""
+    def resolve(model_id: str) -> str:
+        if "-x" not in model_id:
+            return str(TEST_FILES / model_id)
+        name, factor = model_id.rsplit("-x", 1)
+        factor = request.config.getoption("--bench-scale") or int(factor)
+        path = synthetic_dir / f"{Path(name).stem}-x{factor}.ifc"
+        if not path.exists():
+            scale_ifc(str(TEST_FILES / name), str(path), factor)
+        return str(path)
+    return resolve
@@ -0,0 +1,88 @@
+"""
+Run one conversion in a fresh process and print its metrics as JSON.
+
+Each benchmark round runs in its own process, so peak RSS belongs to that
+conversion only and imports/caches from earlier rounds do not leak in.
+
+Usage:
+    python benchmarks/runner.py --input test_files/Duplex.ifc --output out.ttl --mode stream
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC))
+
+# Conversion modes: keyword arguments for ifc_to_lbd_ttl
+MODES = {
+    "loaded": {},
+    "loaded-parallel": {"jobs": 2},
+    "stream": {"stream": True},
+    "stream-single-pass": {"stream": True, "single_pass": True},
+    "stream-builtin": {"stream": True, "reader": "builtin"},
+}
+
+ENTITY_RE = re.compile(rb"^\s*#\d+\s*=", re.MULTILINE)
+
+
+def count_entities(input_path: str) -> int:
+    """Number of data entities (#id= records) in an IFC file."""
+    with open(input_path, "rb") as f:
+        return len(ENTITY_RE.findall(f.read()))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB."""
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None)
+        if peak is not None:
+            return peak / (1024 * 1024)
+    except ImportError:
+        pass
+    from handling_logging.metrics import peak_memory_mb
+    return peak_memory_mb() or 0.0
+
+
+def run(input_path: str, output_path: str, mode: str, converter: str) -> dict:
+    """Convert input_path once and return the metrics record."""
+    options = MODES[mode]
+    from ifc2lbd.convert import ifc_to_lbd_ttl
+
+    start = time.perf_counter()
+    ifc_to_lbd_ttl(input_path, output_path, converter=converter, **options)
+    wall = time.perf_counter() - start
+
+    entities = count_entities(input_path)
+    output_bytes = os.path.getsize(output_path) if os.path.exists(output_path) else 0
+    return {
+        "input": input_path,
+        "mode": mode,
+        "converter": converter,
+        "wall_s": wall,
+        "entities": entities,
+        "entities_per_s": entities / wall if wall else 0.0,
+        "output_bytes": output_bytes,
+        "output_bytes_per_s": output_bytes / wall if wall else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run one ifc2lbd conversion and print metrics as JSON")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--mode", choices=sorted(MODES), default="loaded")
+    parser.add_argument("--converter", default="mini_ifcowl")
+    args = parser.parse_args()
+    print(json.dumps(run(args.input, args.output, args.mode, args.converter)))
+
+
+if __name__ == "__main__":
+    main()
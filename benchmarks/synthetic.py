@@ -0,0 +1,56 @@
+"""
+Synthetic scaled-up IFC models for benchmarking.
+
+The DATA section of a real model is replicated `factor` times. Every copy
+shifts all entity ids (and the references to them) by a fixed offset, so
+the copies are independent, valid sub-models with the same entity mix as
+the original.
+
+Usage:
+    python benchmarks/synthetic.py test_files/Duplex.ifc Duplex-x10.ifc --factor 10
+"""
+import argparse
+import re
+
+# A STEP string literal, or an entity id/reference outside of strings
+ID_RE = re.compile(rb"'(?:[^']|'')*'|#(\d+)")
+DATA_RE = re.compile(rb"^DATA;\s*$(.*?)^ENDSEC;\s*$", re.MULTILINE | re.DOTALL)
+
+
+def scale_ifc(input_path: str, output_path: str, factor: int) -> None:
+    """Write a copy of input_path with its DATA section replicated factor times."""
+    with open(input_path, "rb") as f:
+        content = f.read()
+
+    match = DATA_RE.search(content)
+    if match is None:
+        raise ValueError(f"No DATA section found in '{input_path}'")
+    data = match.group(1)
+    max_id = max(int(m.group(1)) for m in ID_RE.finditer(data) if m.group(1))
+
+    with open(output_path, "wb") as out:
+        out.write(content[:match.start(1)])
+        out.write(data)
+        for copy in range(1, factor):
+            offset = copy * max_id
+
+            def shift(m, offset=offset):
+                if m.group(1) is None:
+                    return m.group(0)
+                return b"#%d" % (int(m.group(1)) + offset)
+
+            out.write(ID_RE.sub(shift, data))
+        out.write(content[match.end(1):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate the entities of an IFC file to build a larger model")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--factor", type=int, default=4)
+    args = parser.parse_args()
+    scale_ifc(args.input, args.output, args.factor)
+
+
+if __name__ == "__main__":
+    main()
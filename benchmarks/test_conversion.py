@@ -0,0 +1,62 @@
+"""
+Conversion benchmarks: every converter and mode against the test files and
+synthetic scaled-up models.
+
+Each round runs in a fresh process (see runner.py). Wall time is measured by
+pytest-benchmark; entities/s, output bytes/s and peak RSS of the last round
+are stored in the benchmark's extra_info.
+
+    pixi run -e perf-test bench
+    pixi run -e perf-test bench-compare benchmarks/results/baseline.json benchmarks/results/latest.json
+"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import BENCHMARKS, MODELS, SYNTHETIC_MODELS  # noqa: E402
+from runner import MODES  # noqa: E402
+from ifc2lbd.convert import CONVERTERS, STREAM_CONVERTERS, SINGLE_PASS_STREAM_CONVERTERS, PARALLEL_CONVERTERS  # noqa: E402
+
+MODEL_IDS = MODELS + [f"{name}-x{factor}" for name, factor in SYNTHETIC_MODELS]
+
+
+def supported(converter: str, mode: str) -> bool:
+    """Whether a converter is registered for a mode."""
+    if mode == "loaded":
+        return converter in CONVERTERS
+    if mode == "loaded-parallel":
+        return converter in PARALLEL_CONVERTERS
+    if mode == "stream-single-pass":
+        return converter in SINGLE_PASS_STREAM_CONVERTERS
+    return converter in STREAM_CONVERTERS
+
+
+CASES = [
+    pytest.param(model_id, converter, mode, id=f"{model_id}-{converter}-{mode}")
+    for model_id in MODEL_IDS
+    for converter in sorted(set(CONVERTERS) | set(STREAM_CONVERTERS))
+    for mode in MODES
+    if supported(converter, mode)
+]
+
+
+@pytest.mark.parametrize("model_id, converter, mode", CASES)
+def test_conversion(benchmark, model_path, tmp_path, bench_rounds, model_id, converter, mode):
+    input_path = model_path(model_id)
+    output_path = tmp_path / "output.ttl"
+    command = [sys.executable, str(BENCHMARKS / "runner.py"), "--input", input_path,
+               "--output", str(output_path), "--mode", mode, "--converter", converter]
+
+    metrics = {}
+
+    def convert():
+        result = subprocess.run(command, check=True, capture_output=True, text=True)
+        metrics.update(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    benchmark.group = model_id
+    benchmark.pedantic(convert, rounds=bench_rounds, iterations=1)
+    benchmark.extra_info.update(metrics)
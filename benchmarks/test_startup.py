@@ -0,0 +1,60 @@
+"""
+CLI startup benchmarks: `--help`, an argument error and a missing input file.
+
+None of them should import ifcopenshell or the writer modules (see
+ifc2lbd.registry); each round runs in a fresh process, as for users.
+
+    pixi run -e perf-test pytest benchmarks -k startup
+"""
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from conftest import ROOT  # noqa: E402
+
+CLI = str(ROOT / "src" / "cli.py")
+
+# Heavy modules the CLI must not import before a conversion starts
+HEAVY_MODULES = ["ifcopenshell", "lbd.TTL_writer_strings_spf", "lbd.TTL_writer_strings_stream", "cProfile"]
+
+# Case -> (CLI arguments, expected exit code)
+STARTUP_CASES = {
+    "help": (["--help"], 0),
+    "argument-error": (["-i", "a.ifc", "b.ifc", "-o", "a.ttl"], 1),
+    "missing-input": (["-i", "missing.ifc", "-o", "missing.ttl"], 1),
+}
+
+# Runs the CLI in-process and prints the heavy modules it imported
+IMPORT_CHECK = """
+import runpy, sys
+sys.argv = [{cli!r}, *{args!r}]
+try:
+    runpy.run_path({cli!r}, run_name="__main__")
+except SystemExit:
+    pass
+print("imported:" + ",".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+@pytest.mark.parametrize("case", list(STARTUP_CASES))
+def test_startup(benchmark, bench_rounds, case):
+    args, expected_code = STARTUP_CASES[case]
+
+    def run():
+        result = subprocess.run([sys.executable, CLI, *args], capture_output=True, text=True)
+        assert result.returncode == expected_code, result.stderr
+
+    benchmark.group = "startup"
+    benchmark.pedantic(run, rounds=max(bench_rounds, 5), iterations=1)
+
+
+@pytest.mark.parametrize("case", list(STARTUP_CASES))
+def test_startup_imports(case):
+    args, _ = STARTUP_CASES[case]
+    code = IMPORT_CHECK.format(cli=CLI, args=args, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    imported = result.stdout.strip().splitlines()[-1].partition("imported:")[2]
+    assert not imported, f"imported before any conversion: {imported}"
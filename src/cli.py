@@ -8,7 +8,11 @@ from datetime import datetime
 import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from ifc2lbd.convert import ifc_to_lbd_ttl, ifc_to_lbd_trig
+# Only light modules here: ifcopenshell and the writers are imported by the
+# converters on first use, so --help and argument errors return quickly
+from ifc2lbd.convert import ifc_to_lbd_ttl, ifc_to_lbd_ttl_incremental, ifc_to_lbd_trig, ifc_to_lbd_trig_dataset, ifc_to_lbd_nt, ifc_to_lbd_nquads_dataset, ifc_to_lbd_sqlite, ifc_to_lbd_sqlite_dataset, output_format
+from lbd.type_presets import DROPPED_REFS, PRESETS, parse_type_list
+from ifc.compressed_input import input_compression
 
 
 def log(message: str, verbose: bool = True):
@@ -39,7 +43,7 @@ def main():
         nargs="+",
         required=True,
         metavar="OUTPUT",
-        help="Output file path(s) - must match number of inputs"
+        help="Output file path(s) - must match number of inputs, or a single .trig/.nq/.sqlite file to write all inputs into one dataset. Format by suffix: .ttl, .trig, .nt (N-Triples), .nq (N-Quads), .sqlite/.db (SQLite quad table)"
     )
     
     parser.add_argument(
@@ -52,7 +56,58 @@ def main():
         "--stream", "-s",
         action="store_true",
         help="Stream IFC files instead of loading to memory (uses 'stream2' function)." \
-        "Currently only available in ifcopenshell:ifcopenshell conda channel (Alpha version). To use it make sure your IfcOpenShell version has 'stream2' function, run: pixi run -e experimental-conda"
+        "'stream2' is currently only available in ifcopenshell:ifcopenshell conda channel (Alpha version, run: pixi run -e experimental-conda). Without it, the built-in memory-mapped SPF reader is used."
+    )
+    
+    parser.add_argument(
+        "--reader",
+        choices=["auto", "stream2", "builtin"],
+        default="auto",
+        help="Streaming reader: 'auto' (default, stream2 if available, else built-in), 'stream2' or 'builtin' (pure-Python SPF reader)"
+    )
+    
+    parser.add_argument(
+        "--single-pass",
+        action="store_true",
+        help="With --stream, read each IFC file only once (schema from the header, forward references resolved on the fly)"
+    )
+    
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes. Multiple files: files are converted in parallel (largest first). Single file (loaded): the model is serialized in parallel shards; forked workers share the parent's parse, spawned workers (Windows) each load the file, i.e. about N times the model's memory. Default: 1"
+    )
+    
+    parser.add_argument(
+        "--mmap-index",
+        action="store_true",
+        help="With --stream, keep the entity ID->type index in memory-mapped temporary files next to the output instead of in RAM (also when ids are sparse)"
+    )
+    
+    parser.add_argument(
+        "--buffer-size",
+        type=int,
+        default=1024,
+        metavar="KIB",
+        help="Output buffer size in KiB; output is encoded to UTF-8 and written in blocks of this size. Default: 1024"
+    )
+    
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Overlap parsing, formatting and writing: the stream reader runs on a parse thread and output blocks are written by a writer thread, through queues of at most N batches/blocks. Default: 0 (one thread)"
+    )
+    
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        metavar="N",
+        help="For .nt/.nq outputs, spread the lines over N files (out.0000.nt, out.0001.nt, ...) whose line counts differ by at most 1024, for parallel bulk loading. Default: 1"
     )
     
     parser.add_argument(
@@ -61,25 +116,163 @@ def main():
         help="Enable cProfile profiling and save detailed performance stats"
     )
     
+    parser.add_argument(
+        "--incremental",
+        nargs="?",
+        const="",
+        metavar="PREVIOUS",
+        help="Re-serialize only entities changed since the previous revision: PREVIOUS is its IFC file or digest index (.digests); without PREVIOUS the index stored next to the output is used. Single TTL output, load mode only"
+    )
+    
+    parser.add_argument(
+        "--delta",
+        metavar="PATH",
+        help="With --incremental, also write the changes as a SPARQL Update to PATH"
+    )
+    
+    parser.add_argument(
+        "--cache-dir",
+        metavar="DIR",
+        help="Reuse outputs of earlier conversions of identical input files (same content, converter, mode and version) from this cache directory"
+    )
+    
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=10240,
+        metavar="MIB",
+        help="Maximum size of the conversion cache in MiB; least recently used outputs are evicted. Default: 10240"
+    )
+    
+    parser.add_argument(
+        "--metrics",
+        nargs="?",
+        const="-",
+        metavar="PATH",
+        help="Log per-stage metrics (timings, entity counts, bytes written, peak memory) as JSON lines to PATH, or to stderr if no PATH is given"
+    )
+    
+    parser.add_argument(
+        "--include-types",
+        nargs="+",
+        metavar="TYPE",
+        help="Only write entities of these types and their subtypes (names or presets, space or comma separated), e.g. IfcProduct IfcRelationship"
+    )
+    
+    parser.add_argument(
+        "--exclude-types",
+        nargs="+",
+        metavar="TYPE",
+        help=f"Do not write entities of these types and their subtypes (names or presets: {', '.join(PRESETS)}), e.g. no-geometry IfcPropertySet"
+    )
+    
+    parser.add_argument(
+        "--dropped-refs",
+        choices=DROPPED_REFS,
+        default="prune",
+        help="References to entities that are not written: 'prune' them (default) or 'keep' them as bare IRIs"
+    )
+    
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Write one representative per class of structurally identical geometric and measure value entities (e.g. repeated IfcDirection/IfcCartesianPoint/IfcAxis2Placement3D; see lbd.dedup.VALUE_TYPES) and point all references to it. Single TTL output"
+    )
+    
+    parser.add_argument(
+        "--same-as",
+        metavar="PATH",
+        help="With --dedup, also write owl:sameAs links from the dropped duplicates to their representatives to PATH (Turtle)"
+    )
+    
     parser.add_argument(
         "--converter", "-c",
-        choices=["mini_ifcowl", "ifcowl", "ifcowl_express"],
+        choices=["mini_ifcowl", "ifcowl", "ifcowl_express", "bot"],
         default="mini_ifcowl",
-        help="Choose conversion method: 'mini_ifcowl' (default, simplified), 'ifcowl' (with declared types), 'ifcowl_express' (full ifcOWL+EXPRESS with typed nodes)"
+        help="Choose conversion method: 'mini_ifcowl' (default, simplified), 'ifcowl' (with declared types), 'ifcowl_express' (full ifcOWL+EXPRESS with typed nodes), 'bot' (BOT topology: sites, buildings, storeys, spaces, elements; TTL output only)"
     )
     
     args = parser.parse_args()
     
+    # A single TriG / N-Quads / SQLite output for several inputs means one dataset, one named graph per file
+    output_formats = [output_format(output_file) for output_file in args.outputs]
+    is_dataset = len(args.inputs) > 1 and len(args.outputs) == 1 and output_formats[0] in ("trig", "nquads", "sqlite")
+    
     # Validate that inputs and outputs have the same count
-    if len(args.inputs) != len(args.outputs):
+    if len(args.inputs) != len(args.outputs) and not is_dataset:
         print(f"Error: Number of inputs ({len(args.inputs)}) must match number of outputs ({len(args.outputs)})", 
               file=sys.stderr)
         sys.exit(1)
     
+    if args.single_pass and not args.stream:
+        print("Error: --single-pass requires --stream", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.incremental is not None and (len(args.inputs) > 1 or args.stream):
+        print("Error: --incremental supports a single input converted to TTL without --stream", file=sys.stderr)
+        sys.exit(1)
+    
+    include_types = parse_type_list(args.include_types)
+    exclude_types = parse_type_list(args.exclude_types)
+    if (include_types or exclude_types) and args.incremental is not None:
+        print("Error: --include-types/--exclude-types cannot be combined with --incremental", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.dedup and (len(args.inputs) > 1 or output_formats[0] != "turtle" or args.incremental is not None or args.single_pass):
+        print("Error: --dedup supports a single input converted to TTL, without --incremental or --single-pass", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.same_as and not args.dedup:
+        print("Error: --same-as requires --dedup", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.delta and args.incremental is None:
+        print("Error: --delta requires --incremental", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.buffer_size < 1:
+        print(f"Error: --buffer-size must be at least 1 KiB, got {args.buffer_size}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.cache_size < 1:
+        print(f"Error: --cache-size must be at least 1 MiB, got {args.cache_size}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.jobs < 1:
+        print(f"Error: --jobs must be at least 1, got {args.jobs}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.pipeline_depth < 0:
+        print(f"Error: --pipeline-depth must not be negative, got {args.pipeline_depth}", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.shards < 1:
+        print(f"Error: --shards must be at least 1, got {args.shards}", file=sys.stderr)
+        sys.exit(1)
+    
+    line_formats = ("ntriples", "nquads")
+    if args.shards > 1 and any(fmt not in line_formats for fmt in output_formats):
+        print("Error: --shards requires .nt or .nq outputs", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.incremental is not None and output_formats[0] in line_formats:
+        print("Error: --incremental supports a single input converted to TTL without --stream", file=sys.stderr)
+        sys.exit(1)
+    
+    if "sqlite" in output_formats and (args.single_pass or args.incremental is not None or args.cache_dir or args.profile or args.jobs > 1):
+        print("Error: SQLite outputs do not support --single-pass, --incremental, --cache-dir, --profile or --jobs", file=sys.stderr)
+        sys.exit(1)
+    
+    if args.metrics:
+        from handling_logging.metrics import start_metrics_logging
+        start_metrics_logging(args.metrics)
+    
     log("Starting IFC to LBD conversion", args.verbose)
     log(f"Processing {len(args.inputs)} file(s)", args.verbose)
-    log(f"Mode: {'Streaming' if args.stream else 'Load to memory'}", args.verbose)
+    log(f"Mode: {'Streaming' if args.stream else 'Load to memory'}{' (single pass)' if args.single_pass else ''}", args.verbose)
     log(f"Converter: {args.converter}", args.verbose)
+    if args.jobs > 1:
+        log(f"Jobs: {args.jobs}", args.verbose)
     
     # Validate all input files exist
     for input_file in args.inputs:
@@ -88,43 +281,96 @@ def main():
             print(f"Error: Input file '{input_file}' does not exist", file=sys.stderr)
             sys.exit(1)
         
-        if not input_path.suffix.lower() == '.ifc':
-            log(f"Warning: '{input_file}' does not have .ifc extension", args.verbose)
+        if not input_path.suffix.lower() == '.ifc' and not input_compression(input_path):
+            log(f"Warning: '{input_file}' does not have .ifc, .ifczip, .gz or .zst extension", args.verbose)
     
-    # Determine output format based on number of files
+    # Multiple inputs need named graphs (TriG or N-Quads, or one SQLite dataset)
     is_multiple = len(args.inputs) > 1
-    expected_format = ".trig" if is_multiple else ".ttl"
     
     # Validate output formats
-    for output_file in args.outputs:
-        output_path = Path(output_file)
-        if is_multiple and output_path.suffix.lower() != '.trig':
-            print(f"Error: Multiple inputs require TRIG output format, but got '{output_file}'", 
+    for output_file, fmt in zip(args.outputs, output_formats):
+        if is_multiple and fmt not in ("trig", "nquads") and not (is_dataset and fmt == "sqlite"):
+            print(f"Error: Multiple inputs require TRIG or N-Quads output format (or one SQLite dataset), but got '{output_file}'", 
                   file=sys.stderr)
             sys.exit(1)
     
     # Perform conversions
+    options = dict(stream=args.stream, verbose=args.verbose, profile=args.profile, converter=args.converter, buffer_size=args.buffer_size * 1024,
+                   reader=args.reader, pipeline_depth=args.pipeline_depth)
+    if include_types or exclude_types:
+        options.update(include_types=include_types, exclude_types=exclude_types, dropped_refs=args.dropped_refs)
+    if args.shards > 1:
+        options["shards"] = args.shards
+    if args.dedup:
+        options.update(dedup=True, same_as_path=args.same_as)
+    if args.cache_dir:
+        options["cache_dir"] = args.cache_dir
+        options["cache_max_bytes"] = args.cache_size * 1024 * 1024
+    if not is_multiple:
+        options["single_pass"] = args.single_pass
+        options["mmap_index"] = args.mmap_index
+        if not args.stream:
+            options["jobs"] = args.jobs
+    
     success_count = 0
-    for idx, (input_file, output_file) in enumerate(zip(args.inputs, args.outputs), 1):
+    if is_dataset:
         try:
-            log(f"[{idx}/{len(args.inputs)}] Converting '{input_file}' -> '{output_file}'", args.verbose)
-            
-            if is_multiple:
-                # Use TRIG format for multiple files
-                ifc_to_lbd_trig(input_file, output_file, stream=args.stream, verbose=args.verbose, profile=args.profile, converter=args.converter)
+            log(f"Writing {len(args.inputs)} file(s) as named graphs into '{args.outputs[0]}'", args.verbose)
+            dataset_options = dict(stream=args.stream, verbose=args.verbose, converter=args.converter, jobs=args.jobs, buffer_size=args.buffer_size * 1024,
+                                   include_types=include_types, exclude_types=exclude_types, dropped_refs=args.dropped_refs, reader=args.reader,
+                                   pipeline_depth=args.pipeline_depth)
+            if output_formats[0] == "nquads":
+                ifc_to_lbd_nquads_dataset(args.inputs, args.outputs[0], shards=args.shards, **dataset_options)
+            elif output_formats[0] == "sqlite":
+                ifc_to_lbd_sqlite_dataset(args.inputs, args.outputs[0], stream=args.stream, verbose=args.verbose, converter=args.converter, mmap_index=args.mmap_index,
+                                          include_types=include_types, exclude_types=exclude_types, dropped_refs=args.dropped_refs, reader=args.reader,
+                                          pipeline_depth=args.pipeline_depth)
             else:
-                # Use TTL format for single file
-                ifc_to_lbd_ttl(input_file, output_file, stream=args.stream, verbose=args.verbose, profile=args.profile, converter=args.converter)
-            
-            log(f"[{idx}/{len(args.inputs)}] Completed successfully", args.verbose)
-            success_count += 1
-            
+                ifc_to_lbd_trig_dataset(args.inputs, args.outputs[0], **dataset_options)
+            success_count = len(args.inputs)
         except Exception as e:
-            print(f"Error converting '{input_file}': {e}", file=sys.stderr)
+            print(f"Error converting to '{args.outputs[0]}': {e}", file=sys.stderr)
             if args.verbose:
                 import traceback
                 traceback.print_exc()
     
+    elif args.jobs > 1 and len(args.inputs) > 1:
+        from ifc2lbd.batch import run_batch
+        success_count = run_batch(list(zip(args.inputs, args.outputs)), args.jobs, is_multiple, options, log, args.verbose)
+    
+    else:
+        for idx, (input_file, output_file) in enumerate(zip(args.inputs, args.outputs), 1):
+            try:
+                log(f"[{idx}/{len(args.inputs)}] Converting '{input_file}' -> '{output_file}'", args.verbose)
+            
+                if output_format(output_file) == "sqlite":
+                    # SQLite quad table, queryable without a parse step
+                    ifc_to_lbd_sqlite(input_file, output_file, stream=args.stream, verbose=args.verbose, converter=args.converter, mmap_index=args.mmap_index,
+                                      include_types=include_types, exclude_types=exclude_types, dropped_refs=args.dropped_refs, reader=args.reader,
+                                      pipeline_depth=args.pipeline_depth)
+                elif output_format(output_file) in line_formats:
+                    # N-Triples, or N-Quads with one named graph per file
+                    ifc_to_lbd_nt(input_file, output_file, **options)
+                elif is_multiple:
+                    # Use TRIG format for multiple files
+                    ifc_to_lbd_trig(input_file, output_file, **options)
+                elif args.incremental is not None:
+                    ifc_to_lbd_ttl_incremental(input_file, output_file, previous=args.incremental or None, delta_path=args.delta,
+                                               verbose=args.verbose, converter=args.converter, buffer_size=args.buffer_size * 1024,
+                                               pipeline_depth=args.pipeline_depth)
+                else:
+                    # Use TTL format for single file
+                    ifc_to_lbd_ttl(input_file, output_file, **options)
+            
+                log(f"[{idx}/{len(args.inputs)}] Completed successfully", args.verbose)
+                success_count += 1
+            
+            except Exception as e:
+                print(f"Error converting '{input_file}': {e}", file=sys.stderr)
+                if args.verbose:
+                    import traceback
+                    traceback.print_exc()
+    
     # Summary
     log("=" * 50, args.verbose)
     log(f"Conversion complete: {success_count}/{len(args.inputs)} successful", args.verbose)
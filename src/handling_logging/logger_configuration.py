@@ -7,7 +7,11 @@ import datetime as dt
 import json
 import logging
 from logging.handlers import QueueHandler, QueueListener
-from typing import override
+try:
+    from typing import override
+except ImportError:  # Python < 3.12
+    def override(method):
+        return method
 
 LOG_RECORD_BUILTIN_ATTRS = {
     "args",
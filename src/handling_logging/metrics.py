@@ -0,0 +1,236 @@
+"""
+Per-stage conversion metrics as structured log records.
+
+Every conversion stage (header parse, load, type-map pass, serialization,
+flush, total) emits one INFO record on the 'ifc2lbd.metrics' logger. The
+numbers travel as record attributes, so JSONFormatter writes them as fields:
+
+    {"message": "stage serialize", "stage": "serialize", "input": "Duplex.ifc",
+     "output": "Duplex.ttl", "elapsed_ns": 412345678, "entities": 38898,
+     "bytes_written": 5123456, "peak_memory_mb": 151.2, ...}
+
+Nothing is emitted unless metrics logging was started (start_metrics_logging)
+or the application configured a handler for the logger itself.
+"""
+
+import atexit
+import logging
+import os
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from handling_logging.logger_configuration import JSONFormatter
+
+METRICS_LOGGER = "ifc2lbd.metrics"
+# Destination of the metrics records ('-' for stderr), inherited by worker processes
+METRICS_ENV = "IFC2LBD_METRICS"
+# Fields of a stage record
+STAGE_FIELDS = ("stage", "input", "output", "elapsed_ns", "entities", "bytes_written",
+                "entities_per_s", "bytes_per_s", "peak_memory_mb")
+
+logger = logging.getLogger(METRICS_LOGGER)
+
+_listener: Optional[QueueListener] = None
+_listener_pid: Optional[int] = None
+
+
+def peak_memory_mb():
+    """
+    Peak resident memory of this process in MiB, or None if it cannot be measured.
+    Uses the resource module (Linux/macOS) or psutil (Windows), whichever is available.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def start_metrics_logging(destination: str = "-") -> QueueListener:
+    """
+    Send metrics records through a QueueHandler to a JSON lines sink.
+
+    Records are put on a queue by the converting thread and formatted and
+    written by the listener thread, so the conversion does not wait for I/O.
+    The destination is also exported in IFC2LBD_METRICS, so worker processes
+    start their own listener (appending to the same file) on their first record.
+
+    Args:
+        destination: JSON lines file to append to, or '-' for stderr
+
+    Returns:
+        The started QueueListener (stopped automatically at exit)
+    """
+    global _listener, _listener_pid
+    stop_metrics_logging()
+    os.environ[METRICS_ENV] = destination
+
+    if destination == "-":
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = logging.FileHandler(destination, mode="a", encoding="utf-8")
+    handler.setFormatter(JSONFormatter(fmt_keys={
+        "timestamp": "timestamp",
+        "level": "levelname",
+        "logger": "name",
+        "process": "process",
+        "message": "message",
+    }))
+
+    queue = Queue(-1)
+    # Handlers inherited from a forked parent write to a queue nobody reads
+    for inherited in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+        logger.removeHandler(inherited)
+    logger.addHandler(QueueHandler(queue))
+    logger.setLevel(logging.INFO)
+
+    _listener = QueueListener(queue, handler, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(stop_metrics_logging)
+    return _listener
+
+
+def stop_metrics_logging():
+    """Flush pending metrics records and stop the listener of this process."""
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = _listener_pid = None
+
+
+def _ensure_listener():
+    """Start metrics logging in a worker process if the parent enabled it."""
+    if _listener_pid != os.getpid():
+        destination = os.environ.get(METRICS_ENV)
+        if destination:
+            start_metrics_logging(destination)
+            # Worker processes skip atexit handlers but run multiprocessing finalizers
+            from multiprocessing.util import Finalize
+            Finalize(None, stop_metrics_logging, exitpriority=100)
+
+
+def log_stage(stage: str, elapsed_ns: int, input_path: Optional[str] = None, output_path: Optional[str] = None,
+              entities: Optional[int] = None, bytes_written: Optional[int] = None):
+    """
+    Emit one metrics record for a finished stage.
+
+    Args:
+        stage: Stage name ('header', 'load', 'type_map', 'serialize', 'flush', 'total', ...)
+        elapsed_ns: Duration in nanoseconds (perf_counter_ns)
+        input_path: Input IFC file, if known to the caller
+        output_path: Output file, if known to the caller
+        entities: Number of entities processed in the stage
+        bytes_written: Number of bytes written in the stage
+    """
+    _ensure_listener()
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    seconds = elapsed_ns / 1e9
+    record = {
+        "stage": stage,
+        "input": input_path,
+        "output": output_path,
+        "elapsed_ns": elapsed_ns,
+        "entities": entities,
+        "bytes_written": bytes_written,
+        "entities_per_s": entities / seconds if entities is not None and seconds else None,
+        "bytes_per_s": bytes_written / seconds if bytes_written is not None and seconds else None,
+        "peak_memory_mb": peak_memory_mb(),
+    }
+    logger.info("stage %s", stage, extra=record)
+
+
+class Stage:
+    """
+    Time one conversion stage with perf_counter_ns and emit its metrics record.
+
+    Usage:
+        with Stage("serialize", output_path=path) as stage:
+            stage.entities = write_instances(...)
+
+    or stage = Stage("total").start() ... stage.stop() for spans that do not
+    fit one block. The counts may be set before the stage ends; elapsed_ns is
+    available after it. No record is emitted for a stage left by an exception.
+    """
+
+    def __init__(self, name: str, input_path: Optional[str] = None, output_path: Optional[str] = None):
+        self.name = name
+        self.input_path = input_path
+        self.output_path = output_path
+        self.entities: Optional[int] = None
+        self.bytes_written: Optional[int] = None
+        self.elapsed_ns = 0
+        self._start = 0
+
+    @property
+    def seconds(self) -> float:
+        return self.elapsed_ns / 1e9
+
+    def start(self) -> "Stage":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def stop(self):
+        """End the stage and emit its record."""
+        self.elapsed_ns = time.perf_counter_ns() - self._start
+        log_stage(self.name, self.elapsed_ns, self.input_path, self.output_path,
+                  self.entities, self.bytes_written)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.stop()
+        else:
+            self.elapsed_ns = time.perf_counter_ns() - self._start
+
+
+class _StageCollector(logging.Handler):
+    def __init__(self, records: List[Dict]):
+        super().__init__(logging.INFO)
+        self.records = records
+
+    def emit(self, record: logging.LogRecord):
+        self.records.append({field: getattr(record, field, None) for field in STAGE_FIELDS})
+
+
+@contextmanager
+def collect_stages():
+    """
+    Collect the stage records emitted inside the block (e.g. the metrics of one daemon job).
+
+    Works with or without metrics logging started; the records still go to
+    the metrics file if it is.
+
+    Usage:
+        with collect_stages() as records:
+            ifc_to_lbd_ttl(...)
+        # records: list of dicts with STAGE_FIELDS
+    """
+    records: List[Dict] = []
+    handler = _StageCollector(records)
+    level = logger.level
+    logger.addHandler(handler)
+    if not logger.isEnabledFor(logging.INFO):
+        logger.setLevel(logging.INFO)
+    try:
+        yield records
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(level)
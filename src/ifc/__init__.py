@@ -1,4 +1,12 @@
 """IFC file utilities for loading and streaming IFC files."""
-from .ifc_options import load_ifc, stream_ifc
 
-__all__ = ['load_ifc', 'stream_ifc']
+__all__ = ['load_ifc', 'stream_ifc', 'iter_stream']
+
+
+def __getattr__(name):
+    # Imported on first use: ifc_options imports ifcopenshell, which the
+    # light submodules (compressed_input, pipeline, stream_settings) do not need
+    if name in __all__:
+        from . import ifc_options
+        return getattr(ifc_options, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
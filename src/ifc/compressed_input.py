@@ -0,0 +1,66 @@
+"""
+Compressed IFC inputs: .ifczip archives and gzip/zstd compressed SPF files.
+
+The files are decompressed incrementally while they are read. Streaming
+extracts nothing to disk; loading (ifc.ifc_options.load_ifc) decompresses
+into a temporary .ifc file for the IfcOpenShell parser:
+
+    model.ifczip    zip archive holding a .ifc file (as written by authoring tools)
+    model.ifc.gz    gzip compressed SPF
+    model.ifc.zst   zstd compressed SPF (needs the optional 'zstandard' package)
+"""
+
+import gzip
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+# Input suffix -> compression
+INPUT_COMPRESSIONS = {
+    ".ifczip": "zip",
+    ".gz": "gzip",
+    ".zst": "zstd",
+}
+
+
+def input_compression(path) -> Optional[str]:
+    """Compression of an input file from its suffix ('zip', 'gzip', 'zstd'), or None for plain SPF."""
+    return INPUT_COMPRESSIONS.get(Path(path).suffix.lower())
+
+
+def input_stem(path) -> str:
+    """File name without the IFC and compression suffixes ('Duplex.ifc.gz' -> 'Duplex')."""
+    path = Path(path)
+    if input_compression(path) in ("gzip", "zstd"):
+        path = path.with_suffix("")
+    return path.stem
+
+
+def open_ifc_binary(path) -> BinaryIO:
+    """
+    Open the SPF content of a (possibly compressed) IFC file as a binary stream.
+
+    Raises:
+        LookupError: If a .ifczip archive holds no .ifc file
+        ImportError: For .zst inputs without the zstandard package
+    """
+    compression = input_compression(path)
+    if compression == "zip":
+        archive = zipfile.ZipFile(path)
+        try:
+            for name in archive.namelist():
+                if Path(name).suffix.lower() == ".ifc":
+                    # The member keeps the archive file open after archive.close()
+                    return archive.open(name)
+            raise LookupError(f"No .ifc file found in {path}")
+        finally:
+            archive.close()
+    if compression == "gzip":
+        return gzip.open(path, 'rb')
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst inputs requires the 'zstandard' package (pip install zstandard)") from None
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+    return open(path, 'rb')
@@ -1,41 +1,91 @@
+import os
+import shutil
+import tempfile
+
 import ifcopenshell
+from .compressed_input import input_compression, input_stem, open_ifc_binary
+from .pipeline import pipeline_depth as resolve_pipeline_depth, prefetch
+from .spf_reader import iter_spf
+from .stream_settings import STREAM_READER_ENV, STREAM_READERS, stream_reader
+
+# Bytes decompressed per read when a compressed input is extracted for loading
+DECOMPRESS_CHUNK_SIZE = 1 << 20
+
+
+def iter_stream(file_path, reader=None, types=None, pipeline_depth=None):
+    """
+    Iterate over the entities of an IFC file as stream2-style dictionaries.
+    
+    Uses ifcopenshell.stream2 when available, otherwise the built-in
+    memory-mapped SPF reader (ifc.spf_reader), which yields the same shape.
+    Compressed inputs (.ifczip, .ifc.gz, .ifc.zst) always go through the
+    built-in reader, which decompresses them incrementally.
+    
+    Args:
+        file_path: Path to IFC file
+        reader: 'auto', 'stream2' or 'builtin' (default: the reader of the enclosing
+            ifc.stream_settings.stream_settings(), else $IFC2LBD_STREAM_READER or 'auto')
+        types: Optional set of entity type names to yield. Only a hint: the built-in
+            reader skips other data records before parsing them, stream2 yields everything.
+        pipeline_depth: With a depth > 0 the reader runs on a parse thread (see ifc.pipeline;
+            default: the stream settings' depth, see ifc.stream_settings.pipeline_depth)
+    """
+    reader = stream_reader(reader)
+    if reader == "builtin" or input_compression(file_path) or (reader == "auto" and not hasattr(ifcopenshell, 'stream2')):
+        entities = iter_spf(file_path, types)
+    else:
+        entities = ifcopenshell.stream2(file_path)
+    depth = resolve_pipeline_depth(pipeline_depth)
+    if depth:
+        return prefetch(entities, depth, input_path=file_path)
+    return entities
+
 
 def load_ifc(file_path):
-    """Loads an IFC in memory (standard SPF)"""
+    """
+    Loads an IFC in memory (standard SPF).
+
+    Compressed inputs are first decompressed into a temporary .ifc file
+    (in the system temp directory, removed again once the model is loaded),
+    because the IfcOpenShell parser only reads whole files or strings. So
+    memory stays that of the loaded model, as for a plain file, at the cost
+    of temporary disk space for the decompressed SPF; no decompressed copy
+    is held in memory.
+    """
+    if input_compression(file_path):
+        fd, temp_path = tempfile.mkstemp(prefix=f"{input_stem(file_path)}.", suffix=".ifc")
+        try:
+            with os.fdopen(fd, "wb") as out, open_ifc_binary(file_path) as f:
+                shutil.copyfileobj(f, out, DECOMPRESS_CHUNK_SIZE)
+            return ifcopenshell.open(temp_path)
+        finally:
+            os.remove(temp_path)
     model = ifcopenshell.open(file_path)
     return model
 
-def stream_ifc(file_path):
+def stream_ifc(file_path, reader=None):
     """
     Streams an IFC file (memory efficient, for large files).
-    Note: Streaming is only available in ifcopenshell experimental versions.
-    Falls back to loading if streaming is not available.
+    Note: ifcopenshell.stream2 is only available in ifcopenshell experimental versions.
+    Without it, the built-in memory-mapped SPF reader is used (see iter_stream).
+    
+    Args:
+        file_path: Path to IFC file
+        reader: Streaming reader (see iter_stream)
     
     Returns:
-        tuple: (iterator/model, file_path) - file_path is included for schema detection
+        tuple: (iterator, file_path) - file_path is included for schema detection
     """
-    # Check if streaming is available (only in experimental versions, i.e. from Alpha IfcOpenShell)
-
-    if hasattr(ifcopenshell, 'stream2'):
-        return (ifcopenshell.stream2(file_path), file_path)
-    else:
-        # Streaming not available in stable versions, fall back to loading
-        import warnings
-        warnings.warn(
-            "Streaming is not available in this ifcopenshell version. "
-            "Falling back to loading entire file to memory. "
-            "Use experimental-conda environment for streaming support.",
-            UserWarning
-        )
-        return (load_ifc(file_path), None)
+    return (iter_stream(file_path, reader), file_path)
 
 
-def get_schema_uri(ifc_model_or_path) -> str:
+def get_schema_uri(ifc_model_or_path, reader=None) -> str:
     """
     ifcOWL prefixes and URIs. For now, ifcOWL is not there yet, hence URI is custom for now.
     
     Args:
         ifc_model_or_path: IfcOpenShell model or file path (for streamed files)
+        reader: Streaming reader reading the header of a file path (see iter_stream)
         
     Returns:
         Schema version URI string for ifcOWL ontology
@@ -43,17 +93,15 @@ def get_schema_uri(ifc_model_or_path) -> str:
     
     # Determine if it's a file path or loaded model
     if isinstance(ifc_model_or_path, str):
-        # It's a file path - use stream2 to get schema from header entities
+        # It's a file path - stream the header entities (includes file_schema)
         schema = None
-        if hasattr(ifcopenshell, 'stream2'):
-            # Use stream2 to read header entities (includes file_schema)
-            for entity_dict in ifcopenshell.stream2(ifc_model_or_path):
-                if entity_dict.get('type') == 'file_schema':
-                    schema = entity_dict.get('schema_identifiers', [None])[0]
-                    break
+        for entity_dict in iter_stream(ifc_model_or_path, reader):
+            if entity_dict.get('type') == 'file_schema':
+                schema = entity_dict.get('schema_identifiers', [None])[0]
+                break
         
         if not schema:
-            # Fallback if stream2 not available or schema not found
+            # Fallback if schema not found
             schema = 'IFC4'
     else:
         # It's a loaded model - use schema_identifier to get full version
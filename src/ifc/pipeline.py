@@ -0,0 +1,100 @@
+"""Overlapped parsing for the streaming writers (--pipeline-depth).
+
+With a pipeline depth N > 0, iter_stream runs the reader (stream2 or the
+built-in SPF reader) on a parse thread that puts batches of entity dicts into
+a queue of at most N batches; the writer thread formats them as they arrive.
+Whenever the reader releases the GIL (stream2 parses in C++, file and
+decompression reads), parsing overlaps with formatting. The output writer has
+its own thread for disk and compression I/O (lbd.output_buffer.BackgroundWriter).
+
+The depth is passed as pipeline_depth= to the convert functions (applied
+through ifc.stream_settings) or to iter_stream / open_output directly;
+$IFC2LBD_PIPELINE_DEPTH is the fallback. 0 (default) keeps parsing and
+writing on the calling thread.
+
+Backpressure is reported as two metrics records when the iteration ends:
+'parse_wait' (time the consumer waited for a batch: parse bound) and
+'parse_backpressure' (time the parse thread waited for a free slot: format bound).
+"""
+
+import queue
+import threading
+import time
+from typing import Iterable, Iterator
+
+from handling_logging.metrics import log_stage
+from .stream_settings import PIPELINE_DEPTH_ENV, pipeline_depth  # noqa: F401 (re-exported)
+
+DEFAULT_BATCH_SIZE = 512
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, exc: BaseException):
+        self.exc = exc
+
+
+def prefetch(iterable: Iterable, depth: int, batch_size: int = DEFAULT_BATCH_SIZE, input_path=None) -> Iterator:
+    """
+    Iterate over iterable on a parse thread, handing items over in batches through a bounded queue.
+
+    Items are yielded in their original order. Exceptions of the parse thread
+    are re-raised in the consumer. Leaving the loop early stops the parse thread.
+
+    Args:
+        iterable: Source of items (e.g. ifcopenshell.stream2(path))
+        depth: Maximum number of batches waiting in the queue
+        batch_size: Items per batch (amortizes the queue's locking)
+        input_path: Input file reported in the metrics records
+    """
+    batches = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    put_wait_ns = [0]
+
+    def put(item) -> bool:
+        start = time.perf_counter_ns()
+        while not stop.is_set():
+            try:
+                batches.put(item, timeout=0.1)
+                put_wait_ns[0] += time.perf_counter_ns() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            batch = []
+            for item in iterable:
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(_END)
+        except BaseException as exc:
+            put(_Failure(exc))
+
+    thread = threading.Thread(target=produce, name="ifc-parse", daemon=True)
+    thread.start()
+    get_wait_ns = 0
+    count = 0
+    try:
+        while True:
+            start = time.perf_counter_ns()
+            batch = batches.get()
+            get_wait_ns += time.perf_counter_ns() - start
+            if batch is _END:
+                break
+            if isinstance(batch, _Failure):
+                raise batch.exc
+            count += len(batch)
+            yield from batch
+    finally:
+        stop.set()
+        thread.join()
+        log_stage("parse_wait", get_wait_ns, input_path=input_path, entities=count)
+        log_stage("parse_backpressure", put_wait_ns[0], input_path=input_path, entities=count)
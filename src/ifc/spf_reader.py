@@ -0,0 +1,440 @@
+"""
+Pure-Python streaming reader for IFC STEP physical files (SPF).
+
+Fallback for ifcopenshell versions without `stream2`. The file is memory
+mapped and scanned record by record, so memory use does not grow with the
+file size. Entities are yielded in the same shape as `ifcopenshell.stream2`:
+
+    {'id': 0, 'type': 'file_schema', 'schema_identifiers': ('IFC4',)}
+    {'id': 5, 'type': 'IfcDirection', 'DirectionRatios': (1.0, 0.0, 0.0)}
+    {'id': 3, 'type': 'IfcAxis2Placement3D', 'Location': {'ref': 1}, ...}
+    {'type': 'IfcLabel', 'value': 'x'}   (typed values inside selects)
+
+Attribute names and the entity type spelling come from the ifcopenshell
+schema wrapper.
+"""
+import mmap
+import re
+import warnings
+from typing import Container, Dict, Iterator, List, Optional, Tuple
+
+import ifcopenshell.ifcopenshell_wrapper as wrapper
+
+from .compressed_input import input_compression, open_ifc_binary
+
+# Header entities have fixed attribute names (ISO 10303-21)
+HEADER_ATTRIBUTES = {
+    "FILE_DESCRIPTION": ("description", "implementation_level"),
+    "FILE_NAME": ("name", "time_stamp", "author", "organization",
+                  "preprocessor_version", "originating_system", "authorization"),
+    "FILE_SCHEMA": ("schema_identifiers",),
+}
+
+# One record: everything up to the terminating ';' outside strings and comments.
+# Possessive quantifiers: a record cut off by the end of a chunk fails in
+# linear time instead of backtracking through every split of its text.
+RECORD_RE = re.compile(
+    rb"""\s*(?:/\*.*?\*/\s*)*"""
+    rb"""((?:[^;'"/]++|'(?:[^']|'')*+'|"[^"]*+"|/\*.*?\*/|/)*+);""",
+    re.DOTALL,
+)
+
+# Tokens of a record body, each preceded by optional whitespace/comments.
+# Exactly one group is non-empty per match (strings keep their quotes so
+# that '' is not empty).
+TOKEN_RE = re.compile(
+    rb"""(?:\s+|/\*.*?\*/)*(?:"""
+    rb"""('(?:[^']|'')*')"""                                  # 1 string
+    rb"""|("[0-9A-Fa-f]*")"""                                 # 2 binary
+    rb"""|\#(\d+)"""                                          # 3 reference
+    rb"""|\.([A-Za-z0-9_]+)\."""                              # 4 enumeration / boolean
+    rb"""|([-+]?\d*\.\d*(?:[Ee][-+]?\d+)?|[-+]?\d+[Ee][-+]?\d+)"""  # 5 real
+    rb"""|([-+]?\d+)"""                                       # 6 integer
+    rb"""|([A-Za-z_][A-Za-z0-9_]*)"""                          # 7 keyword (entity or type name)
+    rb"""|([()=$*,]))""",                                     # 8 punctuation
+    re.DOTALL,
+)
+
+# Head of a data record: '#id = KEYWORD (' and, if the first attribute is a string, its value
+ENTITY_HEAD_RE = re.compile(rb"#(\d+)\s*=\s*([A-Za-z_][A-Za-z0-9_]*)\s*\(\s*(?:'([^']*)')?")
+
+STRING_ESCAPE_RE = re.compile(r"\\X2\\((?:[0-9A-Fa-f]{4})*)\\X0\\|\\X4\\((?:[0-9A-Fa-f]{8})*)\\X0\\|\\X\\([0-9A-Fa-f]{2})|\\S\\(.)|\\P[A-I]\\|\\\\")
+
+_OPEN, _CLOSE = b"(", b")"
+
+# Read sizes for compressed inputs: small first read (header), then up to 1 MiB
+HEADER_CHUNK_SIZE = 16 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def decode_string(raw: bytes) -> str:
+    """Decode a STEP string literal body ('' quoting and \\X2\\, \\X\\, \\S\\ escapes)."""
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    text = text.replace("''", "'")
+    if "\\" not in text:
+        return text
+
+    def replace(match):
+        x2, x4, x, s = match.groups()
+        if x2 is not None:
+            return bytes.fromhex(x2).decode("utf-16-be")
+        if x4 is not None:
+            return bytes.fromhex(x4).decode("utf-32-be")
+        if x is not None:
+            return chr(int(x, 16))
+        if s is not None:
+            return chr(ord(s) + 128)
+        if match.group(0) == "\\\\":
+            return "\\"
+        return ""  # \P?\ code page switch
+
+    return STRING_ESCAPE_RE.sub(replace, text)
+
+
+def decode_binary(raw: bytes) -> str:
+    """Decode a STEP binary literal into a bit string (first digit = number of unused bits)."""
+    if not raw:
+        return ""
+    unused = int(raw[:1], 16)
+    digits = raw[1:]
+    if not digits:
+        return ""
+    bits = bin(int(digits, 16))[2:].zfill(4 * len(digits))
+    # Same convention as ifcopenshell: the unused bits are dropped from the end
+    return bits[:len(bits) - unused]
+
+
+class _Schema:
+    """Entity names and attribute names for one schema, looked up lazily."""
+
+    def __init__(self, schema_identifier: str):
+        try:
+            self.schema = wrapper.schema_by_name(schema_identifier)
+        except Exception:
+            self.schema = wrapper.schema_by_name(schema_identifier.split("_")[0])
+        self.entities: Dict[bytes, Optional[Tuple[str, Tuple[str, ...]]]] = {}
+        self.types: Dict[bytes, str] = {}
+        self.rooted: Dict[bytes, bool] = {}
+
+    def entity(self, keyword: bytes) -> Optional[Tuple[str, Tuple[str, ...]]]:
+        """(Type name, attribute names) of an entity keyword, or None if unknown."""
+        try:
+            return self.entities[keyword]
+        except KeyError:
+            pass
+        try:
+            declaration = self.schema.declaration_by_name(keyword.decode("ascii"))
+            entry = (declaration.name(), tuple(attr.name() for attr in declaration.all_attributes()))
+        except Exception:
+            entry = None
+        self.entities[keyword] = entry
+        return entry
+
+    def is_rooted(self, keyword: bytes) -> bool:
+        """Whether an entity keyword is a subtype of IfcRoot (its first attribute is the GlobalId)."""
+        rooted = self.rooted.get(keyword)
+        if rooted is None:
+            rooted = False
+            try:
+                declaration = self.schema.declaration_by_name(keyword.decode("ascii"))
+            except Exception:
+                declaration = None
+            while declaration is not None:
+                if declaration.name() == "IfcRoot":
+                    rooted = True
+                    break
+                declaration = declaration.supertype()
+            self.rooted[keyword] = rooted
+        return rooted
+
+    def type_name(self, keyword: bytes) -> str:
+        """Schema spelling of a defined type keyword (IFCLABEL -> IfcLabel)."""
+        name = self.types.get(keyword)
+        if name is None:
+            try:
+                name = self.schema.declaration_by_name(keyword.decode("ascii")).name()
+            except Exception:
+                name = keyword.decode("ascii")
+            self.types[keyword] = name
+        return name
+
+
+def _parse_values(tokens: List[tuple], pos: int, schema: Optional[_Schema]) -> Tuple[list, int]:
+    """
+    Parse a comma separated list of values up to the matching ')'.
+
+    Args:
+        tokens: Tokens of the record (see _tokenize)
+        pos: Position right after the opening '('
+        schema: Schema used to spell typed value names (None in the header)
+
+    Returns:
+        (values, position after the closing ')')
+    """
+    values = []
+    append = values.append
+    n = len(tokens)
+    while pos < n:
+        string, binary, ref, enum, real, integer, keyword, punct = tokens[pos]
+        pos += 1
+        if punct:
+            if punct == b",":
+                continue
+            if punct == _CLOSE:
+                return values, pos
+            if punct == _OPEN:
+                nested, pos = _parse_values(tokens, pos, schema)
+                append(tuple(nested))
+            else:
+                # '$' (unset) and '*' (derived)
+                append(None)
+        elif ref:
+            append({"ref": int(ref)})
+        elif real:
+            append(float(real))
+        elif string:
+            append(decode_string(string[1:-1]))
+        elif integer:
+            append(int(integer))
+        elif enum:
+            enum = enum.upper()
+            if enum == b"T":
+                append(True)
+            elif enum == b"F":
+                append(False)
+            elif enum == b"U":
+                append("UNKNOWN")
+            else:
+                append(enum.decode("ascii"))
+        elif binary:
+            append(decode_binary(binary[1:-1]))
+        elif keyword:
+            # Typed value, e.g. IFCLABEL('x'); skip its '('
+            inner, pos = _parse_values(tokens, pos + 1, schema)
+            type_name = schema.type_name(keyword.upper()) if schema else keyword.decode("ascii")
+            append({"type": type_name, "value": inner[0] if inner else None})
+    return values, pos
+
+
+def _tokenize(body: bytes) -> List[tuple]:
+    """Split a record body into (string, binary, ref, enum, real, integer, keyword, punct) tuples."""
+    return TOKEN_RE.findall(body)
+
+
+def _buffer_records(data) -> Iterator[bytes]:
+    """Records of an SPF buffer (bytes, bytearray or mmap), without the terminating ';'."""
+    for match in RECORD_RE.finditer(data):
+        yield match.group(1).strip()
+
+
+def _stream_records(stream, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Records of an SPF binary stream (e.g. a decompressing reader), read in chunks.
+
+    Only the unconsumed tail of the last chunk is kept. A record is taken once
+    its terminating ';' has been read; one that ends in an unclosed comment may
+    still be cut by the chunk end and is retried with more data. The first
+    chunk is small, so reading just the header stays cheap.
+    """
+    buffer = bytearray()
+    pos = 0
+    size = HEADER_CHUNK_SIZE
+    eof = False
+    while True:
+        match = RECORD_RE.match(buffer, pos)
+        if match is not None and (eof or not _open_comment(match.group(0))):
+            pos = match.end()
+            yield match.group(1).strip()
+            continue
+        if eof:
+            return
+        del buffer[:pos]
+        pos = 0
+        chunk = stream.read(size)
+        size = min(size * 4, chunk_size)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+
+def _open_comment(record: bytes) -> bool:
+    start = record.rfind(b"/*")
+    return start >= 0 and record.find(b"*/", start + 2) < 0
+
+
+def _file_records(file_path: str) -> Iterator[bytes]:
+    """Records of an SPF file; plain files are memory mapped, compressed ones decompressed in chunks."""
+    if input_compression(file_path):
+        with open_ifc_binary(file_path) as stream:
+            yield from _stream_records(stream)
+        return
+    with open(file_path, "rb") as f:
+        if f.seek(0, 2) == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from _buffer_records(data)
+
+
+def iter_spf(file_path: str, types: Optional[Container[str]] = None) -> Iterator[dict]:
+    """
+    Stream an IFC SPF file without ifcopenshell.stream2.
+
+    Yields header entities (id 0, e.g. 'file_schema') first, then data
+    entities in file order, as dictionaries shaped like stream2's output.
+    With types, data records of other entity types are skipped before their
+    attributes are tokenized. Compressed inputs (.ifczip, .ifc.gz, .ifc.zst)
+    are decompressed incrementally.
+    """
+    records = _file_records(file_path)
+    try:
+        yield from _parse_records(records, types)
+    finally:
+        records.close()
+
+
+def iter_spf_buffer(data, types: Optional[Container[str]] = None) -> Iterator[dict]:
+    """Stream SPF records from a bytes-like buffer (bytes, bytearray or mmap), see iter_spf."""
+    return _parse_records(_buffer_records(data), types)
+
+
+def _parse_records(records: Iterator[bytes], types: Optional[Container[str]] = None) -> Iterator[dict]:
+    schema = None
+    section = None
+    warned = set()
+    for record in records:
+        if not record:
+            continue
+        if section != b"DATA":
+            keyword = record.upper()
+            if keyword in (b"HEADER", b"DATA"):
+                section = keyword
+                continue
+            if keyword == b"ENDSEC" or keyword.startswith(b"ISO-10303-21") or keyword.startswith(b"END-ISO-10303-21"):
+                continue
+            if section == b"HEADER":
+                header = _parse_header(record)
+                if header is not None:
+                    if header["type"] == "file_schema":
+                        identifiers = header.get("schema_identifiers") or ("IFC4",)
+                        schema = _Schema(identifiers[0])
+                    yield header
+            continue
+
+        if record.upper() == b"ENDSEC":
+            section = None
+            continue
+
+        if types is not None and schema is not None:
+            head = ENTITY_HEAD_RE.match(record)
+            if head is not None:
+                declaration = schema.entity(head.group(2).upper())
+                if declaration is not None and declaration[0] not in types:
+                    continue
+
+        entity = _parse_entity(record, schema)
+        if entity is None:
+            head = record[:60].decode("latin-1", "replace")
+            if head not in warned and len(warned) < 10:
+                warned.add(head)
+                warnings.warn(f"Skipping unsupported SPF record: {head}", UserWarning)
+            continue
+        yield entity
+
+
+def iter_spf_records(file_path: str) -> Iterator[Tuple[int, str, Optional[str], bytes]]:
+    """
+    Scan the data records of an SPF file without parsing their attributes.
+
+    Much cheaper than iter_spf; meant for fingerprinting entities (e.g. the
+    incremental writer's digest index).
+
+    Yields:
+        (entity id, entity type name, GlobalId for IfcRoot subtypes else None, raw record bytes)
+    """
+    for head, keyword, declaration, record, schema in _scan_records(file_path):
+        global_id = head.group(3)
+        if global_id is not None and not schema.is_rooted(keyword):
+            global_id = None
+        yield int(head.group(1)), declaration[0], global_id.decode("ascii", "replace") if global_id is not None else None, record
+
+
+def iter_spf_selected(file_path: str, types: Container[str]) -> Iterator[Tuple[int, str, Optional[dict]]]:
+    """
+    Scan the data records of an SPF file, parsing only those of the given types.
+
+    Every entity's id and type come from the record head, as in
+    iter_spf_records; the attributes are tokenized only for the selected
+    types (e.g. the relationships and spatial elements of lbd.BOT_writer).
+
+    Yields:
+        (entity id, entity type name, entity dictionary as in iter_spf if the type is selected else None)
+    """
+    for head, keyword, declaration, record, schema in _scan_records(file_path):
+        entity_type = declaration[0]
+        yield int(head.group(1)), entity_type, _parse_entity(record, schema) if entity_type in types else None
+
+
+def _scan_records(file_path: str):
+    """Data records with their head match, upper-case keyword, schema declaration and schema."""
+    records = _file_records(file_path)
+    try:
+        schema = None
+        in_data = False
+        for record in records:
+            if not in_data:
+                keyword = record.upper()
+                if keyword == b"DATA":
+                    in_data = True
+                elif keyword.startswith(b"FILE_SCHEMA"):
+                    header = _parse_header(record)
+                    identifiers = (header or {}).get("schema_identifiers") or ("IFC4",)
+                    schema = _Schema(identifiers[0])
+                continue
+            if record.upper() == b"ENDSEC":
+                in_data = False
+                continue
+            head = ENTITY_HEAD_RE.match(record)
+            if head is None or schema is None:
+                continue  # complex instances are skipped, as in iter_spf
+            keyword = head.group(2).upper()
+            declaration = schema.entity(keyword)
+            if declaration is None:
+                continue
+            yield head, keyword, declaration, record, schema
+    finally:
+        records.close()
+
+
+def _parse_header(record: bytes) -> Optional[dict]:
+    tokens = _tokenize(record)
+    if len(tokens) < 2 or not tokens[0][6] or tokens[1][7] != _OPEN:
+        return None
+    keyword = tokens[0][6].upper().decode("ascii")
+    values, _ = _parse_values(tokens, 2, None)
+    names = HEADER_ATTRIBUTES.get(keyword)
+    if names is None:
+        return None
+    entity = {"id": 0, "type": keyword.lower()}
+    entity.update(zip(names, values))
+    return entity
+
+
+def _parse_entity(record: bytes, schema: Optional[_Schema]) -> Optional[dict]:
+    tokens = _tokenize(record)
+    # '#' id '=' KEYWORD '(' ... ')'; complex (multi-type) instances are not supported
+    if len(tokens) < 4 or not tokens[0][2] or tokens[1][7] != b"=" or not tokens[2][6]:
+        return None
+    if schema is None:
+        return None
+    declaration = schema.entity(tokens[2][6].upper())
+    if declaration is None:
+        return None
+    type_name, names = declaration
+    values, _ = _parse_values(tokens, 4, schema)
+    entity = {"id": int(tokens[0][2]), "type": type_name}
+    entity.update(zip(names, values))
+    return entity
@@ -0,0 +1,103 @@
+"""Stream settings of one conversion: streaming reader and pipeline depth.
+
+The convert functions (ifc2lbd.convert) take the settings as keyword
+arguments (reader=..., pipeline_depth=...) and apply them for the duration
+of the call with stream_settings(), so that iter_stream and the output
+writers (lbd.output_buffer) deep inside the writers use them without every
+writer passing them along. Explicit arguments of iter_stream,
+get_schema_uri and open_output win; outside of any stream_settings() block
+the environment variables apply, which is how a value can be handed to
+worker processes that are not given it explicitly.
+
+The settings are context variables, so concurrent conversions on different
+threads do not see each other's settings.
+"""
+
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional
+
+# Streaming reader selection: 'auto' (stream2 if available, else built-in),
+# 'stream2' or 'builtin'
+STREAM_READER_ENV = "IFC2LBD_STREAM_READER"
+STREAM_READERS = ("auto", "stream2", "builtin")
+
+# Batches / blocks queued between the parse, format and write threads (0: one thread, see ifc.pipeline)
+PIPELINE_DEPTH_ENV = "IFC2LBD_PIPELINE_DEPTH"
+
+_reader: ContextVar[Optional[str]] = ContextVar("ifc2lbd_stream_reader", default=None)
+_pipeline_depth: ContextVar[Optional[int]] = ContextVar("ifc2lbd_pipeline_depth", default=None)
+
+
+def stream_reader(reader: Optional[str] = None) -> str:
+    """
+    Reader to use: the given one, else that of the enclosing stream_settings(), else $IFC2LBD_STREAM_READER or 'auto'.
+
+    Raises:
+        ValueError: For unknown reader names
+    """
+    reader = reader or _reader.get() or os.environ.get(STREAM_READER_ENV) or "auto"
+    if reader not in STREAM_READERS:
+        raise ValueError(f"Unknown stream reader '{reader}'. Available: {list(STREAM_READERS)}")
+    return reader
+
+
+def pipeline_depth(depth: Optional[int] = None) -> int:
+    """
+    Pipeline depth to use: the given one, else that of the enclosing stream_settings(), else $IFC2LBD_PIPELINE_DEPTH or 0.
+
+    Raises:
+        ValueError: For a negative depth (an invalid environment value counts as 0)
+    """
+    if depth is None:
+        depth = _pipeline_depth.get()
+    if depth is None:
+        try:
+            return max(0, int(os.environ.get(PIPELINE_DEPTH_ENV, "0")))
+        except ValueError:
+            return 0
+    if isinstance(depth, bool) or not isinstance(depth, int) or depth < 0:
+        raise ValueError(f"Pipeline depth must be a non-negative integer, got {depth!r}")
+    return depth
+
+
+# stream_settings' keyword argument shadows pipeline_depth()
+_checked_depth = pipeline_depth
+
+
+@contextmanager
+def stream_settings(reader: Optional[str] = None, pipeline_depth: Optional[int] = None):
+    """
+    Use these settings for the streaming readers and output writers within the block (None keeps the current one).
+
+    Raises:
+        ValueError: For unknown reader names or negative depths (before entering the block)
+    """
+    tokens = []
+    if reader is not None:
+        tokens.append((_reader, _reader.set(stream_reader(reader))))
+    if pipeline_depth is not None:
+        tokens.append((_pipeline_depth, _pipeline_depth.set(_checked_depth(pipeline_depth))))
+    try:
+        yield
+    finally:
+        for variable, token in reversed(tokens):
+            variable.reset(token)
+
+
+def iter_with_stream_settings(iterable: Iterable, reader: Optional[str] = None, pipeline_depth: Optional[int] = None) -> Iterator:
+    """
+    Iterate over a lazy iterable (e.g. a generator opening readers on first use) with the settings applied.
+
+    The settings are only active while the iterable computes its next item,
+    not while the caller holds the generator suspended between items.
+    """
+    iterator = iter(iterable)
+    while True:
+        with stream_settings(reader, pipeline_depth):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
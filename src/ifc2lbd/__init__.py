@@ -1,4 +1,7 @@
 """IFC to LBD conversion package."""
-from .convert import ifc_to_lbd_ttl, ifc_to_lbd_trig
+__version__ = "0.1.0"
 
-__all__ = ['ifc_to_lbd_ttl', 'ifc_to_lbd_trig']
+from .convert import ifc_to_lbd_ttl, ifc_to_lbd_ttl_incremental, ifc_to_lbd_trig, ifc_to_lbd_trig_dataset
+from .triples import iter_nt_batches, iter_triples, iter_ttl_batches
+
+__all__ = ['ifc_to_lbd_ttl', 'ifc_to_lbd_ttl_incremental', 'ifc_to_lbd_trig', 'ifc_to_lbd_trig_dataset', 'iter_nt_batches', 'iter_triples', 'iter_ttl_batches']
@@ -0,0 +1,98 @@
+"""Process-pool batch conversion of several IFC files."""
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def schedule_largest_first(pairs: List[Tuple[str, str]]) -> List[Tuple[int, str, str]]:
+    """
+    Order (input, output) pairs so the largest input files start first.
+
+    Starting the big models first keeps one huge file from being the last
+    (and only) job running while the other workers sit idle.
+
+    Returns:
+        List of (original 1-based index, input, output), largest input first
+    """
+    indexed = [(idx, input_file, output_file) for idx, (input_file, output_file) in enumerate(pairs, 1)]
+    return sorted(indexed, key=lambda task: os.path.getsize(task[1]), reverse=True)
+
+
+def _init_worker():
+    """Import the converter, ifcopenshell and the writers once per worker process."""
+    from ifc2lbd.convert import preload_writers
+    preload_writers()
+
+
+def convert_file(input_file: str, output_file: str, trig: bool, options: Dict) -> Tuple[bool, str]:
+    """
+    Convert one file inside a worker process.
+
+    Errors are caught here and returned, so one broken file does not take
+    down the pool.
+
+    Returns:
+        (success, error message with traceback or empty string)
+    """
+    from ifc2lbd.convert import ifc_to_lbd_ttl, ifc_to_lbd_trig, ifc_to_lbd_nt, output_format
+
+    try:
+        if output_format(output_file) in ("ntriples", "nquads"):
+            ifc_to_lbd_nt(input_file, output_file, **options)
+        elif trig:
+            ifc_to_lbd_trig(input_file, output_file, **options)
+        else:
+            ifc_to_lbd_ttl(input_file, output_file, **options)
+        return True, ""
+    except Exception as e:
+        return False, f"{e}\n{traceback.format_exc()}"
+
+
+def run_batch(pairs: List[Tuple[str, str]], jobs: int, trig: bool, options: Dict,
+              log: Callable[[str, bool], None], verbose: bool = False) -> int:
+    """
+    Convert (input, output) pairs on a pool of worker processes.
+
+    Each worker is a separate process with its own ifcopenshell instance.
+
+    Args:
+        pairs: List of (input IFC path, output path)
+        jobs: Number of worker processes
+        trig: If True, write TriG instead of Turtle (.nt/.nq outputs are always N-Triples/N-Quads)
+        options: Keyword arguments passed to the converter function
+        log: Logging function (message, verbose)
+        verbose: Print tracebacks of failed conversions
+
+    Returns:
+        Number of successful conversions
+    """
+    total = len(pairs)
+    success_count = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+        futures = {}
+        for idx, input_file, output_file in schedule_largest_first(pairs):
+            log(f"[{idx}/{total}] Queued '{input_file}' -> '{output_file}'", verbose)
+            future = pool.submit(convert_file, input_file, output_file, trig, options)
+            futures[future] = (idx, input_file)
+
+        for future in as_completed(futures):
+            idx, input_file = futures[future]
+            try:
+                ok, error = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. crashed inside the bindings)
+                ok, error = False, f"{e}\n"
+            if ok:
+                log(f"[{idx}/{total}] Completed successfully", verbose)
+                success_count += 1
+            else:
+                message, _, details = error.partition("\n")
+                print(f"Error converting '{input_file}': {message}", file=sys.stderr)
+                if verbose and details:
+                    print(details, file=sys.stderr, end="")
+    return success_count
@@ -0,0 +1,167 @@
+"""
+Content-addressed on-disk cache of conversion outputs.
+
+An entry is keyed by the hash of the input file's bytes, the converter, the
+namespaces, the output-affecting options and the ifc2lbd version, so renaming
+or touching an unchanged IFC file still hits, while any edit misses.
+
+Layout: <cache_dir>/objects/<key[:2]>/<key><suffix>. The entry's mtime is its
+last use; when the cache grows beyond max_bytes the least recently used
+entries are removed.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from ifc2lbd import __version__
+
+DEFAULT_CACHE_MAX_BYTES = 10 * 1024 ** 3  # 10 GiB
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def file_digest(path: str) -> str:
+    """
+    BLAKE2b digest of a file's contents.
+
+    The file is memory mapped and hashed in large chunks (hashlib releases
+    the GIL for those), which runs at disk/page-cache speed.
+    """
+    digest = hashlib.blake2b(digest_size=32)
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            view = memoryview(data)
+            try:
+                for start in range(0, len(view), HASH_CHUNK_SIZE):
+                    digest.update(view[start:start + HASH_CHUNK_SIZE])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """
+    Size-bounded LRU cache of converted files.
+
+    Args:
+        cache_dir: Cache directory (created if missing)
+        max_bytes: Total size of the cached outputs before LRU eviction
+        link: Hardlink outputs to cache entries instead of copying them (falls
+            back to copying across file systems)
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES, link: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.objects = self.cache_dir / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.link = link
+
+    def key(self, input_path: str, converter: str, namespaces: Dict[str, str], **options) -> str:
+        """
+        Cache key of one conversion.
+
+        Args:
+            input_path: Input IFC file (its contents are hashed, not its name)
+            converter: Converter name
+            namespaces: Prefix -> URI mapping used for the output
+            **options: Anything else that changes the output bytes (format, stream mode, graph name, ...)
+        """
+        description = {
+            "input": file_digest(input_path),
+            "converter": converter,
+            "namespaces": namespaces,
+            "options": options,
+            "version": __version__,
+        }
+        encoded = json.dumps(description, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=32).hexdigest()
+
+    def entry_path(self, key: str, suffix: str = "") -> Path:
+        return self.objects / key[:2] / f"{key}{suffix}"
+
+    def fetch(self, key: str, output_path: str) -> bool:
+        """
+        Put the cached output for key at output_path.
+
+        Returns:
+            True on a hit, False if the key is not cached
+        """
+        entry = self.entry_path(key, Path(output_path).suffix)
+        try:
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            return False
+        self._place(entry, Path(output_path))
+        return True
+
+    def store(self, key: str, output_path: str):
+        """Add a freshly written output to the cache, then evict down to max_bytes."""
+        entry = self.entry_path(key, Path(output_path).suffix)
+        entry.parent.mkdir(exist_ok=True)
+        # Place under a temporary name first, so readers never see a partial entry
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{key}.", dir=entry.parent)
+        os.close(fd)
+        tmp = Path(tmp_name)
+        try:
+            self._place(Path(output_path), tmp)
+            os.replace(tmp, entry)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        self.evict()
+
+    def _place(self, source: Path, target: Path):
+        """Hardlink (or copy) source to target, replacing target."""
+        if target.exists() or target.is_symlink():
+            target.unlink()
+        if self.link:
+            try:
+                os.link(source, target)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(source, target)
+
+    def size(self) -> int:
+        """Total size in bytes of the cached entries."""
+        return sum(entry.stat().st_size for entry in self.objects.glob("*/*") if not entry.name.startswith("."))
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Remove least recently used entries until the cache fits max_bytes.
+
+        Returns:
+            Number of entries removed
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        total = 0
+        for entry in self.objects.glob("*/*"):
+            if entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # evicted by another process meanwhile
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+            total += stat.st_size
+
+        removed = 0
+        for _, size, entry in sorted(entries, key=lambda item: item[0]):
+            if total <= max_bytes:
+                break
+            try:
+                entry.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
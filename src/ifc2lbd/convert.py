@@ -1,36 +1,235 @@
 """Core conversion logic from IFC to LBD Turtle format."""
+import functools
+import inspect
+import os
 import sys
+import tempfile
 from pathlib import Path
-import time
-import cProfile
-import pstats
-from io import StringIO
+from contextlib import contextmanager
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-import ifcopenshell
-from ifc.ifc_options import load_ifc, stream_ifc, get_schema_uri
-from lbd.TTL_writer_strings_spf import string_writer_mini_ifcOWL, string_writer_ifcOWL
-from lbd.TTL_writer_strings_stream import string_writer_mini_ifcOWL_stream, string_writer_ifcOWL_stream
-# from lbd.ifcow_express_writer import string_writer_ifcowl_express  # 
-
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from lbd.compression import compression_for_path, strip_compression_suffix
+from handling_logging.metrics import Stage, peak_memory_mb
+from ifc2lbd.cache import DEFAULT_CACHE_MAX_BYTES, ConversionCache
+from ifc2lbd.registry import LazyRegistry
+from ifc.stream_settings import stream_settings
+# ifcopenshell and the writer modules are imported on first use (see ifc2lbd.registry),
+# so importing this module (e.g. for the CLI's argument checks) stays fast
+# from lbd.ifcow_express_writer import string_writer_ifcowl_express  #
 
 # Map converter names to writer functions (for loaded models)
-CONVERTERS = {
-    "mini_ifcowl": string_writer_mini_ifcOWL,
-    "ifcowl": string_writer_ifcOWL,
-    # "ifcowl_express": string_writer_ifcowl_express,s
-}
+CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TTL_writer_strings_spf:string_writer_mini_ifcOWL",
+    "ifcowl": "lbd.TTL_writer_strings_spf:string_writer_ifcOWL",
+    "bot": "lbd.BOT_writer:string_writer_bot",
+    # "ifcowl_express": "lbd.ifcow_express_writer:string_writer_ifcowl_express",
+})
 
 # Map converter names to streaming writer functions
-STREAM_CONVERTERS = {
-    "mini_ifcowl": string_writer_mini_ifcOWL_stream,
-    "ifcowl": string_writer_ifcOWL_stream,
+STREAM_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TTL_writer_strings_stream:string_writer_mini_ifcOWL_stream",
+    "ifcowl": "lbd.TTL_writer_strings_stream:string_writer_ifcOWL_stream",
+    "bot": "lbd.BOT_writer:string_writer_bot_stream",
     # "ifcowl_express": Not yet implemented for streaming
+})
+
+# Map converter names to single-pass streaming writer functions
+SINGLE_PASS_STREAM_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TTL_writer_strings_stream:string_writer_mini_ifcOWL_stream_single_pass",
+})
+
+# Map converter names to sharded parallel writer functions (for loaded models)
+PARALLEL_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TTL_writer_strings_parallel:string_writer_mini_ifcOWL_parallel",
+})
+
+# Map converter names to incremental (patching) writer functions
+INCREMENTAL_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TTL_writer_strings_incremental:string_writer_mini_ifcOWL_patched",
+})
+
+# Map converter names to TriG writer functions (single file, single graph)
+TRIG_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TRIG_writer_strings:string_writer_mini_ifcOWL_trig",
+})
+
+STREAM_TRIG_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TRIG_writer_strings:string_writer_mini_ifcOWL_trig_stream",
+})
+
+# Map converter names to named graph block writers (for TriG datasets)
+GRAPH_WRITERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TRIG_writer_strings:write_graph_mini_ifcOWL",
+})
+
+STREAM_GRAPH_WRITERS = LazyRegistry({
+    "mini_ifcowl": "lbd.TRIG_writer_strings:write_graph_mini_ifcOWL_stream",
+})
+
+# Converters whose loaded and streaming writers can deduplicate value entities (dedup=True)
+DEDUP_CONVERTERS = ("mini_ifcowl", "ifcowl")
+
+# Map converter names to N-Triples / N-Quads writer functions (one file or line-balanced shards)
+NT_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.NT_writer_strings:string_writer_mini_ifcOWL_nt",
+})
+
+STREAM_NT_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.NT_writer_strings:string_writer_mini_ifcOWL_nt_stream",
+})
+
+# Map converter names to N-Quads graph writers (for N-Quads datasets)
+NQ_GRAPH_WRITERS = LazyRegistry({
+    "mini_ifcowl": "lbd.NT_writer_strings:write_graph_mini_ifcOWL_nq",
+})
+
+STREAM_NQ_GRAPH_WRITERS = LazyRegistry({
+    "mini_ifcowl": "lbd.NT_writer_strings:write_graph_mini_ifcOWL_nq_stream",
+})
+
+# Map converter names to SQLite quad-table writer functions (new database)
+SQLITE_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.SQLITE_writer:string_writer_mini_ifcOWL_sqlite",
+})
+
+STREAM_SQLITE_CONVERTERS = LazyRegistry({
+    "mini_ifcowl": "lbd.SQLITE_writer:string_writer_mini_ifcOWL_sqlite_stream",
+})
+
+# Map converter names to writers loading one graph into an open QuadStore (for SQLite datasets)
+SQLITE_GRAPH_WRITERS = LazyRegistry({
+    "mini_ifcowl": "lbd.SQLITE_writer:write_graph_mini_ifcOWL_sqlite",
+})
+
+STREAM_SQLITE_GRAPH_WRITERS = LazyRegistry({
+    "mini_ifcowl": "lbd.SQLITE_writer:write_graph_mini_ifcOWL_sqlite_stream",
+})
+
+# Dataset format -> (graph writers, streaming graph writers)
+DATASET_GRAPH_WRITERS = {
+    "trig": (GRAPH_WRITERS, STREAM_GRAPH_WRITERS),
+    "nquads": (NQ_GRAPH_WRITERS, STREAM_NQ_GRAPH_WRITERS),
+}
+DATASET_LABELS = {
+    "trig": "TriG",
+    "nquads": "N-Quads",
 }
 
+# Output suffix (in front of a compression suffix) -> format
+OUTPUT_FORMATS = {
+    ".ttl": "turtle",
+    ".trig": "trig",
+    ".nt": "ntriples",
+    ".nq": "nquads",
+    ".sqlite": "sqlite",
+    ".db": "sqlite",
+}
+
+
+def preload_writers():
+    """Import ifcopenshell and all registered writers now (e.g. once per worker process, before its first job)."""
+    import ifc.ifc_options  # noqa: F401
+    for registry in (CONVERTERS, STREAM_CONVERTERS, SINGLE_PASS_STREAM_CONVERTERS, PARALLEL_CONVERTERS, INCREMENTAL_CONVERTERS,
+                     TRIG_CONVERTERS, STREAM_TRIG_CONVERTERS, GRAPH_WRITERS, STREAM_GRAPH_WRITERS,
+                     NT_CONVERTERS, STREAM_NT_CONVERTERS, NQ_GRAPH_WRITERS, STREAM_NQ_GRAPH_WRITERS,
+                     SQLITE_CONVERTERS, STREAM_SQLITE_CONVERTERS, SQLITE_GRAPH_WRITERS, STREAM_SQLITE_GRAPH_WRITERS):
+        for name in registry:
+            registry[name]
+
+
+def output_format(output_path: str) -> str:
+    """Output format from the file suffix ('x.nq.gz' -> 'nquads'); anything unknown is Turtle."""
+    return OUTPUT_FORMATS.get(Path(strip_compression_suffix(output_path)).suffix.lower(), "turtle")
+
+
+# Keyword arguments of the convert functions that are applied as stream settings (ifc.stream_settings)
+STREAM_SETTINGS = ("reader", "pipeline_depth")
+
+
+def _applies_stream_settings(function):
+    """Run a convert function with its stream setting arguments applied to the readers it opens."""
+    signature = inspect.signature(function)
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        arguments = signature.bind(*args, **kwargs).arguments
+        with stream_settings(**{name: arguments.get(name) for name in STREAM_SETTINGS}):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def build_namespaces(schema: str) -> dict:
+    """
+    Choosing ontologies/namespaces to use for a given IFC schema identifier.
+
+    Args:
+        schema: IFC schema identifier (e.g. 'IFC2X3', 'IFC4')
+
+    Returns:
+        Dictionary of prefix -> URI mappings
+    """
+    mini_ifc_name = f"https://mini-ifc.ifc/{schema}/#"
+    return {
+        "BASE": "http://example.org/base#",
+        #"IFC": get_schema_uri(schema_source),
+        "MINIIFC": mini_ifc_name,
+        #"IFC": get_schema_uri(schema_source),
+        "INST": "https://lbd-lbd.lbd/ifc/instances#",
+        "LIST": "https://w3id.org/list#",
+        "EXPRESS": "https://w3id.org/express#",
+        "RDF": "http://www.w3.org/1999/02/22-rdf#",
+        "XSD": "http://www.w3.org/2001/XMLSchema#",
+        "OWL": "http://www.w3.org/2002/07/owl#"
+    }
+
+
+def _filter_options(include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune") -> dict:
+    """Type filter settings as keyword arguments (empty without a filter, so cache keys stay the same)."""
+    if not include_types and not exclude_types:
+        return {}
+    return {"include_types": list(include_types or []), "exclude_types": list(exclude_types or []), "dropped_refs": dropped_refs}
+
+
+def _build_type_filter(schema: str, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune"):
+    """TypeFilter for a schema, or None if no types are included or excluded."""
+    if not include_types and not exclude_types:
+        return None
+    from lbd.type_filter import TypeFilter
+    return TypeFilter(schema, include_types, exclude_types, dropped_refs)
+
+
+def _parallel_workers_share_model() -> bool:
+    from lbd.TTL_writer_strings_parallel import workers_share_model
+    return workers_share_model()
+
+
+def _fetch_cached(cache_dir: str, cache_max_bytes: int, input_ifc_path: str, output_path: str, converter: str, verbose: bool, **options):
+    """
+    Look a conversion up in the cache and place the cached output on a hit.
+
+    Returns:
+        (cache, key, hit); the caller stores the output under key after a miss
+    """
+    from ifc.ifc_options import get_schema_uri
+    
+    with Stage("cache_lookup", input_ifc_path, output_path):
+        cache = ConversionCache(cache_dir, cache_max_bytes)
+        # Header-only schema read, the model is not parsed
+        namespaces = build_namespaces(get_schema_uri(input_ifc_path))
+        compression = compression_for_path(output_path)
+        if compression:
+            options["compression"] = compression
+        key = cache.key(input_ifc_path, converter, namespaces, **options)
+        hit = cache.fetch(key, output_path)
+    if verbose:
+        print(f"Cache {'hit' if hit else 'miss'}: {key[:16]}")
+    return cache, key, hit
+
 
-def ifc_to_lbd_ttl(input_ifc_path: str, output_ttl_path: str, stream: bool = False, verbose: bool = False, profile: bool = False, converter: str = "mini_ifcowl") -> None:
+@_applies_stream_settings
+def ifc_to_lbd_ttl(input_ifc_path: str, output_ttl_path: str, stream: bool = False, verbose: bool = False, profile: bool = False, converter: str = "mini_ifcowl", single_pass: bool = False, jobs: int = 1, buffer_size: int = DEFAULT_BUFFER_SIZE, mmap_index: bool = False, cache_dir: str = None, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", dedup: bool = False, same_as_path: str = None, reader: str = None, pipeline_depth: int = None) -> None:
     """
     Convert a single IFC file to LBD Turtle format.
     
@@ -40,72 +239,143 @@ def ifc_to_lbd_ttl(input_ifc_path: str, output_ttl_path: str, stream: bool = Fal
         stream: If True, stream the IFC file instead of loading to memory
         verbose: If True, print timing information
         profile: If True, run with cProfile and save stats
-        converter: Which converter to use ('mini_ifcowl', 'ifcowl', 'mini_reference')
+        converter: Which converter to use ('mini_ifcowl', 'ifcowl', 'bot', 'mini_reference')
+        single_pass: If True (with stream), read the IFC file only once, taking the schema from its header
+        jobs: Number of worker processes serializing shards of a loaded model (1 = sequential)
+        buffer_size: Output buffer size in bytes
+        mmap_index: If True (with stream), keep the ID->type index in a memory-mapped temporary file
+        cache_dir: If given, reuse the output of an earlier identical conversion from this cache directory
+        cache_max_bytes: Size limit of the cache (least recently used outputs are evicted)
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes), e.g. ['no-geometry']
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        dedup: If True, write one representative per class of structurally identical value entities
+            (no GlobalId) and point all references to it
+        same_as_path: With dedup, also write owl:sameAs links from the dropped duplicates to their
+            representatives to this file (the cache is not used then)
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
     """
+    from ifc.ifc_options import get_schema_uri, load_ifc, stream_ifc
+    
+    if single_pass and not stream:
+        raise ValueError("Single-pass mode requires streaming (stream=True)")
+    
+    if same_as_path and not dedup:
+        raise ValueError("same_as_path requires dedup=True")
+    
+    if dedup and converter not in DEDUP_CONVERTERS:
+        raise ValueError(f"Deduplication not yet implemented for converter '{converter}'. Available: {list(DEDUP_CONVERTERS)}")
+    
+    if dedup and (single_pass or (jobs > 1 and not stream)):
+        raise ValueError("Deduplication not yet implemented for single-pass or parallel serialization")
+
+    if single_pass and converter not in SINGLE_PASS_STREAM_CONVERTERS:
+        raise ValueError(f"Single-pass streaming not yet implemented for converter '{converter}'. Available: {list(SINGLE_PASS_STREAM_CONVERTERS.keys())}")
+
     if stream and converter not in STREAM_CONVERTERS:
         raise ValueError(f"Streaming not yet implemented for converter '{converter}'. Available for streaming: {list(STREAM_CONVERTERS.keys())}")
     
     if not stream and converter not in CONVERTERS:
         raise ValueError(f"Unknown converter '{converter}'. Available: {list(CONVERTERS.keys())}")
     
+    if jobs > 1 and not stream and converter not in PARALLEL_CONVERTERS:
+        raise ValueError(f"Parallel serialization not yet implemented for converter '{converter}'. Available: {list(PARALLEL_CONVERTERS.keys())}")
+    
+    dedup_options = dict(dedup=True, same_as_path=same_as_path) if dedup else {}
+    
+    # The output is replaced, so the digest index of an earlier incremental run no longer describes it
+    from lbd.TTL_writer_strings_incremental import discard_digest_index
+    discard_digest_index(output_ttl_path)
+    
+    # The sidecar is not cached
+    use_cache = cache_dir and not same_as_path
+    if use_cache:
+        # Loaded and streamed output differ; single-pass and parallel match their base mode
+        cache, cache_key, hit = _fetch_cached(cache_dir, cache_max_bytes, input_ifc_path, output_ttl_path, converter, verbose, format="ttl", stream=stream,
+                                              **_filter_options(include_types, exclude_types, dropped_refs), **({"dedup": True} if dedup else {}))
+        if hit:
+            return
+    
     if profile:
+        import cProfile
         profiler = cProfile.Profile()
         profiler.enable()
     
-    start_total = time.time()
+    total = Stage("total", input_ifc_path, output_ttl_path).start()
     
-    # Load or stream IFC model
-    start_load = time.time()
-    if stream:
-        ifc_model_or_iterator, file_path = stream_ifc(input_ifc_path)
-        # For streaming, we pass the file path to get schema
-        schema_source = file_path if file_path else ifc_model_or_iterator
-    else:
-        ifc_model_or_iterator = load_ifc(input_ifc_path)
-        schema_source = ifc_model_or_iterator
-    
-    load_time = time.time() - start_load
-    if verbose:
-        print(f"{'Streaming' if stream else 'Loading'} IFC: {load_time:.3f}s")
+    # Parallel shards on spawned workers: every worker loads the file itself, a parent copy would only cost memory
+    workers_load = jobs > 1 and not stream and not _parallel_workers_share_model()
     
-    # Choosing ontologies/namespaces to use
-    mini_ifc_name = f"https://mini-ifc.ifc/{get_schema_uri(schema_source)}/#"
-    namespaces = {
-        "BASE": "http://example.org/base#",
-        #"IFC": get_schema_uri(schema_source),
-        "MINIIFC": mini_ifc_name,
-        #"IFC": get_schema_uri(schema_source),
-        "INST": "https://lbd-lbd.lbd/ifc/instances#",
-        "LIST": "https://w3id.org/list#",
-        "EXPRESS": "https://w3id.org/express#",
-        "RDF": "http://www.w3.org/1999/02/22-rdf#",
-        "XSD": "http://www.w3.org/2001/XMLSchema#",
-        "OWL": "http://www.w3.org/2002/07/owl#"
-    }
+    # Load or stream IFC model (streaming only reads the header here)
+    with Stage("header" if stream or workers_load else "load", input_ifc_path, output_ttl_path) as load:
+        if single_pass:
+            # Nothing to open up front, the writer reads the header in its only pass
+            ifc_model_or_iterator, schema_source = None, None
+        elif workers_load:
+            ifc_model_or_iterator, schema_source = None, input_ifc_path
+        elif stream:
+            ifc_model_or_iterator, file_path = stream_ifc(input_ifc_path)
+            # For streaming, we pass the file path to get schema
+            schema_source = file_path if file_path else ifc_model_or_iterator
+        else:
+            ifc_model_or_iterator = load_ifc(input_ifc_path)
+            schema_source = ifc_model_or_iterator
+        
+        # Choosing ontologies/namespaces to use
+        if single_pass:
+            # Resolved by the writer once the header schema is known
+            namespaces = build_namespaces
+            # The filter needs the schema up front; reading the header alone is cheap
+            type_filter = _build_type_filter(get_schema_uri(input_ifc_path), include_types, exclude_types, dropped_refs) \
+                if include_types or exclude_types else None
+        else:
+            schema = get_schema_uri(schema_source)
+            namespaces = build_namespaces(schema)
+            type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
     
+    if verbose:
+        print(f"{'Streaming' if stream else 'Reading header of' if workers_load else 'Loading'} IFC: {load.seconds:.3f}s")
     
     # Writer just serializes what it's told
-    start_write = time.time()
-    if stream:
-        writer_function = STREAM_CONVERTERS[converter]
-        writer_function(input_ifc_path, output_ttl_path, namespaces)
-    else:
-        writer_function = CONVERTERS[converter]
-        writer_function(ifc_model_or_iterator, output_ttl_path, namespaces)
+    # (the writers emit their own type_map / serialize / flush stage records)
+    with Stage("write", input_ifc_path, output_ttl_path) as write:
+        if single_pass:
+            writer_function = SINGLE_PASS_STREAM_CONVERTERS[converter]
+            writer_function(input_ifc_path, output_ttl_path, namespaces, buffer_size=buffer_size, mmap_index=mmap_index, type_filter=type_filter)
+        elif stream:
+            writer_function = STREAM_CONVERTERS[converter]
+            writer_function(input_ifc_path, output_ttl_path, namespaces, buffer_size=buffer_size, mmap_index=mmap_index, type_filter=type_filter,
+                            **dedup_options)
+        elif jobs > 1:
+            writer_function = PARALLEL_CONVERTERS[converter]
+            writer_function(ifc_model_or_iterator, output_ttl_path, namespaces, input_ifc_path, jobs=jobs, buffer_size=buffer_size, type_filter=type_filter)
+        else:
+            writer_function = CONVERTERS[converter]
+            writer_function(ifc_model_or_iterator, output_ttl_path, namespaces, buffer_size=buffer_size, type_filter=type_filter, **dedup_options)
+        write.bytes_written = os.path.getsize(output_ttl_path)
     
-    write_time = time.time() - start_write
     if verbose:
-        print(f"Writing TTL: {write_time:.3f}s")
+        print(f"Writing TTL: {write.seconds:.3f}s")
     
-    total_time = time.time() - start_total
+    if use_cache:
+        cache.store(cache_key, output_ttl_path)
+    
+    total.bytes_written = write.bytes_written
+    total.stop()
     if verbose:
-        print(f"Total conversion: {total_time:.3f}s")
+        print(f"Total conversion: {total.seconds:.3f}s")
+        peak = peak_memory_mb()
+        if peak is not None:
+            print(f"Peak memory: {peak:.1f} MiB")
     
     if profile:
         profiler.disable()
-        stats_file = output_ttl_path.replace('.ttl', '_profile.stats')
+        stats_file = strip_compression_suffix(output_ttl_path).replace('.ttl', '_profile.stats')
         profiler.dump_stats(stats_file)
         
+        import pstats
+        from io import StringIO
         s = StringIO()
         ps = pstats.Stats(profiler, stream=s).sort_stats('cumulative')
         ps.print_stats(20)
@@ -118,8 +388,82 @@ def ifc_to_lbd_ttl(input_ifc_path: str, output_ttl_path: str, stream: bool = Fal
         print(f"To analyze: python -m pstats {stats_file}")
 
 
-# Not there yet.
-def ifc_to_lbd_trig(input_ifc_path: str, output_trig_path: str, stream: bool = False, verbose: bool = False, profile: bool = False, converter: str = "mini_ifcowl") -> None:
+@_applies_stream_settings
+def ifc_to_lbd_ttl_incremental(input_ifc_path: str, output_ttl_path: str, previous: str = None, delta_path: str = None, verbose: bool = False, converter: str = "mini_ifcowl", buffer_size: int = DEFAULT_BUFFER_SIZE, pipeline_depth: int = None) -> None:
+    """
+    Convert a new revision of an IFC file, re-serializing only the entities that changed.
+    
+    The previous revision is described by a digest index (written next to every
+    incremental output as <output>.digests) or by the previous IFC file itself.
+    With an index whose TTL file still exists unchanged since the index was
+    written, unchanged entities are copied from that TTL file; otherwise every
+    entity is serialized. The result equals a full conversion either way.
+    
+    Args:
+        input_ifc_path: Path to the new IFC revision
+        output_ttl_path: Path to output TTL file (may be the previous output)
+        previous: Previous digest index (.digests) or previous IFC file; default: the
+            index of output_ttl_path, if there is one
+        delta_path: If given, also write the changes as a SPARQL Update to this file
+        verbose: If True, print timing information and change counts
+        converter: Which converter to use ('mini_ifcowl')
+        buffer_size: Output buffer size in bytes
+        pipeline_depth: Blocks queued for the output writer thread (0: written on the calling thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+    """
+    from ifc.ifc_options import get_schema_uri, load_ifc
+    from lbd.TTL_writer_strings_incremental import digest_index_matches, digest_index_path, read_digest_index, scan_digests, write_sparql_update
+    
+    if converter not in INCREMENTAL_CONVERTERS:
+        raise ValueError(f"Incremental conversion not yet implemented for converter '{converter}'. Available: {list(INCREMENTAL_CONVERTERS.keys())}")
+    
+    if compression_for_path(output_ttl_path):
+        # Unchanged blocks are copied by byte range out of the previous output
+        raise ValueError("Incremental conversion needs an uncompressed TTL output")
+    
+    if previous is None and os.path.exists(digest_index_path(output_ttl_path)):
+        previous = digest_index_path(output_ttl_path)
+    
+    total = Stage("total", input_ifc_path, output_ttl_path).start()
+    
+    # Previous revision: stored index (pointing into its TTL file) or a re-scan of the old IFC
+    previous_index, previous_ttl_path = {}, None
+    if previous:
+        with Stage("previous_index", previous, output_ttl_path) as stage:
+            if previous.endswith(".digests"):
+                previous_index = read_digest_index(previous)
+                previous_ttl_path = previous[:-len(".digests")]
+                if not digest_index_matches(previous, previous_ttl_path):
+                    # The TTL file was replaced since (or the index predates output stamps):
+                    # its byte ranges are not trustworthy, serialize everything
+                    if verbose:
+                        print(f"{previous_ttl_path} does not match its digest index, re-serializing all entities")
+                    previous_ttl_path = None
+            else:
+                previous_index = scan_digests(previous)
+            stage.entities = len(previous_index)
+    
+    with Stage("load", input_ifc_path, output_ttl_path):
+        ifc_model = load_ifc(input_ifc_path)
+        namespaces = build_namespaces(get_schema_uri(ifc_model))
+    
+    writer_function = INCREMENTAL_CONVERTERS[converter]
+    diff = writer_function(ifc_model, output_ttl_path, namespaces, input_ifc_path,
+                           previous_index=previous_index, previous_ttl_path=previous_ttl_path, buffer_size=buffer_size)
+    
+    if delta_path:
+        with Stage("delta", input_ifc_path, delta_path) as stage:
+            write_sparql_update(delta_path, diff, ifc_model, previous_index, namespaces, buffer_size)
+            stage.entities = len(diff.added) + len(diff.changed) + len(diff.removed)
+    
+    total.bytes_written = os.path.getsize(output_ttl_path)
+    total.stop()
+    if verbose:
+        print(f"Entities: {len(diff.added)} added, {len(diff.changed)} changed, {len(diff.removed)} removed, {len(diff.unchanged)} unchanged")
+        print(f"Total conversion: {total.seconds:.3f}s")
+
+
+@_applies_stream_settings
+def ifc_to_lbd_trig(input_ifc_path: str, output_trig_path: str, stream: bool = False, verbose: bool = False, profile: bool = False, converter: str = "mini_ifcowl", buffer_size: int = DEFAULT_BUFFER_SIZE, cache_dir: str = None, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", reader: str = None, pipeline_depth: int = None) -> None:
     """
     Convert a single IFC file to LBD (Linked Building Data) TriG format.
     Used when processing multiple files to keep each in separate named graphs.
@@ -131,36 +475,441 @@ def ifc_to_lbd_trig(input_ifc_path: str, output_trig_path: str, stream: bool = F
         verbose: If True, print timing information
         profile: If True, run with cProfile and save stats
         converter: Which converter to use ('mini_ifcowl', 'ifcowl', 'mini_reference')
+        buffer_size: Output buffer size in bytes
+        cache_dir: If given, reuse the output of an earlier identical conversion from this cache directory
+        cache_max_bytes: Size limit of the cache (least recently used outputs are evicted)
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
     """
-    if converter not in CONVERTERS:
-        raise ValueError(f"Unknown converter '{converter}'. Available: {list(CONVERTERS.keys())}")
+    from ifc.ifc_options import get_schema_uri, load_ifc
+    from lbd.TRIG_writer_strings import graph_name
+    
+    if converter not in TRIG_CONVERTERS:
+        raise ValueError(f"TriG output not yet implemented for converter '{converter}'. Available: {list(TRIG_CONVERTERS.keys())}")
+    
+    if cache_dir:
+        # The input path is recorded in the prologue comments and the graph name
+        cache, cache_key, hit = _fetch_cached(cache_dir, cache_max_bytes, input_ifc_path, output_trig_path, converter, verbose, format="trig", stream=stream, source=input_ifc_path,
+                                              **_filter_options(include_types, exclude_types, dropped_refs))
+        if hit:
+            return
+    
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    total = Stage("total", input_ifc_path, output_trig_path).start()
+    graph = graph_name(input_ifc_path)
     
     if stream:
-        ifc_model = stream_ifc(input_ifc_path)
+        with Stage("header", input_ifc_path, output_trig_path):
+            schema = get_schema_uri(input_ifc_path)
+            namespaces = build_namespaces(schema)
+        type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+        writer_function = STREAM_TRIG_CONVERTERS[converter]
+        writer_function(input_ifc_path, output_trig_path, namespaces, graph, buffer_size=buffer_size, type_filter=type_filter)
     else:
-        ifc_model = load_ifc(input_ifc_path)
+        with Stage("load", input_ifc_path, output_trig_path):
+            ifc_model = load_ifc(input_ifc_path)
+            schema = get_schema_uri(ifc_model)
+            namespaces = build_namespaces(schema)
+        type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+        writer_function = TRIG_CONVERTERS[converter]
+        writer_function(ifc_model, output_trig_path, namespaces, graph, source=input_ifc_path, buffer_size=buffer_size,
+                        type_filter=type_filter)
     
-    namespaces = {
-        "BASE": "http://example.org/base#",
-        "IFC": get_schema_uri(ifc_model),
-        "INST": "https://lbd-lbd.lbd/ifc/instances#",
-        "LIST": "https://w3id.org/list#",
-        "EXPRESS": "https://w3id.org/express#",
-        "RDF": "http://www.w3.org/1999/02/22-rdf#",
-        "XSD": "http://www.w3.org/2001/XMLSchema#",
-        "OWL": "http://www.w3.org/2002/07/owl#"
-    }
+    if cache_dir:
+        cache.store(cache_key, output_trig_path)
+    
+    total.bytes_written = os.path.getsize(output_trig_path)
+    total.stop()
+    if verbose:
+        print(f"Total conversion: {total.seconds:.3f}s")
+    
+    if profile:
+        profiler.disable()
+        stats_file = strip_compression_suffix(output_trig_path).replace('.trig', '_profile.stats')
+        profiler.dump_stats(stats_file)
+        print(f"Profile stats saved to: {stats_file}")
+
+
+@_applies_stream_settings
+def _write_graph_fragment(input_ifc_path: str, fragment_path: str, graph: str, stream: bool, converter: str, buffer_size: int = DEFAULT_BUFFER_SIZE, filter_options: dict = None, dataset_format: str = "trig", reader: str = None,
+                          pipeline_depth: int = None) -> str:
+    """
+    Write one input file as a named graph into a fragment file (runs in a worker).
+
+    The type filter is built here from filter_options, as the inputs may use different schemas.
+    The stream settings (reader, pipeline_depth) are passed in explicitly, as the worker process does not share them.
+
+    Returns:
+        Schema identifier of the input file
+    """
+    from ifc.ifc_options import get_schema_uri, load_ifc
+    
+    graph_writers, stream_graph_writers = DATASET_GRAPH_WRITERS[dataset_format]
+    with open_output(fragment_path, buffer_size) as f:
+        if stream:
+            with Stage("header", input_ifc_path, fragment_path):
+                schema = get_schema_uri(input_ifc_path)
+            type_filter = _build_type_filter(schema, **(filter_options or {}))
+            stream_graph_writers[converter](f, input_ifc_path, graph, build_namespaces(schema), type_filter)
+        else:
+            with Stage("load", input_ifc_path, fragment_path):
+                ifc_model = load_ifc(input_ifc_path)
+                schema = get_schema_uri(ifc_model)
+            type_filter = _build_type_filter(schema, **(filter_options or {}))
+            graph_writers[converter](f, ifc_model, graph, build_namespaces(schema), type_filter)
+    return schema
+
+
+@contextmanager
+def _graph_fragments(input_ifc_paths: list, output_path: str, stream: bool, converter: str, jobs: int, buffer_size: int, filter_options: dict, dataset_format: str,
+                     settings: dict = None):
+    """
+    Write every input as a named graph into its own temporary fragment, on a process pool.
+
+    Files are scheduled largest first. Yields (fragment paths, schemas), both in
+    input order, for the caller to assemble the dataset; the fragments are
+    removed afterwards. settings are the stream settings keyword arguments of the workers.
+
+    Raises:
+        RuntimeError: If any of the inputs failed
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from ifc2lbd.batch import schedule_largest_first
+    from lbd.TRIG_writer_strings import graph_names
+    
+    # Unique graph name per input, even if two files share a stem
+    graphs = graph_names(input_ifc_paths)
+    
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fragment_paths = []
+    try:
+        for i in range(len(input_ifc_paths)):
+            fd, fragment_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_path)}.{i}.", suffix=".part", dir=out_dir)
+            os.close(fd)
+            fragment_paths.append(fragment_path)
+        
+        pairs = list(zip(input_ifc_paths, fragment_paths))
+        schemas = [None] * len(pairs)
+        errors = []
+        with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {}
+            for idx, input_ifc_path, fragment_path in schedule_largest_first(pairs):
+                future = pool.submit(_write_graph_fragment, input_ifc_path, fragment_path, graphs[idx - 1], stream, converter, buffer_size,
+                                     filter_options, dataset_format, **(settings or {}))
+                futures[future] = idx - 1
+            for future, i in futures.items():
+                try:
+                    schemas[i] = future.result()
+                except Exception as e:
+                    errors.append(f"'{input_ifc_paths[i]}': {e}")
+        
+        if errors:
+            raise RuntimeError(f"{DATASET_LABELS[dataset_format]} dataset not written, failed inputs: " + "; ".join(errors))
+        
+        yield fragment_paths, schemas
+    finally:
+        for fragment_path in fragment_paths:
+            if os.path.exists(fragment_path):
+                os.remove(fragment_path)
+
+
+@_applies_stream_settings
+def ifc_to_lbd_trig_dataset(input_ifc_paths: list, output_trig_path: str, stream: bool = False, verbose: bool = False, converter: str = "mini_ifcowl", jobs: int = 1, buffer_size: int = DEFAULT_BUFFER_SIZE, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", reader: str = None, pipeline_depth: int = None) -> None:
+    """
+    Convert several IFC files into one TriG dataset, one named graph per file.
+    
+    Every file is serialized by its own worker (largest files first) into a
+    temporary graph fragment; the fragments are then concatenated, in input
+    order, behind one shared prologue. The prologue prefixes are taken from the
+    first input's schema; each graph records its own imported schema.
+    
+    Args:
+        input_ifc_paths: Paths to input IFC files
+        output_trig_path: Path to output TRIG file
+        stream: If True, stream the IFC files instead of loading to memory
+        verbose: If True, print timing information
+        converter: Which converter to use ('mini_ifcowl')
+        jobs: Number of worker processes
+        buffer_size: Output buffer size in bytes
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+    
+    Raises:
+        RuntimeError: If any of the inputs failed; no dataset is written then
+    """
+    from lbd.TRIG_writer_strings import write_trig_prologue
+    
+    if converter not in GRAPH_WRITERS:
+        raise ValueError(f"TriG output not yet implemented for converter '{converter}'. Available: {list(GRAPH_WRITERS.keys())}")
+    
+    filter_options = _filter_options(include_types, exclude_types, dropped_refs)
+    total = Stage("total", output_path=output_trig_path).start()
+    
+    with _graph_fragments(input_ifc_paths, output_trig_path, stream, converter, jobs, buffer_size, filter_options, "trig",
+                          dict(reader=reader, pipeline_depth=pipeline_depth)) as (fragment_paths, schemas):
+        with open_output(output_trig_path, buffer_size) as f:
+            write_trig_prologue(f, build_namespaces(schemas[0]), input_ifc_paths)
+            for fragment_path in fragment_paths:
+                f.copy_file(fragment_path)
+    
+    total.bytes_written = os.path.getsize(output_trig_path)
+    total.stop()
+    if verbose:
+        print(f"Total conversion: {total.seconds:.3f}s")
+
+
+@_applies_stream_settings
+def ifc_to_lbd_nt(input_ifc_path: str, output_path: str, stream: bool = False, verbose: bool = False, profile: bool = False, converter: str = "mini_ifcowl", single_pass: bool = False, jobs: int = 1, buffer_size: int = DEFAULT_BUFFER_SIZE, mmap_index: bool = False, cache_dir: str = None, cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", shards: int = 1, graph: str = None, reader: str = None, pipeline_depth: int = None) -> None:
+    """
+    Convert a single IFC file to N-Triples, or to N-Quads for a .nq output.
+    
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_path: Path to output .nt/.nq file (optionally .gz/.zst)
+        stream: If True, stream the IFC file instead of loading to memory
+        verbose: If True, print timing information
+        profile: If True, run with cProfile and save stats
+        converter: Which converter to use ('mini_ifcowl')
+        single_pass: Not supported for N-Triples
+        jobs: Not supported for N-Triples (use shards for parallel loading)
+        buffer_size: Output buffer size in bytes
+        mmap_index: If True (with stream), keep the ID->type index in a memory-mapped temporary file
+        cache_dir: If given, reuse the output of an earlier identical conversion from this cache directory (not with shards)
+        cache_max_bytes: Size limit of the cache (least recently used outputs are evicted)
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        shards: Split the lines into this many files of about equal line count (output.0000.nt, ...)
+        graph: Named graph IRI (default for .nq outputs: derived from the input file name)
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+    """
+    from ifc.ifc_options import get_schema_uri, load_ifc
+    from lbd.NT_writer_strings import shard_path
+    from lbd.TRIG_writer_strings import graph_name
+    
+    if stream and converter not in STREAM_NT_CONVERTERS:
+        raise ValueError(f"N-Triples streaming not yet implemented for converter '{converter}'. Available: {list(STREAM_NT_CONVERTERS.keys())}")
+    
+    if not stream and converter not in NT_CONVERTERS:
+        raise ValueError(f"N-Triples output not yet implemented for converter '{converter}'. Available: {list(NT_CONVERTERS.keys())}")
+    
+    if single_pass or jobs > 1:
+        raise ValueError("N-Triples output supports neither --single-pass nor parallel shards of one model; use shards for parallel loading")
+    
+    if graph is None and output_format(output_path) == "nquads":
+        graph = graph_name(input_ifc_path)
+    
+    # The cache holds single files only
+    use_cache = cache_dir and shards <= 1
+    if use_cache:
+        cache, cache_key, hit = _fetch_cached(cache_dir, cache_max_bytes, input_ifc_path, output_path, converter, verbose, format="nt", stream=stream, graph=graph,
+                                              **_filter_options(include_types, exclude_types, dropped_refs))
+        if hit:
+            return
     
-    file_name = Path(input_ifc_path).stem
-    
-    with open(output_trig_path, 'w', encoding='utf-8') as f:
-        f.write("# LBD TriG output\n")
-        f.write(f"# Converted from: {input_ifc_path}\n")
-        f.write(f"# Mode: {'Streaming' if stream else 'Loaded to memory'}\n")
-        f.write("\n")
-        f.write("@prefix lbd: <https://w3id.org/lbd#> .\n")
-        f.write("@prefix rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#> .\n")
-        f.write("\n")
-        f.write(f"<http://example.org/graph/{file_name}> {{\n")
-        f.write("    # TODO: Add actual conversion logic using string_writer_mini_ifcOWL\n")
-        f.write("}\n")
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    total = Stage("total", input_ifc_path, output_path).start()
+    
+    if stream:
+        with Stage("header", input_ifc_path, output_path):
+            schema = get_schema_uri(input_ifc_path)
+            namespaces = build_namespaces(schema)
+        type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+        writer_function = STREAM_NT_CONVERTERS[converter]
+        writer_function(input_ifc_path, output_path, namespaces, buffer_size=buffer_size, mmap_index=mmap_index, type_filter=type_filter,
+                        graph=graph, shards=shards)
+    else:
+        with Stage("load", input_ifc_path, output_path):
+            ifc_model = load_ifc(input_ifc_path)
+            schema = get_schema_uri(ifc_model)
+            namespaces = build_namespaces(schema)
+        type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+        writer_function = NT_CONVERTERS[converter]
+        writer_function(ifc_model, output_path, namespaces, buffer_size=buffer_size, type_filter=type_filter, graph=graph, shards=shards)
+    
+    if use_cache:
+        cache.store(cache_key, output_path)
+    
+    if shards > 1:
+        total.bytes_written = sum(os.path.getsize(shard_path(output_path, i)) for i in range(shards))
+    else:
+        total.bytes_written = os.path.getsize(output_path)
+    total.stop()
+    if verbose:
+        print(f"Total conversion: {total.seconds:.3f}s")
+    
+    if profile:
+        profiler.disable()
+        stats_file = os.path.splitext(strip_compression_suffix(output_path))[0] + '_profile.stats'
+        profiler.dump_stats(stats_file)
+        print(f"Profile stats saved to: {stats_file}")
+
+
+@_applies_stream_settings
+def ifc_to_lbd_nquads_dataset(input_ifc_paths: list, output_path: str, stream: bool = False, verbose: bool = False, converter: str = "mini_ifcowl", jobs: int = 1, buffer_size: int = DEFAULT_BUFFER_SIZE, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", shards: int = 1, reader: str = None, pipeline_depth: int = None) -> None:
+    """
+    Convert several IFC files into one N-Quads dataset, one named graph per file.
+    
+    Works like ifc_to_lbd_trig_dataset; N-Quads need no prologue, so the graph
+    fragments are just concatenated (or spread over line-balanced shards).
+    
+    Args:
+        input_ifc_paths: Paths to input IFC files
+        output_path: Path to output .nq file
+        stream: If True, stream the IFC files instead of loading to memory
+        verbose: If True, print timing information
+        converter: Which converter to use ('mini_ifcowl')
+        jobs: Number of worker processes
+        buffer_size: Output buffer size in bytes
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        shards: Split the lines into this many files of about equal line count (output.0000.nq, ...)
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+    
+    Raises:
+        RuntimeError: If any of the inputs failed; no dataset is written then
+    """
+    from lbd.NT_writer_strings import open_nt_output
+    
+    if converter not in NQ_GRAPH_WRITERS:
+        raise ValueError(f"N-Quads output not yet implemented for converter '{converter}'. Available: {list(NQ_GRAPH_WRITERS.keys())}")
+    
+    filter_options = _filter_options(include_types, exclude_types, dropped_refs)
+    total = Stage("total", output_path=output_path).start()
+    
+    with _graph_fragments(input_ifc_paths, output_path, stream, converter, jobs, buffer_size, filter_options, "nquads",
+                          dict(reader=reader, pipeline_depth=pipeline_depth)) as (fragment_paths, _):
+        with open_nt_output(output_path, buffer_size, shards) as f:
+            for fragment_path in fragment_paths:
+                f.copy_file(fragment_path)
+    
+    total.bytes_written = f.bytes_written
+    total.stop()
+    if verbose:
+        print(f"Total conversion: {total.seconds:.3f}s")
+
+
+@_applies_stream_settings
+def ifc_to_lbd_sqlite(input_ifc_path: str, output_path: str, stream: bool = False, verbose: bool = False, converter: str = "mini_ifcowl", mmap_index: bool = False, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", graph: str = None, reader: str = None, pipeline_depth: int = None) -> None:
+    """
+    Convert a single IFC file into a SQLite quad-table database (see lbd.SQLITE_writer).
+    
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_path: Path to output .sqlite/.db file (replaced if it exists)
+        stream: If True, stream the IFC file instead of loading to memory
+        verbose: If True, print timing information
+        converter: Which converter to use ('mini_ifcowl')
+        mmap_index: If True (with stream), keep the ID->type index in a memory-mapped temporary file
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        graph: Named graph IRI of the triples (default graph if None)
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+    """
+    from ifc.ifc_options import get_schema_uri, load_ifc
+    
+    if stream and converter not in STREAM_SQLITE_CONVERTERS:
+        raise ValueError(f"SQLite streaming not yet implemented for converter '{converter}'. Available: {list(STREAM_SQLITE_CONVERTERS.keys())}")
+    
+    if not stream and converter not in SQLITE_CONVERTERS:
+        raise ValueError(f"SQLite output not yet implemented for converter '{converter}'. Available: {list(SQLITE_CONVERTERS.keys())}")
+    
+    if compression_for_path(output_path):
+        raise ValueError(f"SQLite output cannot be compressed: '{output_path}'")
+    
+    total = Stage("total", input_ifc_path, output_path).start()
+    
+    if stream:
+        with Stage("header", input_ifc_path, output_path):
+            schema = get_schema_uri(input_ifc_path)
+            namespaces = build_namespaces(schema)
+        type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+        writer_function = STREAM_SQLITE_CONVERTERS[converter]
+        writer_function(input_ifc_path, output_path, namespaces, mmap_index=mmap_index, type_filter=type_filter, graph=graph)
+    else:
+        with Stage("load", input_ifc_path, output_path):
+            ifc_model = load_ifc(input_ifc_path)
+            schema = get_schema_uri(ifc_model)
+            namespaces = build_namespaces(schema)
+        type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+        writer_function = SQLITE_CONVERTERS[converter]
+        writer_function(ifc_model, output_path, namespaces, type_filter=type_filter, graph=graph)
+    
+    total.bytes_written = os.path.getsize(output_path)
+    total.stop()
+    if verbose:
+        print(f"Total conversion: {total.seconds:.3f}s")
+
+
+@_applies_stream_settings
+def ifc_to_lbd_sqlite_dataset(input_ifc_paths: list, output_path: str, stream: bool = False, verbose: bool = False, converter: str = "mini_ifcowl", mmap_index: bool = False, include_types: list = None, exclude_types: list = None, dropped_refs: str = "prune", reader: str = None, pipeline_depth: int = None) -> None:
+    """
+    Convert several IFC files into one SQLite quad-table database, one named graph per file.
+    
+    The files are loaded one after the other into the same store (the term
+    dictionary is shared); the indexes are built once at the end.
+    
+    Args:
+        input_ifc_paths: Paths to input IFC files
+        output_path: Path to output .sqlite/.db file (replaced if it exists)
+        stream: If True, stream the IFC files instead of loading to memory
+        verbose: If True, print timing information
+        converter: Which converter to use ('mini_ifcowl')
+        mmap_index: If True (with stream), keep the ID->type index in a memory-mapped temporary file
+        include_types: Entity types or presets to write (with their subtypes; default: all)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: Batches / blocks queued between the parse, format and write threads (0: one thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+    """
+    from ifc.ifc_options import get_schema_uri, load_ifc
+    from lbd.SQLITE_writer import QuadStore
+    from lbd.TRIG_writer_strings import graph_names
+    
+    graph_writers = STREAM_SQLITE_GRAPH_WRITERS if stream else SQLITE_GRAPH_WRITERS
+    if converter not in graph_writers:
+        raise ValueError(f"SQLite output not yet implemented for converter '{converter}'. Available: {list(graph_writers.keys())}")
+    
+    if compression_for_path(output_path):
+        raise ValueError(f"SQLite output cannot be compressed: '{output_path}'")
+    
+    total = Stage("total", output_path=output_path).start()
+    with QuadStore(output_path) as store:
+        # Unique graph name per input, named as in the TriG / N-Quads datasets
+        for input_ifc_path, graph in zip(input_ifc_paths, graph_names(input_ifc_paths)):
+            if stream:
+                schema = get_schema_uri(input_ifc_path)
+                type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+                graph_writers[converter](store, input_ifc_path, build_namespaces(schema), graph, type_filter, mmap_index)
+            else:
+                ifc_model = load_ifc(input_ifc_path)
+                schema = get_schema_uri(ifc_model)
+                type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+                graph_writers[converter](store, ifc_model, build_namespaces(schema), graph, type_filter)
+                del ifc_model
+            if verbose:
+                print(f"Loaded '{input_ifc_path}' into graph <{graph}>")
+    
+    total.bytes_written = os.path.getsize(output_path)
+    total.stop()
+    if verbose:
+        print(f"Total conversion: {total.seconds:.3f}s")
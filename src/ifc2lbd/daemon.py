@@ -0,0 +1,467 @@
+"""Long-running conversion daemon.
+
+Started from the src/ directory, like the CLI (or with `pixi run daemon`):
+
+    cd src && python -m ifc2lbd.daemon --socket /tmp/ifc2lbd.sock --workers 4
+
+A fresh `python src/main.py` per file pays for importing ifcopenshell,
+initializing the schema wrappers and building the attribute tables before
+the conversion starts; for small models that dominates. The daemon does it
+once per process: it starts a pool of worker processes that import the
+converters and warm the schema wrappers and ifcOWL tables of
+IFC2X3/IFC4/IFC4X3 before their first job (where workers are forked, they
+inherit the warmed-up parent; spawned workers, as on Windows, warm up in
+their initializer) and keep their per-process caches (entity tables, type
+filters) across jobs. A worker that dies (crash, OOM kill) fails its job and
+the pool is replaced.
+
+Jobs are submitted as JSON over HTTP, on a TCP port of localhost or a Unix socket
+(where the platform has them, not on Windows):
+
+    POST /jobs       {"inputs": ["Duplex.ifc"], "output": "Duplex.ttl", "options": {"stream": true}}
+                     -> 202 {"id": 1, "status": "queued"}
+    GET  /jobs       summaries of all known jobs
+    GET  /jobs/<id>  status, error and the stage metrics of one job
+    GET  /status     workers, queue length, job counts
+
+    curl --unix-socket /tmp/ifc2lbd.sock http://localhost/jobs -d '{"inputs": ["a.ifc"], "output": "a.ttl"}'
+
+The output format follows the output suffix as in the CLI; several inputs
+need a .trig, .nq or .sqlite dataset output. "options" are keyword arguments of the
+selected converter function (stream, reader, converter, include_types, dedup, ...);
+their values are checked against the function's annotations and defaults
+before the job is queued, so a wrong type is a 400 response, not a failed job.
+Relative paths are resolved against the daemon's working directory.
+"""
+
+import argparse
+import inspect
+import json
+import multiprocessing
+import os
+import re
+import signal
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_PORT = 8765
+DEFAULT_MAX_FINISHED = 1000
+
+# Keyword arguments a job may not set (they only make sense for interactive runs)
+RESERVED_OPTIONS = ("input_ifc_path", "input_ifc_paths", "output_ttl_path", "output_trig_path", "output_path", "profile")
+
+# JSON values accepted for the converter parameter annotations
+_OPTION_TYPES = {
+    bool: ("a boolean", lambda value: isinstance(value, bool)),
+    int: ("an integer", lambda value: isinstance(value, int) and not isinstance(value, bool)),
+    str: ("a string", lambda value: isinstance(value, str)),
+    list: ("a list of strings", lambda value: isinstance(value, list) and all(isinstance(item, str) for item in value)),
+}
+
+
+def check_options(function_name: str, options: Dict) -> None:
+    """
+    Check job options against the parameters of the converter function.
+
+    The expected type is the parameter's annotation (else the type of its
+    default); None is accepted where the default is None. The stream settings
+    are also checked for valid values.
+
+    Raises:
+        ValueError: For unknown options and values of the wrong type
+    """
+    from ifc2lbd import convert
+    from ifc.stream_settings import pipeline_depth, stream_reader
+
+    parameters = inspect.signature(getattr(convert, function_name)).parameters
+    accepted = set(parameters) - set(RESERVED_OPTIONS)
+    unknown = sorted(set(options) - accepted)
+    if unknown:
+        raise ValueError(f"Unknown options for {function_name}: {unknown}. Available: {sorted(accepted)}")
+    for name, value in options.items():
+        parameter = parameters[name]
+        if value is None and parameter.default is None:
+            continue
+        expected = parameter.annotation
+        if expected is inspect.Parameter.empty:
+            expected = type(parameter.default)
+        description, matches = _OPTION_TYPES.get(expected, (None, None))
+        if matches is not None and not matches(value):
+            raise ValueError(f"Option '{name}' of {function_name} must be {description}, got {value!r}")
+    if options.get("reader") is not None:
+        stream_reader(options["reader"])
+    if options.get("pipeline_depth") is not None:
+        pipeline_depth(options["pipeline_depth"])
+
+
+def job_function(inputs: List[str], output: str) -> str:
+    """
+    Name of the ifc2lbd.convert function converting inputs to output.
+
+    Raises:
+        ValueError: For input/output combinations the converters do not support
+    """
+    from ifc2lbd.convert import output_format
+
+    fmt = output_format(output)
+    if len(inputs) > 1:
+        if fmt == "trig":
+            return "ifc_to_lbd_trig_dataset"
+        if fmt == "nquads":
+            return "ifc_to_lbd_nquads_dataset"
+        if fmt == "sqlite":
+            return "ifc_to_lbd_sqlite_dataset"
+        raise ValueError(f"Multiple inputs require a .trig, .nq or .sqlite output, got '{output}'")
+    if fmt == "sqlite":
+        return "ifc_to_lbd_sqlite"
+    if fmt in ("ntriples", "nquads"):
+        return "ifc_to_lbd_nt"
+    if fmt == "trig":
+        return "ifc_to_lbd_trig"
+    return "ifc_to_lbd_ttl"
+
+
+def warm_up():
+    """Import the converters and load the schema wrappers and ifcOWL tables of the common schemas."""
+    from ifc2lbd.convert import preload_writers
+    from lbd.entity_tables import get_schema
+    from lbd.ifcowl_tables import DEFAULT_SCHEMAS, get_schema_table
+
+    preload_writers()
+    for schema_name in DEFAULT_SCHEMAS:
+        get_schema(schema_name)
+        get_schema_table(schema_name)
+
+
+# Worker side of JobQueue._started_events: (job id, start time) when a job starts running
+_started_events = None
+
+
+def _init_worker(started_events):
+    global _started_events
+    _started_events = started_events
+    warm_up()
+
+
+def run_job(job_id: int, function_name: str, inputs: List[str], output: str, options: Dict) -> Dict:
+    """
+    Run one job inside a worker process.
+
+    Errors are caught and returned, so a broken file does not take down the worker.
+
+    Returns:
+        {"ok", "error", "started", "finished", "metrics"}; metrics are the stage records of the job
+    """
+    from ifc2lbd import convert
+    from handling_logging.metrics import collect_stages
+
+    started = time.time()
+    if _started_events is not None:
+        _started_events.put((job_id, started))
+    error = None
+    with collect_stages() as records:
+        try:
+            function = getattr(convert, function_name)
+            function(inputs if function_name.endswith("_dataset") else inputs[0], output, **options)
+        except Exception as e:
+            error = f"{e}\n{traceback.format_exc()}"
+    return {"ok": error is None, "error": error, "started": started, "finished": time.time(), "metrics": records}
+
+
+class JobQueue:
+    """
+    Jobs submitted to the daemon and the worker pool running them.
+
+    Jobs wait in the pool's queue and run in submission order on the first
+    free worker. At most max_finished finished jobs are kept for queries.
+
+    Args:
+        workers: Number of worker processes
+        defaults: Options applied to every job unless it sets them (e.g. cache_dir)
+        max_finished: Number of finished jobs kept
+    """
+
+    def __init__(self, workers: int = 1, defaults: Optional[Dict] = None, max_finished: int = DEFAULT_MAX_FINISHED):
+        self.workers = workers
+        self.defaults = defaults or {}
+        self.max_finished = max_finished
+        self.started = time.time()
+        self._jobs: "OrderedDict[int, Dict]" = OrderedDict()
+        self._next_id = 1
+        self._lock = threading.Lock()
+        # Jobs are only "running" once a worker reports them; the pool hands out jobs ahead of time
+        self._started_events = multiprocessing.Queue()
+        self._pool = self._new_pool()
+        self._event_thread = threading.Thread(target=self._read_started_events, name="job-events", daemon=True)
+        self._event_thread.start()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self._started_events,))
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        """Replace a pool broken by a dead worker (once, whichever job notices first); call with the lock held."""
+        if self._pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+
+    def _read_started_events(self):
+        while True:
+            event = self._started_events.get()
+            if event is None:
+                return
+            job_id, started = event
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None and job["status"] == "queued":
+                    job.update(status="running", started=started)
+
+    def submit(self, spec: Dict) -> Dict:
+        """
+        Validate a job specification and queue it.
+
+        Raises:
+            ValueError: For malformed specifications, missing inputs, unknown options or option values of the wrong type
+        """
+        if not isinstance(spec, dict):
+            raise ValueError("Job must be a JSON object")
+        inputs = spec.get("inputs", spec.get("input"))
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        output = spec.get("output")
+        if not inputs or not all(isinstance(path, str) for path in inputs) or not isinstance(output, str):
+            raise ValueError("Job needs 'inputs' (path or list of paths) and 'output' (path)")
+        inputs = [os.path.abspath(path) for path in inputs]
+        output = os.path.abspath(output)
+        for path in inputs:
+            if not os.path.isfile(path):
+                raise ValueError(f"Input file '{path}' does not exist")
+        function_name = job_function(inputs, output)
+
+        options = spec.get("options") or {}
+        if not isinstance(options, dict):
+            raise ValueError("'options' must be a JSON object")
+        check_options(function_name, options)
+        from ifc2lbd import convert
+        accepted = set(inspect.signature(getattr(convert, function_name)).parameters) - set(RESERVED_OPTIONS)
+        options = {**{k: v for k, v in self.defaults.items() if k in accepted}, **options}
+
+        with self._lock:
+            job_id = self._next_id
+            pool = self._pool
+            try:
+                future = pool.submit(run_job, job_id, function_name, inputs, output, options)
+            except BrokenProcessPool:
+                # A worker died before its job finished reporting; retry once on a fresh pool
+                self._replace_pool(pool)
+                pool = self._pool
+                future = pool.submit(run_job, job_id, function_name, inputs, output, options)
+            # Only registered once the pool has accepted it
+            self._next_id += 1
+            job = self._jobs[job_id] = {
+                "id": job_id, "status": "queued", "function": function_name,
+                "inputs": inputs, "output": output, "options": options,
+                "submitted": time.time(), "started": None, "finished": None, "error": None, "metrics": [],
+            }
+        future.add_done_callback(lambda f, job_id=job_id, pool=pool: self._finish(job_id, f, pool))
+        return self._summary(job)
+
+    def _finish(self, job_id: int, future, pool: ProcessPoolExecutor):
+        broken = False
+        try:
+            result = future.result()
+        except Exception as e:
+            # The worker itself died (e.g. crashed inside the bindings or killed)
+            broken = isinstance(e, BrokenProcessPool)
+            result = {"ok": False, "error": f"{e}\n", "started": None, "finished": time.time(), "metrics": []}
+        with self._lock:
+            if broken:
+                self._replace_pool(pool)
+            job = self._jobs[job_id]
+            job.update(status="done" if result["ok"] else "failed", error=result["error"],
+                       started=result["started"] or job["started"], finished=result["finished"], metrics=result["metrics"])
+            finished = [i for i, j in self._jobs.items() if j["status"] in ("done", "failed")]
+            for old_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[old_id]
+
+    def _summary(self, job: Dict) -> Dict:
+        summary = {k: v for k, v in job.items() if k != "metrics"}
+        if job["started"] and job["finished"]:
+            summary["elapsed_s"] = job["finished"] - job["started"]
+        return summary
+
+    def job(self, job_id: int) -> Optional[Dict]:
+        """Status, error and stage metrics of one job (None if unknown)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {**self._summary(job), "metrics": list(job["metrics"])}
+
+    def jobs(self) -> List[Dict]:
+        with self._lock:
+            return [self._summary(job) for job in self._jobs.values()]
+
+    def status(self) -> Dict:
+        """Daemon status: workers, uptime and job counts per status."""
+        with self._lock:
+            counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+        return {"workers": self.workers, "uptime_s": time.time() - self.started, **counts}
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+        self._started_events.put(None)
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """HTTP interface of a JobQueue (self.server.jobs)."""
+
+    server_version = "ifc2lbd-daemon"
+
+    def address_string(self) -> str:
+        # Unix socket clients have no (host, port) address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _reply(self, code: int, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        jobs = self.server.jobs
+        path = self.path.rstrip("/")
+        if path == "/status":
+            self._reply(200, jobs.status())
+        elif path == "/jobs":
+            self._reply(200, jobs.jobs())
+        elif re.fullmatch(r"/jobs/\d+", path):
+            job = jobs.job(int(path.rsplit("/", 1)[1]))
+            if job is None:
+                self._reply(404, {"error": "Unknown job"})
+            else:
+                self._reply(200, job)
+        else:
+            self._reply(404, {"error": f"Unknown path '{self.path}'"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self._reply(404, {"error": f"Unknown path '{self.path}'"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            spec = json.loads(self.rfile.read(length) or b"null")
+            self._reply(202, self.server.jobs.submit(spec))
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+        except BrokenProcessPool as e:
+            self._reply(503, {"error": f"Worker pool unavailable: {e}"})
+        except Exception as e:
+            self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+# socketserver only defines the Unix socket servers where AF_UNIX exists (not on Windows)
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+        """ThreadingHTTPServer counterpart listening on a Unix domain socket."""
+
+        daemon_threads = True
+else:
+    UnixHTTPServer = None
+
+
+def serve(jobs: JobQueue, host: str = "127.0.0.1", port: int = DEFAULT_PORT, socket_path: str = None, verbose: bool = False):
+    """
+    Serve the HTTP interface of jobs until interrupted (SIGINT/SIGTERM).
+
+    Args:
+        jobs: Job queue with its worker pool
+        host: Address to listen on (TCP)
+        port: Port to listen on (TCP)
+        socket_path: Listen on this Unix socket instead of TCP
+        verbose: Log the requests to stderr
+
+    Raises:
+        ValueError: For socket_path on platforms without Unix sockets
+    """
+    if socket_path and UnixHTTPServer is None:
+        raise ValueError("Unix sockets are not available on this platform; use --host/--port")
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixHTTPServer(socket_path, JobRequestHandler)
+        address = f"unix:{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+        address = f"http://{host}:{server.server_address[1]}"
+    server.jobs = jobs
+    server.verbose = verbose
+    # Stop serve_forever from a signal handler without blocking in it
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.shutdown).start())
+    print(f"ifc2lbd daemon listening on {address} with {jobs.workers} worker(s)", file=sys.stderr, flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        jobs.shutdown(wait=False)
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
+
+
+def main():
+    """Daemon entry point."""
+    parser = argparse.ArgumentParser(prog="ifc2lbd-daemon", description="Serve IFC to LBD conversions over HTTP or a Unix socket")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on. Default: 127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on. Default: {DEFAULT_PORT}")
+    parser.add_argument("--socket", metavar="PATH", help="Listen on a Unix socket instead of TCP (not available on Windows)")
+    parser.add_argument("--workers", "-j", type=int, default=1, metavar="N", help="Number of worker processes. Default: 1")
+    parser.add_argument("--reader", choices=["auto", "stream2", "builtin"], default="auto", help="Streaming reader of jobs that do not set 'reader'. Default: auto")
+    parser.add_argument("--pipeline-depth", type=int, default=0, metavar="N", help="Pipeline depth of jobs that do not set 'pipeline_depth' (see the CLI). Default: 0")
+    parser.add_argument("--cache-dir", metavar="DIR", help="Conversion cache used by jobs that do not set cache_dir")
+    parser.add_argument("--metrics", nargs="?", const="-", default=None, metavar="PATH", help="Also log the stage records as JSON lines to PATH (or stderr)")
+    parser.add_argument("--verbose", "-v", action="store_true", help="Log requests")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        print(f"Error: --workers must be at least 1, got {args.workers}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.socket and UnixHTTPServer is None:
+        print("Error: --socket needs Unix domain sockets, which this platform does not have; use --host/--port", file=sys.stderr)
+        sys.exit(1)
+
+    if args.metrics:
+        from handling_logging.metrics import start_metrics_logging
+        start_metrics_logging(args.metrics)
+
+    # Warm the parent, so forked workers start with everything loaded (spawned workers warm up in _init_worker)
+    warm_up()
+    # Passed to every job that does not set them; jobs can choose their own reader and depth
+    defaults = {"reader": args.reader, "pipeline_depth": max(0, args.pipeline_depth)}
+    if args.cache_dir:
+        defaults["cache_dir"] = args.cache_dir
+    serve(JobQueue(args.workers, defaults), args.host, args.port, args.socket, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
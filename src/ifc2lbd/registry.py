@@ -0,0 +1,47 @@
+"""Lazily imported writer registries.
+
+The writer modules import ifcopenshell and its schema wrapper, which takes a
+large part of a second. The converter registries in ifc2lbd.convert therefore
+map converter names to 'module:function' paths and import a writer module
+only when one of its writers is looked up, so importing ifc2lbd.convert (and
+with it `--help` and the argument checks of the CLI) stays fast.
+"""
+
+import importlib
+from typing import Callable, Dict, Iterator, Mapping
+
+
+class LazyRegistry(Mapping):
+    """
+    Read-only mapping of names to functions given as 'module:function' paths.
+
+    Membership tests and key listings do not import anything; the module of a
+    function is imported on its first lookup and the function cached.
+
+    Example:
+        CONVERTERS = LazyRegistry({"mini_ifcowl": "lbd.TTL_writer_strings_spf:string_writer_mini_ifcOWL"})
+        CONVERTERS["mini_ifcowl"]  # imports lbd.TTL_writer_strings_spf
+    """
+
+    def __init__(self, paths: Dict[str, str]):
+        self._paths = dict(paths)
+        self._resolved: Dict[str, Callable] = {}
+
+    def __getitem__(self, name: str) -> Callable:
+        function = self._resolved.get(name)
+        if function is None:
+            module_name, _, attribute = self._paths[name].partition(":")
+            function = self._resolved[name] = getattr(importlib.import_module(module_name), attribute)
+        return function
+
+    def __contains__(self, name) -> bool:
+        return name in self._paths
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def __repr__(self) -> str:
+        return f"LazyRegistry({self._paths!r})"
@@ -0,0 +1,191 @@
+"""In-process triple API: the conversion as lazy generators instead of files.
+
+Services that load the result into a store or send it over a socket do not
+need to write a file and parse it again. iter_nt_batches yields the output
+as blocks of N-Triples (or N-Quads) lines, iter_ttl_batches as blocks of
+Turtle, iter_triples as (subject, predicate, object) tuples of N-Triples
+terms, all lazily from a loaded model or a streamed file:
+
+    for batch in iter_nt_batches("Duplex.ifc", stream=True):
+        graph.parse(data=batch, format="nt")          # rdflib
+    for batch in iter_nt_batches(model, encoding="utf-8"):
+        sock.sendall(batch)
+    for batch in iter_ttl_batches("Duplex.ifc"):
+        ...                                           # prologue first, then complete Turtle blocks
+    for s, p, o in iter_triples("Duplex.ifc"):
+        ...                                           # '<https://...#IfcWall_12>', '<...#Name>', '"Wall"'
+
+The file writers are sinks over the same generators: the N-Triples writers
+(lbd.NT_writer_strings) over those of iter_nt_batches / iter_triples, the
+mini ifcOWL Turtle writers (lbd.TTL_writer_strings_spf / _stream) over those
+of iter_ttl_batches. So the batches are exactly the text of a .nt / .nq /
+.ttl conversion with the same options.
+"""
+
+import os
+from typing import Iterator, Optional, Tuple, Union
+
+from ifc.stream_settings import iter_with_stream_settings
+
+DEFAULT_BATCH_SIZE = 1024  # entities per batch
+
+
+def _open_source(source, stream: bool):
+    """(path, model, schema URI) of a path or loaded model; model is None when streaming."""
+    from ifc.ifc_options import get_schema_uri, load_ifc
+
+    path = None
+    if isinstance(source, (str, os.PathLike)):
+        path = os.fspath(source)
+        model = None if stream else load_ifc(path)
+    elif stream:
+        raise ValueError("Streaming needs the path of an IFC file, not a loaded model")
+    else:
+        model = source
+    return path, model, get_schema_uri(path if model is None else model)
+
+
+def _entity_blocks(source, stream: bool, graph: Optional[str], include_types, exclude_types, dropped_refs: str,
+                   header: bool) -> Iterator[str]:
+    """Lines of the ontology header and of each entity, one block per item."""
+    from ifc2lbd.convert import _build_type_filter, build_namespaces
+    from lbd.NT_writer_strings import NTriplesSerializer, iter_entity_lines, iter_instance_lines
+    from lbd.TTL_writer_strings_stream import build_entity_type_map
+
+    path, model, schema = _open_source(source, stream)
+    type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+    serializer = NTriplesSerializer(build_namespaces(schema), graph)
+
+    if model is not None:
+        if header:
+            yield serializer.ontology_header()
+        yield from iter_instance_lines(model, model.schema_identifier, serializer, type_filter)
+        return
+
+    entity_types = build_entity_type_map(path)
+    try:
+        if header:
+            yield serializer.ontology_header()
+        yield from iter_entity_lines(path, entity_types, serializer, type_filter)
+    finally:
+        entity_types.close()
+
+
+def _turtle_blocks(source, stream: bool, include_types, exclude_types, dropped_refs: str, header: bool) -> Iterator[str]:
+    """Turtle prologue and block of each entity, one per item."""
+    from ifc2lbd.convert import _build_type_filter, build_namespaces
+    from lbd import TTL_writer_strings_spf as loaded_writer, TTL_writer_strings_stream as stream_writer
+
+    path, model, schema = _open_source(source, stream)
+    type_filter = _build_type_filter(schema, include_types, exclude_types, dropped_refs)
+    namespaces = build_namespaces(schema)
+
+    if model is not None:
+        if header:
+            yield loaded_writer.format_prologue(namespaces)
+        yield from loaded_writer.iter_instance_blocks(model, model.schema_identifier, namespaces["INST"], namespaces["XSD"],
+                                                      type_filter)
+        return
+
+    entity_types = stream_writer.build_entity_type_map(path)
+    try:
+        if header:
+            yield stream_writer.format_prologue(namespaces)
+        yield from stream_writer.iter_entity_blocks(path, entity_types, namespaces["INST"], namespaces["XSD"], type_filter)
+    finally:
+        entity_types.close()
+
+
+def _batches(blocks: Iterator[str], batch_size: int, encoding: Optional[str]) -> Iterator[Union[str, bytes]]:
+    """Join blocks into batches of batch_size blocks (encoded if encoding is given)."""
+    batch_size = max(1, batch_size)
+    batch = []
+    for block in blocks:
+        batch.append(block)
+        if len(batch) >= batch_size:
+            text = "".join(batch)
+            yield text.encode(encoding) if encoding else text
+            batch = []
+    if batch:
+        text = "".join(batch)
+        yield text.encode(encoding) if encoding else text
+
+
+def iter_nt_batches(source, stream: bool = False, graph: Optional[str] = None, include_types: list = None,
+                    exclude_types: list = None, dropped_refs: str = "prune", batch_size: int = DEFAULT_BATCH_SIZE,
+                    encoding: Optional[str] = None, header: bool = True, reader: Optional[str] = None,
+                    pipeline_depth: Optional[int] = None) -> Iterator[Union[str, bytes]]:
+    """
+    Lazily convert an IFC model into batches of N-Triples (or N-Quads) lines.
+
+    Args:
+        source: Path to an IFC file, or a loaded ifcopenshell.file
+        stream: Stream the file (two passes) instead of loading it; needs a path
+        graph: Named graph IRI; if given, lines are N-Quads
+        include_types: Entity types or presets to write (with their subtypes)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        batch_size: Entities per batch (every batch ends with a complete line)
+        encoding: If given (e.g. 'utf-8'), batches are encoded bytes instead of str
+        header: Start with the ontology header triples, as the files do
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: With stream, batches queued from a parse thread (0: no thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+
+    Yields:
+        Blocks of complete lines
+    """
+    blocks = _entity_blocks(source, stream, graph, include_types, exclude_types, dropped_refs, header)
+    return _batches(iter_with_stream_settings(blocks, reader=reader, pipeline_depth=pipeline_depth), batch_size, encoding)
+
+
+def iter_ttl_batches(source, stream: bool = False, include_types: list = None, exclude_types: list = None,
+                     dropped_refs: str = "prune", batch_size: int = DEFAULT_BATCH_SIZE, encoding: Optional[str] = None,
+                     header: bool = True, reader: Optional[str] = None,
+                     pipeline_depth: Optional[int] = None) -> Iterator[Union[str, bytes]]:
+    """
+    Lazily convert an IFC model into batches of mini ifcOWL Turtle.
+
+    Joined, the batches are the .ttl file the Turtle writers produce with the same options.
+
+    Args:
+        source: Path to an IFC file, or a loaded ifcopenshell.file
+        stream: Stream the file (two passes) instead of loading it; needs a path
+        include_types: Entity types or presets to write (with their subtypes)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        batch_size: Entities per batch (every batch ends with a complete block)
+        encoding: If given (e.g. 'utf-8'), batches are encoded bytes instead of str
+        header: Start with the prologue (prefixes and ontology header); later batches use its prefixes
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: With stream, batches queued from a parse thread (0: no thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+
+    Yields:
+        Blocks of complete Turtle statements
+    """
+    blocks = _turtle_blocks(source, stream, include_types, exclude_types, dropped_refs, header)
+    return _batches(iter_with_stream_settings(blocks, reader=reader, pipeline_depth=pipeline_depth), batch_size, encoding)
+
+
+def iter_triples(source, stream: bool = False, include_types: list = None, exclude_types: list = None,
+                 dropped_refs: str = "prune", header: bool = True, reader: Optional[str] = None,
+                 pipeline_depth: Optional[int] = None) -> Iterator[Tuple[str, str, str]]:
+    """
+    Lazily convert an IFC model into triples.
+
+    Args:
+        source: Path to an IFC file, or a loaded ifcopenshell.file
+        stream: Stream the file (two passes) instead of loading it; needs a path
+        include_types: Entity types or presets to write (with their subtypes)
+        exclude_types: Entity types or presets not to write (with their subtypes)
+        dropped_refs: 'prune' references to entities that are not written, or 'keep' them as bare IRIs
+        header: Start with the ontology header triples
+        reader: Streaming reader: 'auto', 'stream2' or 'builtin' (default: $IFC2LBD_STREAM_READER or 'auto')
+        pipeline_depth: With stream, batches queued from a parse thread (0: no thread; default: $IFC2LBD_PIPELINE_DEPTH or 0)
+
+    Yields:
+        (subject, predicate, object) as N-Triples terms: '<iri>', '"text"' or '"1.5"^^<...#double>'
+    """
+    from lbd.NT_writer_strings import iter_block_triples
+
+    blocks = _entity_blocks(source, stream, None, include_types, exclude_types, dropped_refs, header)
+    return iter_block_triples(iter_with_stream_settings(blocks, reader=reader, pipeline_depth=pipeline_depth))
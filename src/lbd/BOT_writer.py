@@ -0,0 +1,318 @@
+"""BOT (Building Topology Ontology) writer, for loaded models and streams.
+
+Writes the topology of a model instead of its full ifcOWL graph: the zones
+(bot:Site, bot:Building, bot:Storey, bot:Space, other spatial elements as
+bot:Zone), the bot:Element instances and how they relate:
+
+    inst:IfcBuildingStorey_52 a bot:Storey ;
+        bot:hasSpace inst:IfcSpace_67 ;
+        bot:containsElement inst:IfcWallStandardCase_3797 .
+    inst:IfcSpace_67 a bot:Space ;
+        bot:adjacentElement inst:IfcSlab_4219 ;
+        bot:adjacentZone inst:IfcSpace_91 .
+
+Subjects and objects are the instance IRIs of the ifcOWL writers, so both
+graphs can be loaded side by side.
+
+Looking the relations up per element (get_inverse, by_type) is quadratic on
+large models. Instead a BotIndex is built in one pass over the three
+relationship types (IfcRelAggregates, IfcRelContainedInSpatialStructure and
+IfcRelSpaceBoundary, with subtypes), then the topology is written from it.
+When streaming, only the relationship records are parsed; every other record
+(including the spatial elements, which are classified by their type alone)
+only contributes its id and type from the record head
+(ifc.spf_reader.iter_spf_selected).
+"""
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ifc.ifc_options import get_schema_uri
+from ifc.spf_reader import iter_spf_selected
+from lbd.entity_index import EntityTypeIndex
+from lbd.entity_tables import get_schema
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from lbd.TTL_writer_strings_stream import index_backing_path
+from handling_logging.metrics import Stage
+
+BOT_NAMESPACE = "https://w3id.org/bot#"
+
+# Spatial entity type (with subtypes) -> BOT zone class; earlier entries win
+ZONE_CLASSES = (
+    ("IfcBuildingStorey", "Storey"),
+    ("IfcSpace", "Space"),
+    ("IfcSite", "Site"),
+    ("IfcBuilding", "Building"),
+    ("IfcFacility", "Building"),             # IFC4X3 bridges, roads, ...
+    ("IfcSpatialElement", "Zone"),           # IFC4 and later
+    ("IfcSpatialStructureElement", "Zone"),  # IFC2X3
+)
+
+# Zone class of an aggregated zone -> predicate from its parent zone
+ZONE_PREDICATES = {
+    "Building": "bot:hasBuilding",
+    "Storey": "bot:hasStorey",
+    "Space": "bot:hasSpace",
+}
+
+# Relationship type -> (relating attribute, related attribute)
+RELATIONSHIPS = {
+    "IfcRelAggregates": ("RelatingObject", "RelatedObjects"),
+    "IfcRelContainedInSpatialStructure": ("RelatingStructure", "RelatedElements"),
+    "IfcRelSpaceBoundary": ("RelatingSpace", "RelatedBuildingElement"),
+}
+
+
+def _expand(schema, name: str) -> List[str]:
+    """An entity type name and all its subtypes (empty if the schema lacks it)."""
+    try:
+        declaration = schema.declaration_by_name(name).as_entity()
+    except Exception:
+        return []
+    names = [declaration.name()]
+    for subtype in declaration.subtypes():
+        names.extend(_expand(schema, subtype.name()))
+    return names
+
+
+class BotIndex:
+    """
+    Topology of a model, indexed in one pass over its relationships.
+
+    Args:
+        schema_name: Schema identifier used to resolve the relationship and zone subtypes
+        entity_types: Mapping of entity IDs to types (dict or EntityTypeIndex), filled by the builders
+    """
+
+    def __init__(self, schema_name: str, entity_types=None):
+        schema = get_schema(schema_name)
+        self.zone_classes: Dict[str, str] = {}
+        for type_name, zone_class in ZONE_CLASSES:
+            for name in _expand(schema, type_name):
+                self.zone_classes.setdefault(name, zone_class)
+        # Concrete relationship type -> its entry in RELATIONSHIPS
+        self.relationship_types: Dict[str, str] = {}
+        for type_name in RELATIONSHIPS:
+            for name in _expand(schema, type_name):
+                self.relationship_types[name] = type_name
+        self.entity_types = entity_types if entity_types is not None else {}
+        self.relationships = 0
+        self.aggregates: List[Tuple[int, int]] = []   # (whole, part)
+        self.contained: List[Tuple[int, int]] = []    # (zone, element)
+        self.boundaries: List[Tuple[int, int]] = []   # (space, element)
+
+    def add(self, relationship_type: str, relating: Optional[int], related: Iterable[int]):
+        """Index one relationship instance (relating and related given as entity IDs)."""
+        if relating is None:
+            return
+        kind = self.relationship_types[relationship_type]
+        pairs = self.aggregates if kind == "IfcRelAggregates" else self.contained if kind == "IfcRelContainedInSpatialStructure" else self.boundaries
+        pairs.extend((relating, entity_id) for entity_id in related)
+        self.relationships += 1
+
+    def zone_class(self, entity_id: int) -> Optional[str]:
+        """BOT zone class of an entity, or None if it is not a spatial element."""
+        entity_type = self.entity_types.get(entity_id)
+        return self.zone_classes.get(entity_type) if entity_type else None
+
+    def close(self):
+        """Release the type index (and its backing file) of a streamed model."""
+        if isinstance(self.entity_types, EntityTypeIndex):
+            self.entity_types.close()
+
+
+def build_bot_index(model) -> BotIndex:
+    """
+    Index the topology of a loaded IFC model.
+
+    Only the relationship instances are visited; the types of the entities
+    they reference are taken from the references themselves.
+    """
+    index = BotIndex(model.schema_identifier)
+    entity_types = index.entity_types
+    for type_name, (relating_name, related_name) in RELATIONSHIPS.items():
+        try:
+            relationships = model.by_type(type_name)
+        except RuntimeError:
+            continue  # not in this schema
+        for relationship in relationships:
+            relating = getattr(relationship, relating_name)
+            related = getattr(relationship, related_name)
+            if relating is None or related is None:
+                continue
+            if not isinstance(related, tuple):
+                related = (related,)
+            for instance in (relating, *related):
+                entity_types[instance.id()] = instance.is_a()
+            index.add(relationship.is_a(), relating.id(), [instance.id() for instance in related])
+    return index
+
+
+def _ref_ids(value) -> List[int]:
+    """Entity IDs referenced by a streamed attribute value ({'ref': id} or a tuple of them)."""
+    if isinstance(value, dict):
+        return [value["ref"]] if "ref" in value else []
+    if isinstance(value, tuple):
+        return [item["ref"] for item in value if isinstance(item, dict) and "ref" in item]
+    return []
+
+
+def build_bot_index_stream(input_ifc_path: str, schema_name: str, backing_path: Optional[str] = None) -> BotIndex:
+    """
+    Index the topology of an IFC file in one pass.
+
+    Only the relationship records are parsed; all other records contribute
+    their id and type (for the IRIs and zone classes) from the record head.
+
+    Args:
+        input_ifc_path: Path to IFC file
+        schema_name: Schema identifier of the file
+        backing_path: Optional file to memory-map the ID->type index into instead of keeping it on the heap
+    """
+    index = BotIndex(schema_name, EntityTypeIndex(backing_path))
+    entity_types = index.entity_types
+    relationship_types = index.relationship_types
+    for entity_id, entity_type, entity_dict in iter_spf_selected(input_ifc_path, relationship_types):
+        entity_types[entity_id] = entity_type
+        if entity_dict is None:
+            continue
+        relating_name, related_name = RELATIONSHIPS[relationship_types[entity_type]]
+        relating = _ref_ids(entity_dict.get(relating_name))
+        index.add(entity_type, relating[0] if relating else None, _ref_ids(entity_dict.get(related_name)))
+    return index
+
+
+def write_bot_prologue(f, namespaces: Dict[str, str]):
+    """Write the Turtle prologue (comments, BASE, PREFIX lines incl. bot: and ontology header)."""
+    BASE = namespaces.get("BASE", "http://example.org/base#")
+    f.write(f"# Turtle TTL output generated by LBD writer (BOT topology).\n")
+    f.write(f"# baseURI: {BASE}\n")
+    f.write(f"# imports: {BOT_NAMESPACE}\n")
+    f.write("\n")
+    f.write(f"BASE <{BASE}> .\n")
+    for prefix, uri in {**namespaces, "BOT": BOT_NAMESPACE}.items():
+        f.write(f"PREFIX {prefix.lower()}: <{uri}> .\n")
+    f.write("\n")
+    f.write(f"inst:\ta\towl:Ontology ;\n")
+    f.write(f"\towl:imports\tbot: .\n\n")
+
+
+def write_topology(f, index: BotIndex, type_filter=None) -> int:
+    """
+    Write the zones and elements of a BotIndex as Turtle blocks, ordered by entity ID.
+
+    Entities whose types a TypeFilter drops are left out, also as objects.
+
+    Returns:
+        Number of subjects written
+    """
+    entity_types = index.entity_types
+    allowed = type_filter.allowed_types if type_filter is not None else None
+    # Subject -> predicate -> objects
+    relations: Dict[int, Dict[str, set]] = defaultdict(lambda: defaultdict(set))
+    zones: Dict[int, str] = {}
+    elements = set()
+
+    def keep(entity_id: int) -> bool:
+        entity_type = entity_types.get(entity_id)
+        return entity_type is not None and (allowed is None or entity_type in allowed)
+
+    for whole, part in index.aggregates:
+        if not keep(whole) or not keep(part):
+            continue
+        whole_class, part_class = index.zone_class(whole), index.zone_class(part)
+        if whole_class and part_class:
+            zones[whole], zones[part] = whole_class, part_class
+            relations[whole][ZONE_PREDICATES.get(part_class, "bot:containsZone")].add(part)
+        elif whole_class:
+            zones[whole] = whole_class
+            elements.add(part)
+            relations[whole]["bot:containsElement"].add(part)
+        elif not part_class:
+            # Element assemblies (the project only aggregates zones)
+            elements.update((whole, part))
+            relations[whole]["bot:hasSubElement"].add(part)
+
+    for zone, element in index.contained:
+        zone_class = index.zone_class(zone)
+        if zone_class and keep(zone) and keep(element) and not index.zone_class(element):
+            zones[zone] = zone_class
+            elements.add(element)
+            relations[zone]["bot:containsElement"].add(element)
+
+    # Spaces sharing a bounding element are adjacent zones
+    bounded: Dict[int, set] = defaultdict(set)
+    for space, element in index.boundaries:
+        zone_class = index.zone_class(space)
+        if zone_class and keep(space) and keep(element) and not index.zone_class(element):
+            zones[space] = zone_class
+            elements.add(element)
+            relations[space]["bot:adjacentElement"].add(element)
+            bounded[element].add(space)
+    for spaces in bounded.values():
+        if len(spaces) < 2:
+            continue
+        for space in spaces:
+            relations[space]["bot:adjacentZone"].update(other for other in spaces if other != space)
+
+    def iri(entity_id: int) -> str:
+        return f"inst:{entity_types[entity_id]}_{entity_id}"
+
+    count = 0
+    for entity_id in sorted(zones.keys() | elements):
+        bot_class = zones.get(entity_id, "Element")
+        lines = [f"{pred} " + ", ".join(iri(obj) for obj in sorted(objs))
+                 for pred, objs in relations[entity_id].items()] if entity_id in relations else []
+        block = f"{iri(entity_id)} a bot:{bot_class}"
+        f.write(f"{block} ;\n\t" + " ;\n\t".join(lines) + " .\n\n" if lines else f"{block} .\n\n")
+        count += 1
+    return count
+
+
+def string_writer_bot(model, output_path: str, namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE, type_filter=None):
+    """
+    Write the BOT topology of a loaded IFC model to Turtle.
+
+    Args:
+        model: IfcOpenShell model
+        output_path: Path to output TTL file
+        namespaces: Dictionary of prefix -> URI mappings
+        buffer_size: Output buffer size in bytes
+        type_filter: Optional TypeFilter selecting the zone and element types to write
+    """
+    with Stage("bot_index", output_path=output_path) as stage:
+        index = build_bot_index(model)
+        stage.entities = index.relationships
+
+    with open_output(output_path, buffer_size) as f:
+        write_bot_prologue(f, namespaces)
+        with Stage("serialize", output_path=output_path) as stage:
+            stage.entities = write_topology(f, index, type_filter)
+
+
+def string_writer_bot_stream(input_ifc_path: str, output_path: str, namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE,
+                             mmap_index: bool = False, type_filter=None):
+    """
+    Stream an IFC file and write its BOT topology to Turtle.
+
+    One pass builds the BotIndex, parsing only the relationship records;
+    the topology is then written from the index.
+
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_path: Path to output TTL file
+        namespaces: Dictionary of prefix -> URI mappings
+        buffer_size: Output buffer size in bytes
+        mmap_index: Memory-map the ID->type index from a temporary file next to the output
+        type_filter: Optional TypeFilter selecting the zone and element types to write
+    """
+    with Stage("bot_index", input_ifc_path, output_path) as stage:
+        index = build_bot_index_stream(input_ifc_path, get_schema_uri(input_ifc_path), index_backing_path(output_path) if mmap_index else None)
+        stage.entities = index.relationships
+    try:
+        with open_output(output_path, buffer_size) as f:
+            write_bot_prologue(f, namespaces)
+            with Stage("serialize", input_ifc_path, output_path) as stage:
+                stage.entities = write_topology(f, index, type_filter)
+    finally:
+        index.close()
@@ -0,0 +1,421 @@
+"""N-Triples / N-Quads serializer (mini ifcOWL style), for loaded models and streams.
+
+One triple per line with full IRIs, so the output can be cut anywhere between
+lines and loaded in parallel by triple store bulk loaders. The triples are the
+same as in the Turtle writers' output; prefixes are expanded once per entity
+type / attribute name and cached. With a graph the lines are N-Quads.
+
+With shards > 1 the lines are spread over N files next to the output
+(Duplex.nt -> Duplex.0000.nt, Duplex.0001.nt, ...), switching file after
+exactly SHARD_BATCH_LINES lines (entity blocks are split between lines), so
+the shards' line counts differ by at most SHARD_BATCH_LINES.
+"""
+
+import os
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import ifcopenshell
+from ifc.ifc_options import iter_stream
+from lbd.compression import strip_compression_suffix
+from lbd.entity_index import EntityTypeIndex
+from lbd.entity_tables import AGGREGATE, get_entity_table
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, BufferedOutput, open_output
+from lbd.TTL_writer_strings_stream import build_entity_type_map, index_backing_path
+from handling_logging.metrics import Stage
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+SHARD_BATCH_LINES = 1024
+
+_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+
+class NTTable(NamedTuple):
+    """Expanded N-Triples terms for one entity type."""
+    subject_prefix: str          # '<https://.../instances#IfcWall_' (id + '>' are appended)
+    type_line: str               # ' <rdf:type> <https://mini-ifc.ifc/IFC4/#IfcWall>' + line end
+    predicates: Tuple[str, ...]  # ' <https://mini-ifc.ifc/IFC4/#GlobalId> ', ...
+    kinds: Tuple[int, ...]       # SCALAR / AGGREGATE per attribute
+
+
+def shard_path(output_path: str, index: int) -> str:
+    """Path of one output shard: 'out.nt.gz', 2 -> 'out.0002.nt.gz'."""
+    base = strip_compression_suffix(output_path)
+    root, ext = os.path.splitext(base)
+    return f"{root}.{index:04d}{ext}{output_path[len(base):]}"
+
+
+class ShardedOutput:
+    """
+    Writes complete lines round-robin into several BufferedOutputs.
+
+    The target switches after exactly batch_lines lines: a block reaching the
+    switch is split at that line end, so the shards differ by at most
+    batch_lines lines.
+
+    Args:
+        paths: Shard file paths
+        buffer_size: Output buffer size in bytes, per shard
+        batch_lines: Lines written to one shard before switching to the next
+    """
+
+    def __init__(self, paths: List[str], buffer_size: int = DEFAULT_BUFFER_SIZE, batch_lines: int = SHARD_BATCH_LINES):
+        self.paths = paths
+        self.batch_lines = max(1, batch_lines)
+        self.lines = [0] * len(paths)
+        self._outputs: List[BufferedOutput] = []
+        try:
+            for path in paths:
+                self._outputs.append(open_output(path, buffer_size))
+        except BaseException:
+            self.close()
+            raise
+        self._current = 0
+        self._batch = 0
+
+    def write(self, text: str) -> None:
+        """Write a block of complete lines."""
+        self._write(text, "\n", BufferedOutput.write)
+
+    def write_bytes(self, data: bytes) -> None:
+        """Write a block of complete, already encoded lines (line ends are not translated again)."""
+        self._write(data, b"\n", BufferedOutput.write_bytes)
+
+    def _write(self, data, newline, write) -> None:
+        while data:
+            room = self.batch_lines - self._batch
+            n = data.count(newline)
+            if n < room:
+                write(self._outputs[self._current], data)
+                self.lines[self._current] += n
+                self._batch += n
+                return
+            # The batch is full after the room-th line of data: write up to there and switch
+            end = -1
+            for _ in range(room):
+                end = data.index(newline, end + 1)
+            end += 1
+            write(self._outputs[self._current], data[:end])
+            self.lines[self._current] += room
+            self._batch = 0
+            self._current = (self._current + 1) % len(self._outputs)
+            data = data[end:]
+
+    def copy_file(self, path: str, chunk_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """Distribute the lines of an (already encoded, UTF-8) file over the shards."""
+        with open(path, 'rb') as src:
+            tail = b""
+            while True:
+                chunk = src.read(chunk_size)
+                if not chunk:
+                    break
+                chunk = tail + chunk
+                end = chunk.rfind(b"\n") + 1
+                tail = chunk[end:]
+                if end:
+                    self.write_bytes(chunk[:end])
+            if tail:
+                self.write_bytes(tail)
+
+    @property
+    def bytes_written(self) -> int:
+        return sum(output.bytes_written for output in self._outputs)
+
+    def close(self) -> None:
+        for output in self._outputs:
+            output.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_nt_output(output_path: str, buffer_size: int = DEFAULT_BUFFER_SIZE, shards: int = 1):
+    """Open the output of an N-Triples writer: one file, or a ShardedOutput over shard_path(output_path, i)."""
+    if shards <= 1:
+        return open_output(output_path, buffer_size)
+    return ShardedOutput([shard_path(output_path, i) for i in range(shards)], buffer_size)
+
+
+class NTriplesSerializer:
+    """
+    Formats instances (loaded) or stream2 entity dicts as N-Triples / N-Quads lines.
+
+    Args:
+        namespaces: Dictionary of prefix -> URI mappings (INST, MINIIFC, XSD, OWL)
+        graph: Named graph IRI; if given, lines are N-Quads
+    """
+
+    def __init__(self, namespaces: Dict[str, str], graph: Optional[str] = None):
+        self.inst = namespaces["INST"]
+        self.vocabulary = namespaces["MINIIFC"]
+        self.owl = namespaces["OWL"]
+        xsd = namespaces["XSD"]
+        self.end = f" <{graph}> .\n" if graph else " .\n"
+        self.integer = f'"^^<{xsd}integer>'
+        self.double = f'"^^<{xsd}double>'
+        self.boolean = f'"^^<{xsd}boolean>'
+        self._tables: Dict[Tuple[str, str], NTTable] = {}
+        self._predicates: Dict[str, str] = {}
+        self._subject_prefixes: Dict[str, str] = {}
+        self._type_lines: Dict[str, str] = {}
+
+    def ontology_header(self) -> str:
+        """Triples of the ontology header ('inst: a owl:Ontology ; owl:imports ifc:')."""
+        subject = f"<{self.inst}>"
+        return (f"{subject} {RDF_TYPE} <{self.owl}Ontology>{self.end}"
+                f"{subject} <{self.owl}imports> <{self.vocabulary}>{self.end}")
+
+    def table(self, schema_name: str, entity_type: str) -> NTTable:
+        """Expanded terms for an entity type, built once from its EntityTable."""
+        key = (schema_name, entity_type)
+        table = self._tables.get(key)
+        if table is None:
+            entity_table = get_entity_table(schema_name, entity_type)
+            table = self._tables[key] = NTTable(
+                subject_prefix=f"<{self.inst}{entity_type}_",
+                type_line=f" {RDF_TYPE} <{self.vocabulary}{entity_type}>{self.end}",
+                predicates=tuple(self.predicate(name) for name in entity_table.attribute_names),
+                kinds=entity_table.kinds,
+            )
+        return table
+
+    def predicate(self, attribute_name: str) -> str:
+        """' <vocabulary#Name> ' for an attribute name (cached)."""
+        predicate = self._predicates.get(attribute_name)
+        if predicate is None:
+            predicate = self._predicates[attribute_name] = f" <{self.vocabulary}{attribute_name}> "
+        return predicate
+
+    def literal(self, val) -> str:
+        """N-Triples term for a literal value (same datatypes as the Turtle writers)."""
+        val_type = type(val)
+        if val_type is str:
+            return f'"{val.translate(_ESCAPES)}"'
+        if val_type is int:
+            return f'"{val}{self.integer}'
+        if val_type is float:
+            return f'"{val}{self.double}'
+        if val_type is bool:
+            return f'"{str(val).lower()}{self.boolean}'
+        return f'"{str(val).translate(_ESCAPES)}"'
+
+    def instance_term(self, val) -> str:
+        """N-Triples term for an attribute value of a loaded instance."""
+        if isinstance(val, ifcopenshell.entity_instance):
+            return f"<{self.inst}{val.is_a()}_{val.id()}>"
+        return self.literal(val)
+
+    def instance(self, inst, table: NTTable, values=None) -> str:
+        """
+        Lines for a loaded entity instance.
+
+        Args:
+            inst: IfcOpenShell entity instance
+            table: Terms of the instance's entity type (see table())
+            values: Attribute values to write instead of the instance's own (e.g. pruned by a TypeFilter)
+        """
+        subject = f"{table.subject_prefix}{inst.id()}>"
+        end = self.end
+        lines = [subject, table.type_line]
+        for predicate, kind, value in zip(table.predicates, table.kinds, inst if values is None else values):
+            if value is None:
+                continue
+            if kind is AGGREGATE:
+                for item in value:
+                    if item is not None:
+                        lines.append(f"{subject}{predicate}{self.instance_term(item)}{end}")
+            else:
+                lines.append(f"{subject}{predicate}{self.instance_term(value)}{end}")
+        return "".join(lines)
+
+    def entity_term(self, val, entity_types) -> str:
+        """N-Triples term for an attribute value of a stream2 entity dict."""
+        if isinstance(val, dict) and 'ref' in val:
+            ref_id = val['ref']
+            ref_type = entity_types.get(ref_id) if entity_types is not None else None
+            return f"<{self.inst}{ref_type or 'Entity'}_{ref_id}>"
+        return self.literal(val)
+
+    def entity(self, entity_dict: dict, entity_types=None) -> str:
+        """Lines for a stream2 entity dictionary (references resolved through entity_types)."""
+        entity_type = entity_dict.get('type')
+        subject_prefix = self._subject_prefixes.get(entity_type)
+        if subject_prefix is None:
+            subject_prefix = self._subject_prefixes[entity_type] = f"<{self.inst}{entity_type}_"
+            self._type_lines[entity_type] = f" {RDF_TYPE} <{self.vocabulary}{entity_type}>{self.end}"
+        subject = f"{subject_prefix}{entity_dict.get('id')}>"
+        end = self.end
+        lines = [subject, self._type_lines[entity_type]]
+        for attr_name, attr_value in entity_dict.items():
+            if attr_name in ('type', 'id') or attr_value is None:
+                continue
+            predicate = self.predicate(attr_name)
+            if isinstance(attr_value, (list, tuple)):
+                for item in attr_value:
+                    if item is not None:
+                        lines.append(f"{subject}{predicate}{self.entity_term(item, entity_types)}{end}")
+            else:
+                lines.append(f"{subject}{predicate}{self.entity_term(attr_value, entity_types)}{end}")
+        return "".join(lines)
+
+
+def iter_instance_lines(instances, schema_name: str, serializer: NTriplesSerializer, type_filter=None) -> Iterator[str]:
+    """
+    Lazily format a sequence of loaded entity instances.
+
+    Yields:
+        The lines of one instance per item (also the basis of the in-process API, see ifc2lbd.triples)
+    """
+    allowed = type_filter.allowed_types if type_filter is not None else None
+    prune = type_filter is not None and type_filter.prune
+    tables = {}
+    for inst in instances:
+        entity_type = inst.is_a()
+        if allowed is not None and entity_type not in allowed:
+            continue
+        table = tables.get(entity_type)
+        if table is None:
+            table = tables[entity_type] = serializer.table(schema_name, entity_type)
+        yield serializer.instance(inst, table, type_filter.prune_values(inst) if prune else None)
+
+
+def iter_entity_lines(input_ifc_path: str, entity_types, serializer: NTriplesSerializer, type_filter=None) -> Iterator[str]:
+    """
+    Lazily stream an IFC file and format each entity.
+
+    Yields:
+        The lines of one entity per item
+    """
+    allowed = type_filter.allowed_types if type_filter is not None else None
+    prune = type_filter is not None and type_filter.prune
+    for entity_dict in iter_stream(input_ifc_path, types=allowed):
+        if not entity_dict.get('id') or not entity_dict.get('type'):
+            continue
+        if allowed is not None and entity_dict['type'] not in allowed:
+            continue
+        if prune:
+            entity_dict = type_filter.prune_entity(entity_dict, entity_types)
+        yield serializer.entity(entity_dict, entity_types)
+
+
+def iter_block_triples(blocks: Iterable[str]) -> Iterator[Tuple[str, str, str]]:
+    """
+    Split N-Triples line blocks (without graph) into (subject, predicate, object) terms.
+
+    IRIs contain no spaces and newlines in literals are escaped, so a line is
+    '<s> <p> object .' with the object running to the line end.
+    """
+    for block in blocks:
+        for line in block.split("\n"):
+            if line:
+                subject, predicate, rest = line.split(" ", 2)
+                yield subject, predicate, rest[:-2]
+
+
+def write_lines(f, blocks: Iterable[str]) -> int:
+    """
+    Write line blocks to an output; the file writers are this sink over the generators above.
+
+    Returns:
+        Number of blocks (entities) written
+    """
+    count = 0
+    write = f.write
+    for block in blocks:
+        write(block)
+        count += 1
+    return count
+
+
+def write_instances_nt(f, instances, schema_name: str, serializer: NTriplesSerializer, type_filter=None) -> int:
+    """
+    Write the lines of a sequence of loaded entity instances.
+
+    Returns:
+        Number of instances written
+    """
+    return write_lines(f, iter_instance_lines(instances, schema_name, serializer, type_filter))
+
+
+def write_entities_nt(f, input_ifc_path: str, entity_types, serializer: NTriplesSerializer, type_filter=None) -> int:
+    """
+    Stream an IFC file and write the lines of each entity.
+
+    Returns:
+        Number of entities written
+    """
+    return write_lines(f, iter_entity_lines(input_ifc_path, entity_types, serializer, type_filter))
+
+
+def write_graph_mini_ifcOWL_nq(f, model, graph: str, namespaces: Dict[str, str], type_filter=None):
+    """Write a loaded IFC model as N-Quads lines in one named graph."""
+    serializer = NTriplesSerializer(namespaces, graph)
+    f.write(serializer.ontology_header())
+    with Stage("serialize", output_path=getattr(f, "path", None)) as stage:
+        stage.entities = write_instances_nt(f, model, model.schema_identifier, serializer, type_filter)
+
+
+def write_graph_mini_ifcOWL_nq_stream(f, input_ifc_path: str, graph: str, namespaces: Dict[str, str], type_filter=None):
+    """Stream an IFC file into N-Quads lines in one named graph (two passes)."""
+    output_path = getattr(f, "path", None)
+    with Stage("type_map", input_ifc_path, output_path) as stage:
+        entity_types = build_entity_type_map(input_ifc_path)
+        stage.entities = len(entity_types)
+    serializer = NTriplesSerializer(namespaces, graph)
+    f.write(serializer.ontology_header())
+    with Stage("serialize", input_ifc_path, output_path) as stage:
+        stage.entities = write_entities_nt(f, input_ifc_path, entity_types, serializer, type_filter)
+
+
+def string_writer_mini_ifcOWL_nt(model, output_path: str, namespaces: Dict[str, str],
+                                 buffer_size: int = DEFAULT_BUFFER_SIZE, type_filter=None,
+                                 graph: Optional[str] = None, shards: int = 1):
+    """
+    Write a loaded IFC model as N-Triples (or N-Quads with a graph).
+
+    Args:
+        model: IfcOpenShell model to serialize
+        output_path: Path to output file (or shard path pattern, see shard_path)
+        namespaces: Dictionary of prefix -> URI mappings
+        buffer_size: Output buffer size in bytes
+        type_filter: Optional TypeFilter selecting the entity types to write
+        graph: Named graph IRI for N-Quads output
+        shards: Number of line-balanced output files
+    """
+    serializer = NTriplesSerializer(namespaces, graph)
+    with open_nt_output(output_path, buffer_size, shards) as f:
+        f.write(serializer.ontology_header())
+        with Stage("serialize", output_path=output_path) as stage:
+            stage.entities = write_instances_nt(f, model, model.schema_identifier, serializer, type_filter)
+
+
+def string_writer_mini_ifcOWL_nt_stream(input_ifc_path: str, output_path: str, namespaces: Dict[str, str],
+                                        buffer_size: int = DEFAULT_BUFFER_SIZE, mmap_index: bool = False,
+                                        type_filter=None, graph: Optional[str] = None, shards: int = 1):
+    """
+    Stream an IFC file and write it as N-Triples (or N-Quads with a graph), in two passes.
+
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_path: Path to output file (or shard path pattern, see shard_path)
+        namespaces: Dictionary of prefix -> URI mappings
+        buffer_size: Output buffer size in bytes
+        mmap_index: Memory-map the ID->type index from a temporary file next to the output
+        type_filter: Optional TypeFilter selecting the entity types to write
+        graph: Named graph IRI for N-Quads output
+        shards: Number of line-balanced output files
+    """
+    with Stage("type_map", input_ifc_path, output_path) as stage:
+        entity_types: EntityTypeIndex = build_entity_type_map(input_ifc_path, index_backing_path(output_path) if mmap_index else None)
+        stage.entities = len(entity_types)
+
+    serializer = NTriplesSerializer(namespaces, graph)
+    try:
+        with open_nt_output(output_path, buffer_size, shards) as f:
+            f.write(serializer.ontology_header())
+            with Stage("serialize", input_ifc_path, output_path) as stage:
+                stage.entities = write_entities_nt(f, input_ifc_path, entity_types, serializer, type_filter)
+    finally:
+        entity_types.close()
@@ -0,0 +1,270 @@
+"""SQLite quad-table sink (mini ifcOWL style), for loaded models and streams.
+
+Outputs ending in .sqlite / .db are written as a SQLite database that can be
+queried right away, without a parse-and-load step:
+
+    terms(id INTEGER PRIMARY KEY, term TEXT)          -- N-Triples terms: '<iri>', '"1.5"^^<...#double>'
+    quads(s, p, o, g INTEGER)                         -- term ids; g = 0 is the default graph
+    quads_text (view)                                 -- the quads with their terms
+
+Triples come from the N-Triples generators (lbd.NT_writer_strings), so the
+database holds exactly the triples of a .nt conversion. Terms are dictionary
+encoded in memory while loading; new terms and quads are inserted with
+executemany in batches of BATCH_ROWS rows, inside one transaction per
+TRANSACTION_ROWS quads. The indexes (the unique term index and spo, pos,
+osp, g) are built after the load, which is much faster than maintaining them
+row by row. A load that fails removes the database it created.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, Optional, Tuple
+
+from lbd.entity_index import EntityTypeIndex
+from lbd.NT_writer_strings import NTriplesSerializer, iter_block_triples, iter_entity_lines, iter_instance_lines
+from lbd.TTL_writer_strings_stream import build_entity_type_map, index_backing_path
+from handling_logging.metrics import Stage
+
+BATCH_ROWS = 50_000
+TRANSACTION_ROWS = 1_000_000
+DEFAULT_GRAPH = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS terms (id INTEGER PRIMARY KEY, term TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS quads (s INTEGER NOT NULL, p INTEGER NOT NULL, o INTEGER NOT NULL, g INTEGER NOT NULL DEFAULT 0);
+CREATE VIEW IF NOT EXISTS quads_text AS
+    SELECT ts.term AS s, tp.term AS p, tobj.term AS o, tg.term AS g
+    FROM quads q
+    JOIN terms ts ON ts.id = q.s
+    JOIN terms tp ON tp.id = q.p
+    JOIN terms tobj ON tobj.id = q.o
+    LEFT JOIN terms tg ON tg.id = q.g;
+"""
+
+# Dropped while loading (see QuadStore) and rebuilt by close()
+INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS terms_term ON terms (term);
+CREATE INDEX IF NOT EXISTS quads_spo ON quads (s, p, o);
+CREATE INDEX IF NOT EXISTS quads_pos ON quads (p, o, s);
+CREATE INDEX IF NOT EXISTS quads_osp ON quads (o, s, p);
+CREATE INDEX IF NOT EXISTS quads_g ON quads (g);
+"""
+
+
+class QuadStore:
+    """
+    Bulk loader of triples into a SQLite quad table.
+
+    Indexes are dropped while loading and built by close(). With
+    overwrite=False an existing database is appended to (its terms are read
+    back into the dictionary), e.g. to add another named graph. Leaving the
+    with block on an exception discards the load (see discard()).
+
+    Args:
+        path: Database file
+        overwrite: Remove an existing file first
+        batch_rows: Rows per executemany call
+        transaction_rows: Quads per transaction
+    """
+
+    def __init__(self, path: str, overwrite: bool = True, batch_rows: int = BATCH_ROWS, transaction_rows: int = TRANSACTION_ROWS):
+        if overwrite and os.path.exists(path):
+            os.remove(path)
+        self.path = path
+        self.created = not os.path.exists(path)
+        self.batch_rows = max(1, batch_rows)
+        self.transaction_rows = max(self.batch_rows, transaction_rows)
+        self.quads = 0
+        self._connection = sqlite3.connect(path, isolation_level=None)
+        # Bulk load settings: the file is only complete after close() anyway. An
+        # appended-to database keeps an in-memory journal, so discard() can roll back
+        self._connection.execute("PRAGMA journal_mode = OFF" if self.created else "PRAGMA journal_mode = MEMORY")
+        self._connection.execute("PRAGMA synchronous = OFF")
+        self._connection.execute("PRAGMA cache_size = -262144")  # 256 MiB
+        self._connection.executescript(SCHEMA)
+        indexes = "SELECT name FROM sqlite_master WHERE type = 'index' AND (name LIKE 'quads_%' OR name = 'terms_term')"
+        for (name,) in self._connection.execute(indexes).fetchall():
+            self._connection.execute(f"DROP INDEX {name}")
+        self._ids: Dict[str, int] = dict(
+            (term, term_id) for term_id, term in self._connection.execute("SELECT id, term FROM terms"))
+        self._next_id = max(self._ids.values(), default=0) + 1
+        self._new_terms = []
+        self._rows = []
+        self._in_transaction = 0
+
+    def term_id(self, term: str) -> int:
+        """Id of a term, assigned (and queued for insertion) on first use."""
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = self._ids[term] = self._next_id
+            self._next_id += 1
+            self._new_terms.append((term_id, term))
+        return term_id
+
+    def add_triples(self, triples: Iterable[Tuple[str, str, str]], graph: Optional[str] = None) -> int:
+        """
+        Queue triples of N-Triples terms into a graph (default graph if None).
+
+        Returns:
+            Number of triples added
+        """
+        ids = self._ids
+        term_id = self.term_id
+        rows = self._rows
+        g = DEFAULT_GRAPH if graph is None else term_id(f"<{graph}>")
+        count = 0
+        for s, p, o in triples:
+            rows.append((ids.get(s) or term_id(s), ids.get(p) or term_id(p), ids.get(o) or term_id(o), g))
+            count += 1
+            if len(rows) >= self.batch_rows:
+                self._flush()
+        return count
+
+    def _flush(self):
+        connection = self._connection
+        if not self._in_transaction:
+            connection.execute("BEGIN")
+        if self._new_terms:
+            connection.executemany("INSERT INTO terms (id, term) VALUES (?, ?)", self._new_terms)
+            self._new_terms.clear()
+        if self._rows:
+            connection.executemany("INSERT INTO quads (s, p, o, g) VALUES (?, ?, ?, ?)", self._rows)
+            self.quads += len(self._rows)
+            self._in_transaction += len(self._rows)
+            self._rows.clear()
+        if self._in_transaction >= self.transaction_rows:
+            connection.execute("COMMIT")
+            self._in_transaction = 0
+
+    def commit(self):
+        """Insert everything queued and commit."""
+        self._flush()
+        self._connection.execute("COMMIT")
+        self._in_transaction = 0
+
+    def close(self, index: bool = True):
+        """Commit, build the indexes (stage 'index') and close the database."""
+        if self._connection is None:
+            return
+        try:
+            self.commit()
+            if index:
+                with Stage("index", output_path=self.path):
+                    self._connection.executescript(INDEXES)
+                    self._connection.execute("ANALYZE")
+            self._connection.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            self._connection.close()
+            self._connection = None
+
+    def discard(self):
+        """
+        Close without committing what is queued or in the open transaction.
+
+        A database this store created is removed. An appended-to one is rolled
+        back to the last commit (every TRANSACTION_ROWS quads) and gets its
+        indexes back.
+        """
+        if self._connection is None:
+            return
+        try:
+            if not self.created:
+                if self._connection.in_transaction:
+                    self._connection.execute("ROLLBACK")
+                self._connection.executescript(INDEXES)
+                self._connection.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            self._connection.close()
+            self._connection = None
+            self._new_terms.clear()
+            self._rows.clear()
+            if self.created and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def write_graph_mini_ifcOWL_sqlite(store: QuadStore, model, namespaces: Dict[str, str], graph: Optional[str] = None, type_filter=None) -> int:
+    """
+    Load a loaded IFC model into a QuadStore.
+
+    Returns:
+        Number of triples added
+    """
+    serializer = NTriplesSerializer(namespaces)
+    entities = [0]
+    with Stage("serialize", output_path=store.path) as stage:
+        blocks = _with_header(serializer, iter_instance_lines(model, model.schema_identifier, serializer, type_filter), entities)
+        triples = store.add_triples(iter_block_triples(blocks), graph)
+        stage.entities = entities[0]
+    return triples
+
+
+def write_graph_mini_ifcOWL_sqlite_stream(store: QuadStore, input_ifc_path: str, namespaces: Dict[str, str], graph: Optional[str] = None,
+                                          type_filter=None, mmap_index: bool = False) -> int:
+    """
+    Stream an IFC file into a QuadStore (two passes).
+
+    Returns:
+        Number of triples added
+    """
+    with Stage("type_map", input_ifc_path, store.path) as stage:
+        entity_types: EntityTypeIndex = build_entity_type_map(input_ifc_path, index_backing_path(store.path) if mmap_index else None)
+        stage.entities = len(entity_types)
+    try:
+        serializer = NTriplesSerializer(namespaces)
+        entities = [0]
+        with Stage("serialize", input_ifc_path, store.path) as stage:
+            blocks = _with_header(serializer, iter_entity_lines(input_ifc_path, entity_types, serializer, type_filter), entities)
+            triples = store.add_triples(iter_block_triples(blocks), graph)
+            stage.entities = entities[0]
+    finally:
+        entity_types.close()
+    return triples
+
+
+def _with_header(serializer: NTriplesSerializer, blocks: Iterable[str], entities: list):
+    """The ontology header, then the entity blocks, counted in entities[0]."""
+    yield serializer.ontology_header()
+    for block in blocks:
+        entities[0] += 1
+        yield block
+
+
+def string_writer_mini_ifcOWL_sqlite(model, output_path: str, namespaces: Dict[str, str], type_filter=None, graph: Optional[str] = None):
+    """
+    Write a loaded IFC model into a new SQLite quad-table database.
+
+    Args:
+        model: IfcOpenShell model to serialize
+        output_path: Database file (replaced if it exists)
+        namespaces: Dictionary of prefix -> URI mappings
+        type_filter: Optional TypeFilter selecting the entity types to write
+        graph: Named graph IRI of the triples (default graph if None)
+    """
+    with QuadStore(output_path) as store:
+        write_graph_mini_ifcOWL_sqlite(store, model, namespaces, graph, type_filter)
+
+
+def string_writer_mini_ifcOWL_sqlite_stream(input_ifc_path: str, output_path: str, namespaces: Dict[str, str], mmap_index: bool = False,
+                                            type_filter=None, graph: Optional[str] = None):
+    """
+    Stream an IFC file into a new SQLite quad-table database, in two passes.
+
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_path: Database file (replaced if it exists)
+        namespaces: Dictionary of prefix -> URI mappings
+        mmap_index: Memory-map the ID->type index from a temporary file next to the output
+        type_filter: Optional TypeFilter selecting the entity types to write
+        graph: Named graph IRI of the triples (default graph if None)
+    """
+    with QuadStore(output_path) as store:
+        write_graph_mini_ifcOWL_sqlite_stream(store, input_ifc_path, namespaces, graph, type_filter, mmap_index)
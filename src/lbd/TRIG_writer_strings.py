@@ -0,0 +1,117 @@
+"""TriG (named graph) serializer built on the mini ifcOWL TTL writers"""
+
+from typing import Dict, List
+
+from ifc.compressed_input import input_stem
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from lbd.TTL_writer_strings_spf import write_instances
+from lbd.TTL_writer_strings_stream import build_entity_type_map, write_entities
+from handling_logging.metrics import Stage
+
+GRAPH_BASE = "http://example.org/graph/"
+
+
+def graph_name(input_ifc_path: str, graph_base: str = GRAPH_BASE) -> str:
+    """Named graph IRI for an input file, e.g. http://example.org/graph/Duplex (also for Duplex.ifc.gz)"""
+    return f"{graph_base}{input_stem(input_ifc_path)}"
+
+
+def graph_names(input_ifc_paths: List[str], graph_base: str = GRAPH_BASE) -> List[str]:
+    """Unique named graph IRIs for the inputs of a dataset: a second Duplex.ifc becomes .../Duplex_2, and so on."""
+    graphs = []
+    for input_ifc_path in input_ifc_paths:
+        graph = graph_name(input_ifc_path, graph_base)
+        candidate, n = graph, 1
+        while candidate in graphs:
+            n += 1
+            candidate = f"{graph}_{n}"
+        graphs.append(candidate)
+    return graphs
+
+
+def write_trig_prologue(f, namespaces: Dict[str, str], sources: List[str]):
+    """Write the TriG prologue (comments, BASE and PREFIX lines) shared by all graphs."""
+    BASE = namespaces.get("BASE", "http://example.org/base#")
+    f.write(f"# TriG output generated by LBD writer.\n")
+    for source in sources:
+        f.write(f"# Converted from: {source}\n")
+    f.write(f"# baseURI: {BASE}\n")
+    f.write("\n")
+    f.write(f"BASE <{BASE}> .\n")
+    for prefix, uri in namespaces.items():
+        f.write(f"PREFIX {prefix.lower()}: <{uri}> .\n")
+    f.write("\n")
+
+
+def write_graph_open(f, graph: str, namespaces: Dict[str, str]):
+    """Open a named graph block and write its ontology header."""
+    f.write(f"# imports: {namespaces['MINIIFC']}\n")
+    f.write(f"<{graph}> {{\n\n")
+    f.write(f"inst:\ta\towl:Ontology ;\n")
+    f.write(f"\towl:imports\tifc: .\n\n")
+
+
+def write_graph_close(f):
+    """Close a named graph block."""
+    f.write("}\n\n")
+
+
+def write_graph_mini_ifcOWL(f, model, graph: str, namespaces: Dict[str, str], type_filter=None):
+    """Write a loaded IFC model as one named graph (mini ifcOWL style)."""
+    write_graph_open(f, graph, namespaces)
+    with Stage("serialize", output_path=getattr(f, "path", None)) as stage:
+        stage.entities = write_instances(f, model, model.schema_identifier, namespaces["INST"], namespaces["XSD"],
+                                         type_filter)
+    write_graph_close(f)
+
+
+def write_graph_mini_ifcOWL_stream(f, input_ifc_path: str, graph: str, namespaces: Dict[str, str], type_filter=None):
+    """Stream an IFC file into one named graph (mini ifcOWL style, two passes)."""
+    output_path = getattr(f, "path", None)
+    with Stage("type_map", input_ifc_path, output_path) as stage:
+        entity_types = build_entity_type_map(input_ifc_path)
+        stage.entities = len(entity_types)
+    write_graph_open(f, graph, namespaces)
+    with Stage("serialize", input_ifc_path, output_path) as stage:
+        stage.entities = write_entities(f, input_ifc_path, entity_types, namespaces["INST"], namespaces["XSD"],
+                                        type_filter)
+    write_graph_close(f)
+
+
+def string_writer_mini_ifcOWL_trig(model, output_trig_path: str, namespaces: Dict[str, str],
+                                   graph: str, source: str = "", buffer_size: int = DEFAULT_BUFFER_SIZE,
+                                   type_filter=None):
+    """
+    Write a loaded IFC model to TriG format, as a single named graph.
+
+    Args:
+        model: IfcOpenShell model to serialize
+        output_trig_path: Path to output TriG file
+        namespaces: Dictionary of prefix -> URI mappings
+        graph: Named graph IRI
+        source: Input file name, recorded in the prologue comments
+        buffer_size: Output buffer size in bytes
+        type_filter: Optional TypeFilter selecting the entity types to write
+    """
+    with open_output(output_trig_path, buffer_size) as f:
+        write_trig_prologue(f, namespaces, [source] if source else [])
+        write_graph_mini_ifcOWL(f, model, graph, namespaces, type_filter)
+
+
+def string_writer_mini_ifcOWL_trig_stream(input_ifc_path: str, output_trig_path: str,
+                                          namespaces: Dict[str, str], graph: str,
+                                          buffer_size: int = DEFAULT_BUFFER_SIZE, type_filter=None):
+    """
+    Stream an IFC file and write it to TriG format, as a single named graph.
+
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_trig_path: Path to output TriG file
+        namespaces: Dictionary of prefix -> URI mappings
+        graph: Named graph IRI
+        buffer_size: Output buffer size in bytes
+        type_filter: Optional TypeFilter selecting the entity types to write
+    """
+    with open_output(output_trig_path, buffer_size) as f:
+        write_trig_prologue(f, namespaces, [input_ifc_path])
+        write_graph_mini_ifcOWL_stream(f, input_ifc_path, graph, namespaces, type_filter)
@@ -0,0 +1,307 @@
+"""Incremental TTL serializer: re-serialize only the entities that changed between IFC revisions.
+
+A digest index is written next to the TTL output (<output>.digests). It holds,
+per STEP entity, its subject IRI, GlobalId (IfcRoot subtypes), a digest of the
+raw STEP record and the byte range of its Turtle block in the output. The
+second header line records the size and mtime of the TTL file the byte ranges
+point into; if the TTL file was replaced since (e.g. by a full conversion),
+the ranges are not reused:
+
+    # ifc2lbd digest index v2
+    # output	4823311	1718030203123456789
+    5399	inst:IfcWall_5399	2O2Fr$t4X7Zf8NOew3FKau	3f0c...	1234567	812
+
+For a new revision, entities are fingerprinted from the raw SPF records (no
+attribute parsing) and matched against the index: by GlobalId where present,
+by STEP id otherwise. Unchanged entities are copied byte for byte from the
+previous output, only changed and added ones go through format_instance, so
+the patched file equals a full conversion. The difference can also be written
+as a SPARQL Update delta.
+"""
+
+import hashlib
+import mmap
+import os
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from ifc.spf_reader import iter_spf_records
+from lbd.entity_tables import get_entity_table
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from lbd.TTL_writer_strings_spf import write_prologue, format_instance, write_instances
+from handling_logging.metrics import Stage
+
+INDEX_HEADER = "# ifc2lbd digest index v2\n"
+OUTPUT_STAMP_PREFIX = "# output\t"
+# Older indexes without an output stamp are read, but their byte ranges are never reused
+_UNSTAMPED_HEADERS = ("# ifc2lbd digest index v1\n",)
+
+
+class IndexEntry(NamedTuple):
+    """One entity of a digest index (offset/length are -1 when no TTL block is known)."""
+    subject: str
+    global_id: Optional[str]
+    digest: str
+    offset: int = -1
+    length: int = -1
+
+
+class EntityDiff(NamedTuple):
+    """Entity changes between two revisions (STEP ids of the respective revision)."""
+    added: List[int]                    # new ids without a counterpart
+    removed: List[int]                  # old ids without a counterpart
+    changed: List[Tuple[int, int]]      # (old id, new id)
+    unchanged: Set[int]                 # ids whose Turtle block can be reused
+
+
+def digest_index_path(output_ttl_path: str) -> str:
+    """Path of the digest index stored next to a TTL output."""
+    return f"{output_ttl_path}.digests"
+
+
+def discard_digest_index(output_ttl_path: str):
+    """Remove the digest index of a TTL output that is being replaced by a non-incremental conversion."""
+    path = digest_index_path(output_ttl_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def output_stamp(output_ttl_path: str) -> str:
+    """Size and mtime of a TTL output, as recorded in the digest index header."""
+    stat = os.stat(output_ttl_path)
+    return f"{stat.st_size}\t{stat.st_mtime_ns}"
+
+
+def digest_index_matches(path: str, output_ttl_path: str) -> bool:
+    """True if the digest index was written for the TTL file as it is now (its byte ranges are valid)."""
+    if not os.path.exists(output_ttl_path):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        if f.readline() != INDEX_HEADER:
+            return False
+        stamp = f.readline()
+    return stamp.startswith(OUTPUT_STAMP_PREFIX) and stamp[len(OUTPUT_STAMP_PREFIX):].rstrip("\n") == output_stamp(output_ttl_path)
+
+
+def record_digest(record: bytes) -> str:
+    return hashlib.blake2b(record, digest_size=16).hexdigest()
+
+
+def scan_digests(input_ifc_path: str) -> Dict[int, IndexEntry]:
+    """Fingerprint every entity of an IFC file from its raw STEP records (no TTL offsets)."""
+    return {
+        entity_id: IndexEntry(f"inst:{entity_type}_{entity_id}", global_id, record_digest(record))
+        for entity_id, entity_type, global_id, record in iter_spf_records(input_ifc_path)
+    }
+
+
+def read_digest_index(path: str) -> Dict[int, IndexEntry]:
+    """Read a digest index written by write_digest_index."""
+    index = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        header = f.readline()
+        if header != INDEX_HEADER and header not in _UNSTAMPED_HEADERS:
+            raise ValueError(f"Not an ifc2lbd digest index: {path}")
+        for line in f:
+            if line.startswith("#"):
+                continue
+            entity_id, subject, global_id, digest, offset, length = line.rstrip("\n").split("\t")
+            index[int(entity_id)] = IndexEntry(subject, global_id or None, digest, int(offset), int(length))
+    return index
+
+
+def write_digest_index(path: str, index: Dict[int, IndexEntry], output_ttl_path: str):
+    """Write a digest index (one tab separated line per entity) for the finished TTL output."""
+    with open_output(path) as f:
+        f.write(INDEX_HEADER)
+        f.write(f"{OUTPUT_STAMP_PREFIX}{output_stamp(output_ttl_path)}\n")
+        for entity_id, entry in index.items():
+            f.write(f"{entity_id}\t{entry.subject}\t{entry.global_id or ''}\t{entry.digest}\t{entry.offset}\t{entry.length}\n")
+
+
+def diff_entities(old: Dict[int, IndexEntry], new: Dict[int, IndexEntry]) -> EntityDiff:
+    """
+    Match the entities of two revisions and classify them.
+
+    Entities with a GlobalId are matched by it (they may have been renumbered),
+    all others by STEP id. A matched pair is unchanged only if both its STEP
+    record digest and its subject IRI are equal.
+    """
+    added, removed, changed = [], [], []
+    unchanged = set()
+    matched_old = set()
+    old_by_global_id = {entry.global_id: entity_id for entity_id, entry in old.items() if entry.global_id}
+
+    for entity_id, entry in new.items():
+        old_id = old_by_global_id.get(entry.global_id) if entry.global_id else None
+        if old_id is None and entity_id in old and not old[entity_id].global_id:
+            old_id = entity_id
+        if old_id is None or old_id in matched_old:
+            added.append(entity_id)
+            continue
+        matched_old.add(old_id)
+        old_entry = old[old_id]
+        if old_id == entity_id and old_entry.digest == entry.digest and old_entry.subject == entry.subject:
+            unchanged.add(entity_id)
+        else:
+            changed.append((old_id, entity_id))
+
+    removed = [entity_id for entity_id in old if entity_id not in matched_old]
+    return EntityDiff(added, removed, changed, unchanged)
+
+
+def _retyped_referrers(model, old: Dict[int, IndexEntry], new: Dict[int, IndexEntry], diff: EntityDiff) -> Set[int]:
+    """
+    Ids of unchanged entities that reference an entity whose type (and so IRI) changed.
+
+    Their STEP record is the same but their Turtle block names the old IRI.
+    """
+    referrers = set()
+    for entity_id, entry in new.items():
+        old_entry = old.get(entity_id)
+        if old_entry is not None and old_entry.subject != entry.subject:
+            for inst in model.get_inverse(model.by_id(entity_id)):
+                if inst.id() in diff.unchanged:
+                    referrers.add(inst.id())
+    return referrers
+
+
+def string_writer_mini_ifcOWL_patched(model, output_path: str, namespaces: Dict[str, str], input_ifc_path: str,
+                                      previous_index: Optional[Dict[int, IndexEntry]] = None,
+                                      previous_ttl_path: Optional[str] = None,
+                                      buffer_size: int = DEFAULT_BUFFER_SIZE) -> EntityDiff:
+    """
+    Write IFC model to Turtle TTL format, reusing the Turtle blocks of unchanged entities.
+
+    The output is byte-identical to string_writer_mini_ifcOWL. A digest index
+    for the next revision is written to digest_index_path(output_path). Without
+    a previous index (or without the previous TTL file) every entity is
+    serialized. The caller checks that previous_ttl_path is still the file the
+    index describes (digest_index_matches).
+
+    Args:
+        model: IfcOpenShell model of the new revision
+        output_path: Path to output TTL file (may be the previous TTL file; it is replaced at the end)
+        namespaces: Dictionary of prefix -> URI mappings
+        input_ifc_path: Path the model was loaded from (scanned for entity digests)
+        previous_index: Digest index of the previous revision
+        previous_ttl_path: TTL output the previous index points into
+        buffer_size: Output buffer size in bytes
+
+    Returns:
+        The entity diff against the previous revision (everything added if there is none)
+    """
+    with Stage("digest", input_ifc_path, output_path) as stage:
+        new_index = scan_digests(input_ifc_path)
+        stage.entities = len(new_index)
+
+    previous_index = previous_index or {}
+    diff = diff_entities(previous_index, new_index)
+    retyped = _retyped_referrers(model, previous_index, new_index, diff)
+    if retyped:
+        diff = diff._replace(changed=diff.changed + [(entity_id, entity_id) for entity_id in sorted(retyped)],
+                             unchanged=diff.unchanged - retyped)
+    reusable = diff.unchanged
+    if previous_ttl_path is None or not os.path.exists(previous_ttl_path):
+        reusable = set()
+
+    INST = namespaces["INST"]
+    XSD = namespaces["XSD"]
+    schema_name = model.schema_identifier
+    tmp_path = f"{output_path}.tmp"
+    previous = None
+    try:
+        if reusable:
+            with open(previous_ttl_path, 'rb') as prev_file:
+                previous = mmap.mmap(prev_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with open_output(tmp_path, buffer_size) as f, Stage("serialize", input_ifc_path, output_path) as stage:
+            write_prologue(f, namespaces)
+            encode = (lambda text: text.replace("\n", f.newline).encode(f.encoding)) if f.newline != "\n" \
+                else (lambda text: text.encode(f.encoding))
+            tables = {}
+            run_start = run_end = -1  # byte range of consecutive reused blocks, copied in one go
+            formatted = 0
+            for inst in model:
+                entity_id = inst.id()
+                entry = new_index.get(entity_id)
+                old_entry = previous_index.get(entity_id) if entity_id in reusable else None
+                if old_entry is not None and old_entry.offset >= 0:
+                    if old_entry.offset != run_end:
+                        if run_start >= 0:
+                            f.write_bytes(previous[run_start:run_end])
+                        run_start = old_entry.offset
+                    run_end = old_entry.offset + old_entry.length
+                    offset = f.tell() + (run_end - run_start) - old_entry.length
+                    length = old_entry.length
+                else:
+                    if run_start >= 0:
+                        f.write_bytes(previous[run_start:run_end])
+                        run_start = run_end = -1
+                    entity_type = inst.is_a()
+                    table = tables.get(entity_type)
+                    if table is None:
+                        table = tables[entity_type] = get_entity_table(schema_name, entity_type)
+                    data = encode(format_instance(inst, table, INST, XSD))
+                    offset, length = f.tell(), len(data)
+                    f.write_bytes(data)
+                    formatted += 1
+                if entry is not None:
+                    new_index[entity_id] = entry._replace(offset=offset, length=length)
+            if run_start >= 0:
+                f.write_bytes(previous[run_start:run_end])
+            stage.entities = formatted
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        if previous is not None:
+            previous.close()
+
+    os.replace(tmp_path, output_path)
+    write_digest_index(digest_index_path(output_path), new_index, output_path)
+    return diff
+
+
+def write_sparql_update(path: str, diff: EntityDiff, model, old_index: Dict[int, IndexEntry],
+                        namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE):
+    """
+    Write the difference between two revisions as a SPARQL 1.1 Update.
+
+    Removed and changed entities are deleted by subject (DELETE WHERE, one
+    operation per subject, so a missing one does not block the others), then
+    changed and added entities are inserted with their new Turtle blocks.
+
+    Args:
+        path: Output .ru file
+        diff: Entity diff (see diff_entities)
+        model: IfcOpenShell model of the new revision
+        old_index: Digest index of the previous revision (for the deleted subjects)
+        namespaces: Dictionary of prefix -> URI mappings
+        buffer_size: Output buffer size in bytes
+    """
+    deleted = [old_index[entity_id].subject for entity_id in diff.removed]
+    deleted += [old_index[old_id].subject for old_id, _ in diff.changed]
+    inserted = [new_id for _, new_id in diff.changed] + list(diff.added)
+
+    with open_output(path, buffer_size) as f:
+        f.write(f"# SPARQL Update generated by LBD writer: {len(diff.added)} added, "
+                f"{len(diff.changed)} changed, {len(diff.removed)} removed entities\n")
+        f.write(f"BASE <{namespaces.get('BASE', 'http://example.org/base#')}>\n")
+        for prefix, uri in namespaces.items():
+            if prefix != "BASE":
+                f.write(f"PREFIX {prefix.lower()}: <{uri}>\n")
+        # The Turtle blocks use ifc: for the mini ifcOWL vocabulary
+        f.write(f"PREFIX ifc: <{namespaces['MINIIFC']}>\n\n")
+
+        operations = [f"DELETE WHERE {{ {subject} ?p ?o }}" for subject in deleted]
+        f.write(" ;\n".join(operations))
+        if inserted:
+            if operations:
+                f.write(" ;\n")
+            f.write("INSERT DATA {\n")
+            write_instances(f, (model.by_id(entity_id) for entity_id in inserted), model.schema_identifier,
+                            namespaces["INST"], namespaces["XSD"])
+            f.write("}")
+        f.write("\n")
+
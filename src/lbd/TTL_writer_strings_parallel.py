@@ -0,0 +1,178 @@
+"""Parallel (sharded) TTL serializer for a loaded IFC model
+
+Where worker processes are forked, they inherit the model the caller has
+loaded and share its memory with the parent (copy-on-write), so the file is
+parsed once. Elsewhere (spawned workers, as on Windows) there is nothing to
+inherit: the caller does not load the model at all (model=None) and every
+worker parses the file itself, so memory grows to about one loaded model per
+worker. Either way a worker picks its shards from the model's own iteration
+order, so the parent never needs the model to partition the ids.
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from ifc.ifc_options import load_ifc
+from ifc.stream_settings import pipeline_depth as resolve_pipeline_depth
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from lbd.TTL_writer_strings_spf import write_prologue, write_instances
+from handling_logging.metrics import Stage
+
+# Models (and their instance ids to shard) of the worker processes, so several
+# shards reuse one load; set by the parent before forking workers that inherit them
+_worker_models: Dict[str, Tuple[object, List[int]]] = {}
+
+
+def workers_share_model() -> bool:
+    """True if worker processes can be forked and inherit a model loaded by the parent."""
+    return sys.platform != "win32" and "fork" in multiprocessing.get_all_start_methods()
+
+
+def _instance_ids(model, type_filter=None) -> List[int]:
+    """Ids to serialize, in the model's iteration order."""
+    if type_filter is None:
+        return [inst.id() for inst in model]
+    # Drop the excluded entities before sharding, so the shards stay balanced
+    return [inst.id() for inst in model if inst.is_a() in type_filter.allowed_types]
+
+
+def split_shards(ids: List[int], shard_count: int) -> List[List[int]]:
+    """
+    Split instance ids into contiguous shards of (almost) equal size.
+
+    Shards keep the model's iteration order, so concatenating their
+    fragments in shard order reproduces the sequential writer's output.
+    """
+    shard_count = max(1, min(shard_count, len(ids)))
+    size, rest = divmod(len(ids), shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < rest else 0)
+        shards.append(ids[start:end])
+        start = end
+    return shards
+
+
+def _shard(ids: List[int], index: int, shard_count: int) -> List[int]:
+    """Shard index of split_shards(ids, shard_count), without building the others (empty past the last one)."""
+    shard_count = max(1, min(shard_count, len(ids)))
+    if index >= shard_count:
+        return []
+    size, rest = divmod(len(ids), shard_count)
+    start = index * size + min(index, rest)
+    return ids[start:start + size + (1 if index < rest else 0)]
+
+
+def _write_fragment(model, ids: List[int], fragment_path: str, namespaces: Dict[str, str],
+                    buffer_size: int = DEFAULT_BUFFER_SIZE, type_filter=None, pipeline_depth: Optional[int] = None) -> str:
+    """Serialize the instances with the given ids into a Turtle fragment file."""
+    with open_output(fragment_path, buffer_size, pipeline_depth=pipeline_depth) as f:
+        write_instances(f, (model.by_id(i) for i in ids), model.schema_identifier,
+                        namespaces["INST"], namespaces["XSD"], type_filter)
+    return fragment_path
+
+
+def _write_fragment_in_process(input_ifc_path: str, shard_index: int, shard_count: int, fragment_path: str,
+                               namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE,
+                               type_filter=None, pipeline_depth: Optional[int] = None) -> Tuple[str, int]:
+    """
+    Worker process entry: write shard shard_index of shard_count.
+
+    The model is the inherited one, or loaded once per process (also compressed inputs).
+
+    Returns:
+        (fragment path, number of instances in the shard)
+    """
+    loaded = _worker_models.get(input_ifc_path)
+    if loaded is None:
+        model = load_ifc(input_ifc_path)
+        loaded = _worker_models[input_ifc_path] = (model, _instance_ids(model, type_filter))
+    model, ids = loaded
+    shard = _shard(ids, shard_index, shard_count)
+    return _write_fragment(model, shard, fragment_path, namespaces, buffer_size, type_filter, pipeline_depth), len(shard)
+
+
+def string_writer_mini_ifcOWL_parallel(model, output_path: str, namespaces: Dict[str, str],
+                                       input_ifc_path: str, jobs: Optional[int] = None,
+                                       shards_per_job: int = 4, use_threads: bool = False,
+                                       buffer_size: int = DEFAULT_BUFFER_SIZE, type_filter=None):
+    """
+    Write IFC model to Turtle TTL format, serializing shards of it in parallel.
+
+    The instances are split into contiguous shards (in the model's iteration
+    order). Each shard is written to a temporary Turtle fragment next to the
+    output and the fragments are concatenated behind the shared prologue, so
+    the result is byte-identical to string_writer_mini_ifcOWL.
+
+    Worker processes cannot receive the loaded model: forked workers inherit
+    it (see workers_share_model), otherwise each one opens input_ifc_path
+    itself. With use_threads=True the shards are written by threads sharing
+    the loaded model instead (only useful with bindings that release the GIL).
+
+    Args:
+        model: IfcOpenShell model to serialize, or None to leave loading to the
+            (spawned) worker processes
+        output_path: Path to output TTL file
+        namespaces: Dictionary of prefix -> URI mappings
+        input_ifc_path: Path the model was loaded from (loaded by worker processes that do not inherit it, see load_ifc)
+        jobs: Number of workers (default: CPU count)
+        shards_per_job: Shards per worker, for load balancing
+        use_threads: Use threads sharing the model instead of processes
+        buffer_size: Output buffer size in bytes (per fragment and for the output)
+        type_filter: Optional TypeFilter selecting the entity types to write
+    """
+    jobs = jobs or os.cpu_count() or 1
+    # The worker processes do not share the caller's stream settings
+    depth = resolve_pipeline_depth()
+    if model is None and use_threads:
+        raise ValueError("Threads need the loaded model")
+    shard_count = jobs * shards_per_job
+    if model is not None:
+        ids = _instance_ids(model, type_filter)
+        shard_count = max(1, min(shard_count, len(ids)))
+
+    out_dir = os.path.dirname(os.path.abspath(output_path))
+    fragment_paths = []
+    try:
+        for i in range(shard_count):
+            fd, fragment_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_path)}.{i}.", suffix=".part", dir=out_dir)
+            os.close(fd)
+            fragment_paths.append(fragment_path)
+
+        with Stage("serialize", input_ifc_path, output_path) as stage:
+            if use_threads:
+                with ThreadPoolExecutor(max_workers=jobs) as pool:
+                    futures = [pool.submit(_write_fragment, model, shard, fragment_path, namespaces, buffer_size, type_filter, depth)
+                               for shard, fragment_path in zip(split_shards(ids, shard_count), fragment_paths)]
+                    done = [future.result() for future in futures]
+                stage.entities = len(ids)
+            else:
+                context = None
+                if model is not None and workers_share_model():
+                    # Forked workers find the model and its ids here instead of loading the file
+                    _worker_models[input_ifc_path] = (model, ids)
+                    context = multiprocessing.get_context("fork")
+                try:
+                    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+                        futures = [pool.submit(_write_fragment_in_process, input_ifc_path, i, shard_count, fragment_path, namespaces,
+                                               buffer_size, type_filter, depth)
+                                   for i, fragment_path in enumerate(fragment_paths)]
+                        results = [future.result() for future in futures]
+                finally:
+                    _worker_models.pop(input_ifc_path, None)
+                done = [fragment_path for fragment_path, _ in results]
+                stage.entities = sum(count for _, count in results)
+
+        with open_output(output_path, buffer_size) as f:
+            write_prologue(f, namespaces)
+            for fragment_path in done:
+                f.copy_file(fragment_path)
+    finally:
+        for fragment_path in fragment_paths:
+            if os.path.exists(fragment_path):
+                os.remove(fragment_path)
@@ -1,10 +1,16 @@
 """ String TTL serializer"""
 
 from collections import defaultdict
-from typing import Any, Dict, List, Tuple, Optional, Union, Callable
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional, Union, Callable
 from pathlib import Path
 import ifcopenshell
 import ifcopenshell.ifcopenshell_wrapper as wrapper
+from lbd.entity_tables import AGGREGATE, EntityTable, get_entity_table
+from lbd.numeric_literals import format_doubles
+from lbd.dedup import ValueDeduplicator, write_same_as
+from lbd.ifcowl_tables import get_ifcowl_entity_table
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from handling_logging.metrics import Stage
 
 def format_turtle_value(val, p, o):
     """
@@ -25,7 +31,174 @@ def format_turtle_value(val, p, o):
     else:
         return f'"{str(val)}"'
 
-def string_writer_mini_ifcOWL(model, output_path: str, namespaces: Dict[str, str]):
+def format_prologue(namespaces: Dict[str, str]) -> str:
+    """Turtle prologue (comments, BASE, PREFIX and ontology header)."""
+    BASE = namespaces.get("BASE", "http://example.org/base#")
+    lines = [
+        f"# Turtle TTL output generated by LBD writer.\n",
+        f"# baseURI: {BASE}\n",
+        f"# imports: {namespaces['MINIIFC']}\n",
+        "\n",
+        f"BASE <{BASE}> .\n",
+    ]
+    for prefix, uri in namespaces.items():
+        lines.append(f"PREFIX {prefix.lower()}: <{uri}> .\n")
+    lines.append("\n")
+    lines.append(f"inst:\ta\towl:Ontology ;\n")
+    lines.append(f"\towl:imports\tifc: .\n\n")
+    return "".join(lines)
+
+
+def write_prologue(f, namespaces: Dict[str, str]):
+    """Write the Turtle prologue (comments, BASE, PREFIX and ontology header)."""
+    f.write(format_prologue(namespaces))
+
+
+def format_instance(inst, table: EntityTable, inst_prefix, xsd_prefix, values=None) -> str:
+    """
+    Format a single entity instance as a Turtle block.
+
+    Args:
+        inst: IfcOpenShell entity instance
+        table: Precompiled attribute table for the instance's entity type
+        inst_prefix: Instance namespace prefix (not used currently)
+        xsd_prefix: XSD namespace prefix (not used currently)
+        values: Attribute values to write instead of the instance's own (e.g. pruned by a TypeFilter)
+
+    Returns:
+        Turtle block for the instance, terminated by a blank line
+    """
+    lines = []
+    for pred, kind, value in zip(table.predicates, table.kinds, inst if values is None else values):
+        if value is None:
+            continue
+        if kind is AGGREGATE:
+            # Coordinates and other float tuples in one go
+            doubles = format_doubles(value)
+            if doubles is not None:
+                lines.append(f"{pred} {doubles}")
+                continue
+            objs = [format_turtle_value(item, inst_prefix, xsd_prefix) for item in value if item is not None]
+            if not objs:
+                continue
+            lines.append(f"{pred} {' , '.join(objs)}")
+        else:
+            lines.append(f"{pred} {format_turtle_value(value, inst_prefix, xsd_prefix)}")
+
+    subj = f"{table.subject_prefix}{inst.id()}{table.type_triple}"
+    if not lines:
+        return f"{subj} .\n\n"
+    return f"{subj} ;\n\t" + " ;\n\t".join(lines) + " .\n\n"
+
+
+def iter_instance_blocks(instances, schema_name: str, inst_prefix, xsd_prefix, type_filter=None, dedup=None,
+                         get_table=get_entity_table) -> Iterator[str]:
+    """
+    Lazily format a sequence of entity instances as Turtle blocks.
+
+    Args:
+        instances: Iterable of entity instances (a model or a slice of it)
+        schema_name: Schema identifier of the model
+        inst_prefix: Instance namespace prefix (not used currently)
+        xsd_prefix: XSD namespace prefix (not used currently)
+        type_filter: Optional TypeFilter; instances of other types are skipped
+        dedup: Optional ValueDeduplicator; duplicates are skipped and references to them rewritten
+        get_table: Attribute table lookup (schema, entity type); get_ifcowl_entity_table for ifcOWL predicates
+
+    Yields:
+        The Turtle block of one instance per item (also the basis of the in-process API, see ifc2lbd.triples)
+    """
+    if type_filter is not None or dedup is not None:
+        return _iter_filtered_instance_blocks(instances, schema_name, inst_prefix, xsd_prefix, type_filter, dedup, get_table)
+    return _iter_instance_blocks(instances, schema_name, inst_prefix, xsd_prefix, get_table)
+
+
+def _iter_instance_blocks(instances, schema_name: str, inst_prefix, xsd_prefix, get_table) -> Iterator[str]:
+    """iter_instance_blocks without filter or deduplication."""
+    # Per-call view on the shared table cache, keyed by entity type only
+    tables = {}
+    for inst in instances:
+        entity_type = inst.is_a()
+        table = tables.get(entity_type)
+        if table is None:
+            table = tables[entity_type] = get_table(schema_name, entity_type)
+        yield format_instance(inst, table, inst_prefix, xsd_prefix)
+
+
+def _iter_filtered_instance_blocks(instances, schema_name: str, inst_prefix, xsd_prefix, type_filter, dedup=None,
+                                   get_table=get_entity_table) -> Iterator[str]:
+    """iter_instance_blocks with a TypeFilter and/or deduplication: the type is checked before any attribute is read."""
+    allowed = type_filter.allowed_types if type_filter is not None else None
+    prune = type_filter is not None and type_filter.prune
+    duplicates = dedup.representative if dedup is not None else {}
+    tables = {}
+    for inst in instances:
+        entity_type = inst.is_a()
+        if allowed is not None and entity_type not in allowed:
+            continue
+        if inst.id() in duplicates:
+            continue
+        table = tables.get(entity_type)
+        if table is None:
+            table = tables[entity_type] = get_table(schema_name, entity_type)
+        values = type_filter.prune_values(inst) if prune else None
+        if dedup is not None:
+            values = dedup.rewrite_values(inst if values is None else values)
+        yield format_instance(inst, table, inst_prefix, xsd_prefix, values)
+
+
+def write_blocks(f, blocks: Iterable[str]) -> int:
+    """
+    Write Turtle blocks to an output; the file writers are this sink over the generators above.
+
+    Returns:
+        Number of blocks (entities) written
+    """
+    count = 0
+    write = f.write
+    for block in blocks:
+        write(block)
+        count += 1
+    return count
+
+
+def write_instances(f, instances, schema_name: str, inst_prefix, xsd_prefix, type_filter=None, dedup=None,
+                    get_table=get_entity_table):
+    """
+    Write Turtle blocks for a sequence of entity instances (arguments as in iter_instance_blocks).
+
+    Args:
+        f: Output to write to (BufferedOutput or text file)
+
+    Returns:
+        Number of instances written
+    """
+    return write_blocks(f, iter_instance_blocks(instances, schema_name, inst_prefix, xsd_prefix, type_filter, dedup, get_table))
+
+
+def _string_writer(model, output_path: str, namespaces: Dict[str, str], buffer_size: int, type_filter, dedup: bool,
+                   same_as_path: Optional[str], get_table):
+    """Shared body of the loaded Turtle writers; get_table decides the predicates."""
+    INST = namespaces["INST"]
+    XSD = namespaces["XSD"]
+
+    deduplicator = None
+    if dedup:
+        with Stage("dedup", output_path=output_path) as stage:
+            deduplicator = ValueDeduplicator.from_model(model)
+            stage.entities = len(deduplicator)
+
+    with open_output(output_path, buffer_size) as f:
+        write_prologue(f, namespaces)
+        with Stage("serialize", output_path=output_path) as stage:
+            stage.entities = write_instances(f, model, model.schema_identifier, INST, XSD, type_filter, deduplicator, get_table)
+
+    if deduplicator is not None and same_as_path:
+        write_same_as(same_as_path, deduplicator, namespaces, buffer_size)
+
+
+def string_writer_mini_ifcOWL(model, output_path: str, namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE,
+                              type_filter=None, dedup: bool = False, same_as_path: Optional[str] = None):
     """
     Write IFC model to Turtle TTL format.
     
@@ -33,78 +206,31 @@ def string_writer_mini_ifcOWL(model, output_path: str, namespaces: Dict[str, str
         model: IfcOpenShell model to serialize
         output_path: Path to output TTL file
         namespaces: Dictionary of prefix -> URI mappings (e.g., {"IFC": "...", "INST": "...", "XSD": "..."})
+        buffer_size: Output buffer size in bytes
+        type_filter: Optional TypeFilter selecting the entity types to write
+        dedup: If True, write one representative per class of identical value entities (see lbd.dedup)
+        same_as_path: With dedup, also write owl:sameAs links of the dropped duplicates to this file
     """
-    BASE = namespaces.get("BASE", "http://example.org/base#")
-    INST = namespaces["INST"]
-    XSD = namespaces["XSD"]
+    _string_writer(model, output_path, namespaces, buffer_size, type_filter, dedup, same_as_path, get_entity_table)
+
 
-    schema = wrapper.schema_by_name(model.schema_identifier)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        # Write prologue comments:
-        f.write(f"# Turtle TTL output generated by LBD writer.\n")
-        f.write(f"# baseURI: {BASE}\n")
-        f.write(f"# imports: {namespaces['MINIIFC']}\n")
-        f.write("\n")
-        f.write(f"BASE <{BASE}> .\n")
-        for prefix, uri in namespaces.items():
-            f.write(f"PREFIX {prefix.lower()}: <{uri}> .\n")
-        f.write("\n")
-
-        f.write(f"inst:\ta\towl:Ontology ;\n")
-        f.write(f"\towl:imports\tifc: .\n\n")
-
-        for idx, inst in enumerate(model):
-            #print(instance_schema)
-            # Subject IRI
-            subj = f"inst:{inst.is_a()}_{inst.id()}"
-            pred_obj = defaultdict(list)
-
-            for attr_idx, value in enumerate(inst):
-                if value is None:
-                    continue
-                # Predicate
-                pred = f"ifc:{inst.attribute_name(attr_idx)}"
-
-                # Values
-                if isinstance(value, (list, tuple)):
-                    for item in value:
-                        if item is None:
-                            continue
-                        obj = format_turtle_value(item, INST, XSD)
-                        pred_obj[pred].append(obj)
-                else:
-                    obj = format_turtle_value(value, INST, XSD)
-                    pred_obj[pred].append(obj)
-        
-            f.write(f"{subj} a ifc:{inst.is_a()}")
-
-            if pred_obj:
-                f.write(" ;\n")
-                predicates = list(pred_obj.items())
-                for i, (pred, objs) in enumerate(predicates):
-                    objects_str = " , ".join(objs)
-                    if i < len(predicates) - 1:
-                        f.write(f"\t{pred} {objects_str} ;\n")
-                    else:
-                        f.write(f"\t{pred} {objects_str} .\n\n")
-            else:
-                f.write(" .\n\n")
-
-
-# This one is still not functioning.
-
-def string_writer_ifcOWL(model, output_path: str, namespaces: Dict[str, str]):
+def string_writer_ifcOWL(model, output_path: str, namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE,
+                         type_filter=None, dedup: bool = False, same_as_path: Optional[str] = None):
     """
     Write IFC model to Turtle TTL format following full ifcOWL.
     
     In ifcOWL, predicates are named as: ifc:{AttributeName}_{DeclaredTypeName}
-    For example: ifc:GlobalId_IfcGloballyUniqueId, ifc:Name_IfcLabel
+    For example: ifc:GlobalId_IfcGloballyUniqueId, ifc:Name_IfcLabel. The
+    declared types come from the persisted per-schema tables (lbd.ifcowl_tables);
+    subjects and objects are written as in the mini ifcOWL writer.
 
     Args:
         model: IfcOpenShell model to serialize
         output_path: Path to output TTL file
         namespaces: Dictionary of prefix -> URI mappings (e.g., {"IFC": "...", "INST": "...", "XSD": "..."})
+        buffer_size: Output buffer size in bytes
+        type_filter: Optional TypeFilter selecting the entity types to write
+        dedup: If True, write one representative per class of identical value entities (see lbd.dedup)
+        same_as_path: With dedup, also write owl:sameAs links of the dropped duplicates to this file
     """
-
-    pass
\ No newline at end of file
+    _string_writer(model, output_path, namespaces, buffer_size, type_filter, dedup, same_as_path, get_ifcowl_entity_table)
@@ -1,25 +1,38 @@
-"""Streaming TTL writer for IFC files using ifcopenshell.stream2"""
+"""Streaming TTL writer for IFC files using ifcopenshell.stream2 (or the built-in SPF reader)"""
 
-from collections import defaultdict
-from typing import Any, Dict
+import os
+import re
+from collections import deque
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Optional, Union
 from pathlib import Path
 import ifcopenshell
 import ifcopenshell.ifcopenshell_wrapper as wrapper
+from ifc.ifc_options import get_schema_uri, iter_stream
+from lbd.entity_index import EntityTypeIndex
+from lbd.numeric_literals import format_doubles
+from lbd.dedup import ValueDeduplicator, write_same_as
+from lbd.ifcowl_tables import ifcowl_predicates
+from lbd.compression import compression_for_path, open_compressed_text
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+from lbd.TTL_writer_strings_spf import write_blocks
+from handling_logging.metrics import Stage
 
 
-def build_entity_type_map(input_ifc_path: str) -> dict:
+def build_entity_type_map(input_ifc_path: str, backing_path: Optional[str] = None) -> EntityTypeIndex:
     """
     First pass: Build mapping of entity ID -> entity type.
     This allows us to resolve references correctly in the second pass.
     
     Args:
         input_ifc_path: Path to IFC file
+        backing_path: Optional file to memory-map the index into instead of keeping it on the heap
         
     Returns:
-        Dictionary mapping entity IDs to their types {1: 'IfcOwnerHistory', 2: 'IfcPerson', ...}
+        Compact dict-like index mapping entity IDs to their types {1: 'IfcOwnerHistory', 2: 'IfcPerson', ...}
     """
-    entity_types = {}
-    for entity_dict in ifcopenshell.stream2(input_ifc_path):
+    entity_types = EntityTypeIndex(backing_path)
+    for entity_dict in iter_stream(input_ifc_path):
         entity_id = entity_dict.get('id')
         entity_type = entity_dict.get('type')
         if entity_id and entity_type:
@@ -35,7 +48,7 @@ def format_turtle_value(val, inst_prefix, xsd_prefix, entity_types=None):
         val: Value to format
         inst_prefix: Instance namespace prefix (not used currently)
         xsd_prefix: XSD namespace prefix (not used currently)
-        entity_types: Optional dict mapping entity IDs to types for proper reference formatting
+        entity_types: Optional mapping of entity IDs to types (dict or EntityTypeIndex) for proper reference formatting
     """
     val_type = type(val)
     
@@ -50,9 +63,10 @@ def format_turtle_value(val, inst_prefix, xsd_prefix, entity_types=None):
     elif isinstance(val, dict) and 'ref' in val:
         # Handle reference dictionaries from stream2
         ref_id = val['ref']
-        if entity_types and ref_id in entity_types:
+        ref_type = entity_types.get(ref_id) if entity_types is not None else None
+        if ref_type:
             # Writing inst:IfcPerson_3 instead of inst:Entity_3
-            return f"inst:{entity_types[ref_id]}_{ref_id}"
+            return f"inst:{ref_type}_{ref_id}"
         else:
             # Fallback if no type map provided
             return f"inst:Entity_{ref_id}"
@@ -60,86 +74,378 @@ def format_turtle_value(val, inst_prefix, xsd_prefix, entity_types=None):
         return f'"{str(val)}"'
 
 
-def string_writer_mini_ifcOWL_stream(input_ifc_path: str, output_ttl_path: str, namespaces: Dict[str, str]):
+def format_prologue(namespaces: Dict[str, str]) -> str:
+    """Turtle prologue (comments, BASE, PREFIX and ontology header)."""
+    BASE = namespaces.get("BASE", "http://example.org/base#")
+    lines = [
+        f"# Turtle TTL output generated by LBD writer (streaming mode).\n",
+        f"# baseURI: {BASE}\n",
+        f"# imports: {namespaces['MINIIFC']}\n",
+        "\n",
+        f"BASE <{BASE}> .\n",
+    ]
+    for prefix, uri in namespaces.items():
+        lines.append(f"PREFIX {prefix.lower()}: <{uri}> .\n")
+    lines.append("\n")
+    lines.append(f"inst:\ta\towl:Ontology ;\n")
+    lines.append(f"\towl:imports\tifc: .\n\n")
+    return "".join(lines)
+
+
+def write_prologue(f, namespaces: Dict[str, str]):
+    """Write the Turtle prologue (comments, BASE, PREFIX and ontology header)."""
+    f.write(format_prologue(namespaces))
+
+
+def format_entity(entity_dict: dict, inst_prefix, xsd_prefix, entity_types=None, predicates=None) -> str:
+    """
+    Format a single stream2 entity dictionary as a Turtle block.
+
+    Args:
+        entity_dict: Entity dictionary as yielded by stream2
+        inst_prefix: Instance namespace prefix (not used currently)
+        xsd_prefix: XSD namespace prefix (not used currently)
+        entity_types: Mapping of entity IDs to types for reference formatting
+        predicates: Optional attribute name -> predicate mapping of the entity's type
+            (e.g. ifcOWL predicates); default 'ifc:{attribute name}'
+
+    Returns:
+        Turtle block for the entity, terminated by a blank line
+    """
+    entity_type = entity_dict.get('type')
+    entity_id = entity_dict.get('id')
+
+    lines = []
+    for attr_name, attr_value in entity_dict.items():
+        if attr_name in ('type', 'id') or attr_value is None:
+            continue
+        pred = f"ifc:{attr_name}" if predicates is None else predicates.get(attr_name) or f"ifc:{attr_name}"
+
+        if isinstance(attr_value, (list, tuple)):
+            # Coordinates and other float tuples in one go
+            doubles = format_doubles(attr_value)
+            if doubles is not None:
+                lines.append(f"{pred} {doubles}")
+                continue
+            objs = [format_turtle_value(item, inst_prefix, xsd_prefix, entity_types) for item in attr_value if item is not None]
+            if not objs:
+                continue
+            lines.append(f"{pred} {' , '.join(objs)}")
+        else:
+            lines.append(f"{pred} {format_turtle_value(attr_value, inst_prefix, xsd_prefix, entity_types)}")
+
+    subj = f"inst:{entity_type}_{entity_id} a ifc:{entity_type}"
+    if not lines:
+        return f"{subj} .\n\n"
+    return f"{subj} ;\n\t" + " ;\n\t".join(lines) + " .\n\n"
+
+
+def iter_entity_blocks(input_ifc_path: str, entity_types: dict, inst_prefix, xsd_prefix, type_filter=None, dedup=None,
+                       predicates=None) -> Iterator[str]:
+    """
+    Lazily stream an IFC file and format each entity as a Turtle block.
+
+    Args:
+        input_ifc_path: Path to IFC file
+        entity_types: Mapping of entity IDs to types (see build_entity_type_map)
+        inst_prefix: Instance namespace prefix (not used currently)
+        xsd_prefix: XSD namespace prefix (not used currently)
+        type_filter: Optional TypeFilter; other entity types are skipped before
+            formatting (with the built-in reader, before their attributes are parsed)
+        dedup: Optional ValueDeduplicator; duplicates are skipped and references to them rewritten
+        predicates: Optional callable entity type -> {attribute name: predicate} (e.g. ifcOWL predicates)
+
+    Yields:
+        The Turtle block of one entity per item
+    """
+    if type_filter is not None or dedup is not None or predicates is not None:
+        return _iter_filtered_entity_blocks(input_ifc_path, entity_types, inst_prefix, xsd_prefix, type_filter, dedup, predicates)
+    return _iter_entity_blocks(input_ifc_path, entity_types, inst_prefix, xsd_prefix)
+
+
+def _iter_entity_blocks(input_ifc_path: str, entity_types: dict, inst_prefix, xsd_prefix) -> Iterator[str]:
+    """iter_entity_blocks without filter, deduplication or other predicates."""
+    for entity_dict in iter_stream(input_ifc_path):
+        if not entity_dict.get('type') or not entity_dict.get('id'):
+            continue
+        yield format_entity(entity_dict, inst_prefix, xsd_prefix, entity_types)
+
+
+def _iter_filtered_entity_blocks(input_ifc_path: str, entity_types: dict, inst_prefix, xsd_prefix, type_filter, dedup=None,
+                                 predicates=None) -> Iterator[str]:
+    """iter_entity_blocks with a TypeFilter pushed down into the reader, deduplication and/or other predicates."""
+    allowed = type_filter.allowed_types if type_filter is not None else None
+    prune = type_filter is not None and type_filter.prune
+    duplicates = dedup.representative if dedup is not None else {}
+    predicate_maps = {}
+    entity_predicates = None
+    for entity_dict in iter_stream(input_ifc_path, types=allowed):
+        entity_type = entity_dict.get('type')
+        entity_id = entity_dict.get('id')
+        if not entity_type or not entity_id or (allowed is not None and entity_type not in allowed):
+            continue
+        if entity_id in duplicates:
+            continue
+        if prune:
+            entity_dict = type_filter.prune_entity(entity_dict, entity_types)
+        if dedup is not None:
+            entity_dict = dedup.rewrite_entity(entity_dict)
+        if predicates is not None:
+            entity_predicates = predicate_maps.get(entity_type)
+            if entity_predicates is None:
+                entity_predicates = predicate_maps[entity_type] = predicates(entity_type)
+        yield format_entity(entity_dict, inst_prefix, xsd_prefix, entity_types, entity_predicates)
+
+
+def write_entities(f, input_ifc_path: str, entity_types: dict, inst_prefix, xsd_prefix, type_filter=None, dedup=None,
+                   predicates=None):
+    """
+    Stream an IFC file and write a Turtle block for each entity (arguments as in iter_entity_blocks).
+
+    Args:
+        f: Output to write to (BufferedOutput or text file)
+
+    Returns:
+        Number of entities written
+    """
+    return write_blocks(f, iter_entity_blocks(input_ifc_path, entity_types, inst_prefix, xsd_prefix, type_filter, dedup, predicates))
+
+
+def index_backing_path(output_path: str) -> str:
+    """Path of the temporary memory-mapped type index file for an output file."""
+    return f"{output_path}.typeindex"
+
+
+def string_writer_mini_ifcOWL_stream(input_ifc_path: str, output_ttl_path: str, namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE, mmap_index: bool = False,
+                                     type_filter=None, dedup: bool = False, same_as_path: Optional[str] = None):
     """
     Stream an IFC file and write to Turtle TTL format (mini ifcOWL style).
     
     Uses two-pass approach:
     1. First pass: Build lightweight ID->type mapping
     2. Second pass: Stream and write with correct entity references
+
+    The output is encoded and written in blocks of buffer_size bytes. With
+    mmap_index the ID->type index is memory-mapped from a temporary file next
+    to the output instead of living on the heap. With a type_filter only the
+    selected entity types are written; the type index still covers all
+    entities, so references to dropped ones can be pruned or kept as IRIs.
+    With dedup the first pass also classifies the value entities (see
+    lbd.dedup); same_as_path receives the owl:sameAs links of the duplicates.
     """
-    BASE = namespaces.get("BASE", "http://example.org/base#")
+    _stream_writer(input_ifc_path, output_ttl_path, namespaces, buffer_size, mmap_index, type_filter, dedup, same_as_path)
+
+
+def _stream_writer(input_ifc_path: str, output_ttl_path: str, namespaces: Dict[str, str], buffer_size: int, mmap_index: bool,
+                   type_filter, dedup: bool, same_as_path: Optional[str], schema_name: Optional[str] = None, predicates=None):
+    """Shared two-pass body of the streaming Turtle writers; predicates as in write_entities."""
     INST = namespaces["INST"]
     XSD = namespaces["XSD"]
 
     # FIRST PASS: Build instance type mapping
-    entity_types = build_entity_type_map(input_ifc_path)
+    deduplicator = None
+    backing_path = index_backing_path(output_ttl_path) if mmap_index else None
+    if dedup:
+        with Stage("dedup", input_ifc_path, output_ttl_path) as stage:
+            entity_types = EntityTypeIndex(backing_path)
+            deduplicator = ValueDeduplicator.from_stream(input_ifc_path, schema_name or get_schema_uri(input_ifc_path), entity_types)
+            stage.entities = len(deduplicator)
+    else:
+        with Stage("type_map", input_ifc_path, output_ttl_path) as stage:
+            entity_types = build_entity_type_map(input_ifc_path, backing_path)
+            stage.entities = len(entity_types)
 
     # SECOND PASS: Write TTL with correct references
-    with open(output_ttl_path, 'w', encoding='utf-8') as f:
-        f.write(f"# Turtle TTL output generated by LBD writer (streaming mode).\n")
-        f.write(f"# baseURI: {BASE}\n")
-        f.write(f"# imports: {namespaces['MINIIFC']}\n")
-        f.write("\n")
-        f.write(f"BASE <{BASE}> .\n")
-        for prefix, uri in namespaces.items():
-            f.write(f"PREFIX {prefix.lower()}: <{uri}> .\n")
-        f.write("\n")
-        f.write(f"inst:\ta\towl:Ontology ;\n")
-        f.write(f"\towl:imports\tifc: .\n\n")
-
-        for entity_dict in ifcopenshell.stream2(input_ifc_path):
-            entity_type = entity_dict.get('type')
-            entity_id = entity_dict.get('id')
-            
-            if not entity_type or not entity_id:
-                continue
-            
-            subj = f"inst:{entity_type}_{entity_id}"
-            pred_obj = defaultdict(list)
-            
-            for attr_name, attr_value in entity_dict.items():
-                if attr_name in ('type', 'id') or attr_value is None:
+    try:
+        with open_output(output_ttl_path, buffer_size) as f:
+            write_prologue(f, namespaces)
+            with Stage("serialize", input_ifc_path, output_ttl_path) as stage:
+                stage.entities = write_entities(f, input_ifc_path, entity_types, INST, XSD, type_filter, deduplicator, predicates)
+    finally:
+        entity_types.close()
+
+    if deduplicator is not None and same_as_path:
+        write_same_as(same_as_path, deduplicator, namespaces, buffer_size)
+
+
+def unresolved_references(entity_dict: dict, entity_types: dict) -> list:
+    """
+    Collect referenced entity IDs whose type is not known yet (forward references).
+
+    Args:
+        entity_dict: Entity dictionary as yielded by stream2
+        entity_types: Mapping of entity IDs seen so far to their types
+
+    Returns:
+        List of referenced IDs missing from entity_types
+    """
+    unresolved = []
+    for attr_name, attr_value in entity_dict.items():
+        if attr_name in ('type', 'id') or attr_value is None:
+            continue
+        items = attr_value if isinstance(attr_value, (list, tuple)) else (attr_value,)
+        for item in items:
+            if isinstance(item, dict) and 'ref' in item and item['ref'] not in entity_types:
+                unresolved.append(item['ref'])
+    return unresolved
+
+
+PLACEHOLDER_PATTERN = re.compile(r"inst:Entity_(\d+)")
+
+
+def resolve_placeholders(output_ttl_path: str, entity_types: dict):
+    """
+    Rewrite 'inst:Entity_N' placeholders in a written TTL file once all types are known.
+
+    The output file is rewritten line by line into a temporary file next to it,
+    which then replaces the original (compressed outputs are recompressed).
+    IDs that are still unknown (dangling references) keep their placeholder,
+    as in the two-pass writer.
+    """
+    def replace(match):
+        ref_id = int(match.group(1))
+        entity_type = entity_types.get(ref_id)
+        return f"inst:{entity_type}_{ref_id}" if entity_type else match.group(0)
+
+    output_path = Path(output_ttl_path)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    compression = compression_for_path(output_ttl_path)
+    with open_compressed_text(output_path, compression) as src, open_output(str(tmp_path), compression=compression) as dst:
+        for line in src:
+            if "inst:Entity_" in line:
+                line = PLACEHOLDER_PATTERN.sub(replace, line)
+            dst.write(line)
+    os.replace(tmp_path, output_path)
+
+
+def string_writer_mini_ifcOWL_stream_single_pass(input_ifc_path: str, output_ttl_path: str,
+                                                namespaces: Union[Dict[str, str], Callable[[str], Dict[str, str]]],
+                                                max_pending: int = 100_000,
+                                                buffer_size: int = DEFAULT_BUFFER_SIZE,
+                                                mmap_index: bool = False,
+                                                type_filter=None):
+    """
+    Stream an IFC file once and write to Turtle TTL format (mini ifcOWL style).
+
+    Entities are written in file order. An entity whose references all point to
+    already seen entities is written straight away. Once an entity with a forward
+    reference is met, it and everything after it wait in a FIFO pending buffer
+    until the referenced types are known. If the buffer grows beyond max_pending,
+    the oldest entity is written with 'inst:Entity_N' placeholders, which are
+    fixed up in the output file at the end. As long as the buffer is not
+    exceeded, the output is identical to the two-pass writer.
+
+    Args:
+        input_ifc_path: Path to input IFC file
+        output_ttl_path: Path to output TTL file
+        namespaces: Prefix -> URI mapping, or a callable building it from the
+            schema identifier found in the file header (read in the same pass)
+        max_pending: Maximum number of entities held back for forward references
+        buffer_size: Output buffer size in bytes
+        mmap_index: Memory-map the ID->type index from a temporary file next to the output
+        type_filter: Optional TypeFilter selecting the entity types to write. Entities
+            written with placeholders keep their references to dropped entities as IRIs.
+    """
+    entity_types = EntityTypeIndex(index_backing_path(output_ttl_path) if mmap_index else None)
+    pending = deque()
+    placeholders_written = False
+    schema = None
+    INST = XSD = None
+    f = open_output(output_ttl_path, buffer_size)
+    allowed = type_filter.allowed_types if type_filter is not None else None
+    prune = type_filter is not None and type_filter.prune
+    written = 0
+
+    def write_entity(entity_dict):
+        nonlocal written
+        if prune:
+            entity_dict = type_filter.prune_entity(entity_dict, entity_types)
+        f.write(format_entity(entity_dict, INST, XSD, entity_types))
+        written += 1
+
+    def write_head():
+        write_entity(pending.popleft()[0])
+
+    def drain():
+        while pending:
+            head = pending[0]
+            head[1] = [ref_id for ref_id in head[1] if ref_id not in entity_types]
+            if head[1]:
+                break
+            write_head()
+
+    try:
+        with Stage("serialize", input_ifc_path, output_ttl_path) as stage:
+            for entity_dict in iter_stream(input_ifc_path):
+                entity_type = entity_dict.get('type')
+                entity_id = entity_dict.get('id')
+
+                if not entity_id:
+                    # Header entities come first and have no instance id
+                    if entity_type == 'file_schema':
+                        schema = (entity_dict.get('schema_identifiers') or [None])[0]
+                    continue
+                if not entity_type:
                     continue
-                
-                pred = f"ifc:{attr_name}"
-                
-                if isinstance(attr_value, (list, tuple)):
-                    for item in attr_value:
-                        if item is None:
-                            continue
-                        obj = format_turtle_value(item, INST, XSD, entity_types)
-                        pred_obj[pred].append(obj)
-                else:
-                    obj = format_turtle_value(attr_value, INST, XSD, entity_types)
-                    pred_obj[pred].append(obj)
-            
-            f.write(f"{subj} a ifc:{entity_type}")
-            
-            if pred_obj:
-                f.write(" ;\n")
-                predicates = list(pred_obj.items())
-                for i, (pred, objs) in enumerate(predicates):
-                    objects_str = " , ".join(objs)
-                    if i < len(predicates) - 1:
-                        f.write(f"\t{pred} {objects_str} ;\n")
-                    else:
-                        f.write(f"\t{pred} {objects_str} .\n\n")
-            else:
-                f.write(" .\n\n")
-
-
-
-
-# This one is still not functioning. So just a placeholder.
-
-def string_writer_ifcOWL_stream(input_ifc_path: str, output_ttl_path: str, namespaces: Dict[str, str]):
+
+                if INST is None:
+                    if callable(namespaces):
+                        namespaces = namespaces(schema or 'IFC4')
+                    INST = namespaces["INST"]
+                    XSD = namespaces["XSD"]
+                    write_prologue(f, namespaces)
+
+                entity_types[entity_id] = entity_type
+                if allowed is not None and entity_type not in allowed:
+                    # Only its type is needed, for the references to it
+                    if pending:
+                        drain()
+                    continue
+                unresolved = unresolved_references(entity_dict, entity_types)
+
+                if not pending and not unresolved:
+                    write_entity(entity_dict)
+                    continue
+
+                pending.append([entity_dict, unresolved])
+                drain()
+
+                if len(pending) > max_pending:
+                    placeholders_written = True
+                    write_head()
+                    drain()
+
+            if INST is None:
+                # No instances at all, still produce a valid (empty) document
+                if callable(namespaces):
+                    namespaces = namespaces(schema or 'IFC4')
+                write_prologue(f, namespaces)
+            while pending:
+                write_head()
+            stage.entities = written
+        f.close()
+        if placeholders_written:
+            with Stage("resolve_placeholders", input_ifc_path, output_ttl_path):
+                resolve_placeholders(output_ttl_path, entity_types)
+    finally:
+        f.close()
+        entity_types.close()
+
+
+def string_writer_ifcOWL_stream(input_ifc_path: str, output_ttl_path: str, namespaces: Dict[str, str],
+                                buffer_size: int = DEFAULT_BUFFER_SIZE, mmap_index: bool = False,
+                                type_filter=None, dedup: bool = False, same_as_path: Optional[str] = None):
     """
     Stream an IFC file and write to Turtle TTL format following full ifcOWL.
     
     Uses two-pass approach:
     1. First pass: Build lightweight ID->type mapping
     2. Second pass: Stream and write with correct entity references
-    """
 
-    pass
\ No newline at end of file
+    Predicates are ifc:{AttributeName}_{DeclaredTypeName}, looked up in the
+    same persisted per-schema tables as the loaded ifcOWL writer
+    (lbd.ifcowl_tables); everything else is as in string_writer_mini_ifcOWL_stream.
+    """
+    schema_name = get_schema_uri(input_ifc_path)
+    _stream_writer(input_ifc_path, output_ttl_path, namespaces, buffer_size, mmap_index, type_filter, dedup, same_as_path,
+                   schema_name, partial(ifcowl_predicates, schema_name))
@@ -0,0 +1,175 @@
+"""Compressed outputs (.gz, .zst) written with parallel block compression.
+
+The output is cut into independent blocks that are compressed by a thread
+pool (zlib and zstandard release the GIL while compressing) and written in
+order, each as a complete gzip member / zstd frame. Concatenated members are
+valid gzip and zstd streams, so gzip -d, zstd -d, gzip.open and rdflib read
+the file as one document.
+
+zstd support needs the optional 'zstandard' package.
+"""
+
+import gzip
+import io
+import os
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from handling_logging.metrics import log_stage
+
+# Output suffix -> compression
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".zst": "zstd",
+}
+DEFAULT_LEVELS = {
+    "gzip": 6,
+    "zstd": 3,
+}
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024  # 4 MiB per member; smaller blocks compress worse
+
+
+def compression_for_path(path: str) -> Optional[str]:
+    """Compression chosen by the output suffix ('x.ttl.gz' -> 'gzip'), or None."""
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(str(path))[1].lower())
+
+
+def strip_compression_suffix(path: str) -> str:
+    """Path without a compression suffix ('x.ttl.zst' -> 'x.ttl')."""
+    path = str(path)
+    root, ext = os.path.splitext(path)
+    return root if ext.lower() in COMPRESSION_SUFFIXES else path
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstd output requires the 'zstandard' package (pip install zstandard)") from None
+    return zstandard
+
+
+def _gzip_block(data: bytes, level: int) -> bytes:
+    # wbits=31: a complete gzip member (header with mtime 0, deflate data, trailer)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+class ParallelCompressedFile:
+    """
+    Binary file-like sink compressing blocks of its input on a thread pool.
+
+    Used by BufferedOutput in place of the raw file. Blocks are written in
+    submission order; at most 2 * threads blocks are in flight, after that
+    write() waits for the oldest one (bounded memory).
+
+    Args:
+        path: Output file path
+        compression: 'gzip' or 'zstd'
+        level: Compression level (default: 6 for gzip, 3 for zstd)
+        threads: Compression threads (default: CPU count)
+        block_size: Uncompressed bytes per block/member
+    """
+
+    def __init__(self, path: str, compression: str, level: Optional[int] = None,
+                 threads: Optional[int] = None, block_size: int = DEFAULT_BLOCK_SIZE):
+        if compression not in DEFAULT_LEVELS:
+            raise ValueError(f"Unknown compression '{compression}'. Available: {list(DEFAULT_LEVELS)}")
+        self.path = path
+        self.compression = compression
+        self.level = DEFAULT_LEVELS[compression] if level is None else level
+        self.block_size = max(1, block_size)
+        self.threads = threads or os.cpu_count() or 1
+        if compression == "zstd":
+            zstandard = _zstandard()
+            # ZstdCompressor instances are not thread safe: one per block
+            self._compress = lambda data: zstandard.ZstdCompressor(level=self.level).compress(data)
+        else:
+            self._compress = lambda data: _gzip_block(data, self.level)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.compress_ns = 0  # summed over the blocks, so it can exceed wall time
+        self._block = bytearray()
+        self._in_flight = deque()
+        self._raw = open(path, 'wb', buffering=0)
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="compress")
+
+    def _timed_compress(self, data: bytes):
+        start = time.perf_counter_ns()
+        compressed = self._compress(data)
+        return compressed, time.perf_counter_ns() - start
+
+    def write(self, data) -> int:
+        """Queue bytes for compression; returns len(data) like a raw file."""
+        n = len(data)
+        self._block += data
+        self.bytes_in += n
+        while len(self._block) >= self.block_size:
+            self._submit(bytes(self._block[:self.block_size]))
+            del self._block[:self.block_size]
+        return n
+
+    def _submit(self, data: bytes):
+        self._in_flight.append(self._pool.submit(self._timed_compress, data))
+        while len(self._in_flight) > 2 * self.threads:
+            self._write_oldest()
+
+    def _write_oldest(self):
+        compressed, elapsed_ns = self._in_flight.popleft().result()
+        self.compress_ns += elapsed_ns
+        view = memoryview(compressed)
+        written = 0
+        while written < len(view):
+            written += self._raw.write(view[written:])
+        self.bytes_out += written
+
+    def flush(self):
+        """Compress and write everything queued so far (ends the current member)."""
+        if self._block:
+            self._submit(bytes(self._block))
+            self._block.clear()
+        while self._in_flight:
+            self._write_oldest()
+
+    def close(self):
+        """Write the remaining blocks and close the file; emits a 'compress' metrics record."""
+        if self._raw.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._raw.close()
+        log_stage("compress", self.compress_ns, output_path=self.path, bytes_written=self.bytes_out)
+
+    @property
+    def closed(self) -> bool:
+        return self._raw.closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_compressed_text(path: str, compression: Optional[str] = "auto", encoding: str = "utf-8"):
+    """
+    Open a (possibly compressed) text file for reading.
+
+    Args:
+        path: File path
+        compression: 'auto' (from the suffix), 'gzip', 'zstd' or None
+        encoding: Text encoding
+    """
+    if compression == "auto":
+        compression = compression_for_path(path)
+    if compression == "gzip":
+        return gzip.open(path, 'rt', encoding=encoding)
+    if compression == "zstd":
+        reader = _zstandard().ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        return io.TextIOWrapper(reader, encoding=encoding)
+    return open(path, 'r', encoding=encoding)
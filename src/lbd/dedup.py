@@ -0,0 +1,262 @@
+"""Deduplication of structurally identical value entities (--dedup).
+
+Authoring tools write thousands of identical IfcDirection / IfcCartesianPoint
+(and other geometry) instances. These geometric and measure value entities
+(VALUE_TYPES) have no identity of their own, so two of them with the same type
+and the same attribute values (references compared by the class of the
+referenced value entity, recursively) are interchangeable:
+
+    #10=IFCDIRECTION((0.,0.,1.));  #12=IFCDIRECTION((0.,0.,1.));
+    #11=IFCAXIS2PLACEMENT3D(#9,#10,$);  #13=IFCAXIS2PLACEMENT3D(#9,#12,$);
+
+Here #12 is a duplicate of #10, and with that #13 of #11. The entity with the
+smallest STEP id represents its class; duplicates are not written and all
+references to them are rewritten to the representative. The dropped IRIs can
+be written as owl:sameAs links to a sidecar file.
+
+Only the allow-listed types are merged. Other entities without a GlobalId do
+carry identity (IfcOwnerHistory, IfcPerson, IfcOrganization, IfcLocalPlacement
+with its placement hierarchy, the IFC2X3 IfcProperty* of one property set) and
+are always written as they are.
+
+Building the classes needs the attribute values of all value entities in
+memory (one pass over the model or stream before writing).
+"""
+
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from ifcopenshell import entity_instance
+from ifc.ifc_options import iter_stream
+from lbd.entity_tables import get_entity_table
+from lbd.output_buffer import DEFAULT_BUFFER_SIZE, open_output
+
+# Entity types merged by default: geometric and measure values without identity
+VALUE_TYPES: FrozenSet[str] = frozenset((
+    "IfcCartesianPoint", "IfcDirection", "IfcVector",
+    "IfcCartesianPointList2D", "IfcCartesianPointList3D",
+    "IfcAxis1Placement", "IfcAxis2Placement2D", "IfcAxis2Placement3D",
+    "IfcCartesianTransformationOperator2D", "IfcCartesianTransformationOperator2DnonUniform",
+    "IfcCartesianTransformationOperator3D", "IfcCartesianTransformationOperator3DnonUniform",
+    "IfcPolyline", "IfcLine", "IfcCircle", "IfcEllipse", "IfcTrimmedCurve", "IfcPolyLoop",
+    "IfcIndexedPolyCurve", "IfcIndexedPolygonalFace", "IfcIndexedPolygonalFaceWithVoids",
+    "IfcMeasureWithUnit", "IfcDimensionalExponents", "IfcColourRgb",
+))
+
+# Stands in for a reference in an attribute key; the referenced ids are kept in order next to it
+_REF = object()
+
+
+def _key_scalar(value):
+    value_type = type(value)
+    if value_type is str:
+        return value
+    if value_type is float and not value:
+        # 0.0 == -0.0, but they are written differently
+        return (float, repr(value))
+    # Tagged, as 1 == 1.0 == True
+    return (value_type, value)
+
+
+def _instance_key(value, refs: list):
+    """Hashable key of a loaded attribute value; referenced ids are appended to refs."""
+    if value is None:
+        return None
+    if isinstance(value, tuple):
+        return tuple(_instance_key(item, refs) for item in value)
+    if isinstance(value, entity_instance):
+        entity_id = value.id()
+        if entity_id == 0:
+            # Typed value in a select, e.g. IfcLabel('x')
+            return ('=', value.is_a(), _instance_key(value.wrappedValue, refs))
+        refs.append(entity_id)
+        return _REF
+    return _key_scalar(value)
+
+
+def _entity_key(value, refs: list):
+    """Hashable key of a stream2 attribute value; referenced ids are appended to refs."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return tuple(_entity_key(item, refs) for item in value)
+    if isinstance(value, dict):
+        if 'ref' in value:
+            refs.append(value['ref'])
+            return _REF
+        return ('=', value.get('type'), _entity_key(value.get('value'), refs))
+    return _key_scalar(value)
+
+
+class ValueDeduplicator:
+    """
+    Equivalence classes of value entities, built with from_model or from_stream.
+
+    Args:
+        model: Loaded model the classes refer to (None when streaming)
+        value_types: Entity types that may be merged (default VALUE_TYPES); types
+            with a GlobalId are never merged
+
+    Attributes:
+        representative: Duplicate id -> id of the entity written in its place
+        types: Duplicate id -> entity type
+    """
+
+    def __init__(self, model=None, value_types: Iterable[str] = VALUE_TYPES):
+        self.model = model
+        self.value_types = frozenset(value_types)
+        self.representative: Dict[int, int] = {}
+        self.types: Dict[int, str] = {}
+        self._raw: Dict[int, Tuple[str, tuple, tuple]] = {}
+        self._rooted: Dict[str, bool] = {}
+
+    def _is_value_entity(self, schema_name: str, entity_type: str) -> bool:
+        if entity_type not in self.value_types:
+            return False
+        rooted = self._rooted.get(entity_type)
+        if rooted is None:
+            try:
+                names = get_entity_table(schema_name, entity_type).attribute_names
+            except Exception:
+                names = ("GlobalId",)  # unknown types are left alone
+            rooted = self._rooted[entity_type] = names[:1] == ("GlobalId",)
+        return not rooted
+
+    @classmethod
+    def from_model(cls, model, value_types: Iterable[str] = VALUE_TYPES) -> "ValueDeduplicator":
+        """Classify the value entities of a loaded model (value_types as in the constructor)."""
+        dedup = cls(model, value_types)
+        schema_name = model.schema_identifier
+        for inst in model:
+            entity_type = inst.is_a()
+            if dedup._is_value_entity(schema_name, entity_type):
+                refs = []
+                key = tuple(_instance_key(value, refs) for value in inst)
+                dedup._raw[inst.id()] = (entity_type, key, tuple(refs))
+        dedup._classify()
+        return dedup
+
+    @classmethod
+    def from_stream(cls, input_ifc_path: str, schema_name: str, entity_types=None,
+                    value_types: Iterable[str] = VALUE_TYPES) -> "ValueDeduplicator":
+        """
+        Classify the value entities of an IFC file in one streaming pass.
+
+        Args:
+            input_ifc_path: Path to IFC file
+            schema_name: Schema identifier of the file
+            entity_types: Optional ID->type mapping filled in the same pass (saves the writers' type map pass)
+            value_types: Entity types that may be merged (default VALUE_TYPES)
+        """
+        dedup = cls(value_types=value_types)
+        for entity_dict in iter_stream(input_ifc_path):
+            entity_type = entity_dict.get('type')
+            entity_id = entity_dict.get('id')
+            if not entity_type or not entity_id:
+                continue
+            if entity_types is not None:
+                entity_types[entity_id] = entity_type
+            if dedup._is_value_entity(schema_name, entity_type):
+                refs = []
+                key = tuple(_entity_key(value, refs) for name, value in entity_dict.items() if name not in ('type', 'id'))
+                dedup._raw[entity_id] = (entity_type, key, tuple(refs))
+        dedup._classify()
+        return dedup
+
+    def _classify(self):
+        """Assign every value entity to its class (depth first, referenced entities first)."""
+        raw = self._raw
+        class_of: Dict[int, int] = {}
+        class_ids: Dict[tuple, int] = {}
+        members: Dict[int, list] = {}
+        on_stack = set()
+        for root in raw:
+            if root in class_of:
+                continue
+            # (entity id, position of the next reference to visit); the stack is the path from root
+            stack = [(root, 0)]
+            on_stack.add(root)
+            while stack:
+                entity_id, i = stack[-1]
+                entity_type, key, refs = raw[entity_id]
+                n = len(refs)
+                while i < n and (refs[i] not in raw or refs[i] in class_of or refs[i] in on_stack):
+                    i += 1
+                if i < n:
+                    stack[-1] = (entity_id, i + 1)
+                    stack.append((refs[i], 0))
+                    on_stack.add(refs[i])
+                    continue
+                stack.pop()
+                on_stack.discard(entity_id)
+                # References to rooted entities (and back edges of cycles) compare by id
+                ref_classes = tuple(class_of[ref] if ref in class_of else ('@', ref) for ref in refs)
+                class_key = (entity_type, key, ref_classes)
+                class_id = class_ids.get(class_key)
+                if class_id is None:
+                    class_id = class_ids[class_key] = len(class_ids)
+                    members[class_id] = []
+                class_of[entity_id] = class_id
+                members[class_id].append(entity_id)
+
+        for ids in members.values():
+            if len(ids) > 1:
+                keep = min(ids)
+                for entity_id in ids:
+                    if entity_id != keep:
+                        self.representative[entity_id] = keep
+                        self.types[entity_id] = raw[entity_id][0]
+        self._raw = {}
+
+    def __len__(self) -> int:
+        """Number of duplicates."""
+        return len(self.representative)
+
+    def is_duplicate(self, entity_id: int) -> bool:
+        return entity_id in self.representative
+
+    def _instance(self, value):
+        if isinstance(value, tuple):
+            return tuple(self._instance(item) for item in value)
+        if isinstance(value, entity_instance):
+            keep = self.representative.get(value.id())
+            if keep is not None:
+                return self.model.by_id(keep)
+        return value
+
+    def rewrite_values(self, values: Iterable) -> list:
+        """Attribute values of a loaded instance with references to duplicates replaced by their representatives."""
+        return [self._instance(value) for value in values]
+
+    def _entity_value(self, value):
+        if isinstance(value, (list, tuple)):
+            # Same container type, nested lists are written as their string form
+            return type(value)(self._entity_value(item) for item in value)
+        if isinstance(value, dict) and 'ref' in value:
+            keep = self.representative.get(value['ref'])
+            if keep is not None:
+                return {'ref': keep}
+        return value
+
+    def rewrite_entity(self, entity_dict: dict) -> dict:
+        """Copy of a stream2 entity dict with references to duplicates replaced by their representatives."""
+        return {name: self._entity_value(value) if name not in ('type', 'id') else value
+                for name, value in entity_dict.items()}
+
+
+def write_same_as(path: str, dedup: ValueDeduplicator, namespaces: Dict[str, str], buffer_size: int = DEFAULT_BUFFER_SIZE):
+    """
+    Write the dropped duplicates as owl:sameAs links to their representatives (Turtle).
+
+    Args:
+        path: Output file (.ttl, optionally .gz/.zst)
+        dedup: Classified deduplicator
+        namespaces: Dictionary of prefix -> URI mappings
+        buffer_size: Output buffer size in bytes
+    """
+    with open_output(path, buffer_size) as f:
+        f.write(f"# owl:sameAs links of {len(dedup)} deduplicated value entities, generated by LBD writer.\n")
+        f.write(f"PREFIX inst: <{namespaces['INST']}>\n")
+        f.write(f"PREFIX owl: <{namespaces.get('OWL', 'http://www.w3.org/2002/07/owl#')}>\n\n")
+        for entity_id in sorted(dedup.representative):
+            entity_type = dedup.types[entity_id]
+            f.write(f"inst:{entity_type}_{entity_id} owl:sameAs inst:{entity_type}_{dedup.representative[entity_id]} .\n")
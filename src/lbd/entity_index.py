@@ -0,0 +1,314 @@
+"""Compact STEP id -> entity type index for the streaming writers.
+
+A dict from int to str costs well over 100 bytes per entity, which adds up
+to gigabytes on files with tens of millions of entities. Here entity type
+names are interned into a small code table and only a 2-byte code is kept
+per entity:
+
+- dense: an array of codes indexed by STEP id (2 bytes per id in the range),
+  optionally backed by a memory-mapped file instead of the heap;
+- sparse: sorted id array plus code array, searched with bisect (10 bytes per
+  entity), used automatically when ids are spread out thinly. Ids below the
+  largest one so far are collected in a small dict and merged into the arrays
+  in batches, so files with descending ids do not pay an O(n) insert each.
+  With a backing file the sparse arrays are memory-mapped too, in files next
+  to it.
+"""
+
+import mmap
+import os
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional
+
+# Switch from dense to sparse storage when the id range is this many times
+# larger than the number of entities (and larger than SPARSE_MIN_RANGE)
+SPARSE_FACTOR = 5
+SPARSE_MIN_RANGE = 1 << 16
+
+# Sparse mode: merge the out-of-order ids into the sorted arrays once there
+# are this many of them, or an eighth of the sorted ids (amortized O(1) each)
+PENDING_MIN = 4096
+
+_CODE_SIZE = array('H').itemsize
+
+
+class _MappedArray:
+    """Growable array of one type code kept in a memory-mapped file.
+
+    Supports len(), indexing, slicing, append() and extend(), which is what the
+    sparse index needs. `view` is the whole mapped buffer (capacity, not length).
+    """
+
+    def __init__(self, path: str, typecode: str, capacity: int = 1 << 16):
+        self.path = path
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self._file = open(path, 'w+b')
+        self._mmap = None
+        self.view = None
+        self._size = 0
+        self._capacity = 0
+        self._reserve(capacity)
+
+    def _reserve(self, capacity: int):
+        if capacity <= self._capacity:
+            return
+        capacity = max(capacity, 2 * self._capacity)
+        self._unmap()
+        self._file.truncate(capacity * self.itemsize)
+        self._mmap = mmap.mmap(self._file.fileno(), capacity * self.itemsize)
+        self.view = memoryview(self._mmap).cast(self.typecode)
+        self._capacity = capacity
+
+    def _unmap(self):
+        if self._mmap is not None:
+            self.view.release()
+            self._mmap.close()
+            self._mmap = self.view = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index):
+        return self.view[:self._size][index]
+
+    def __setitem__(self, index: int, value: int):
+        self.view[:self._size][index] = value
+
+    def append(self, value: int):
+        if self._size == self._capacity:
+            self._reserve(self._size + 1)
+        self.view[self._size] = value
+        self._size += 1
+
+    def extend(self, values):
+        n = len(values)
+        self._reserve(self._size + n)
+        self.view[self._size:self._size + n] = values
+        self._size += n
+
+    def close(self):
+        """Unmap and remove the file."""
+        self._unmap()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def _buffer(column):
+    """Object to bisect / index directly: the array itself or the mapped buffer."""
+    return column.view if isinstance(column, _MappedArray) else column
+
+
+class EntityTypeIndex:
+    """
+    Dict-like mapping of entity ID -> entity type name with compact storage.
+
+    Supports `id in index`, `index[id]`, `index.get(id)`, `index[id] = type`
+    and len(), which is all the streaming writers use.
+
+    Args:
+        backing_path: If given, the dense code array lives in a memory-mapped
+            file at this path (created, grown as needed, removed on close())
+            instead of on the heap. In sparse mode the id / code arrays are
+            mapped from `<backing_path>.<n>.ids` / `.codes` files instead.
+    """
+
+    def __init__(self, backing_path: Optional[str] = None):
+        self.type_names: List[Optional[str]] = [None]  # code 0 = unknown id
+        self._type_codes: Dict[str, int] = {}
+        self._count = 0
+        self._backing_path = backing_path
+        self._backing_file = None
+        self._mmap = None
+        self._ids = None          # sparse mode: sorted ids
+        self._pending: Dict[int, int] = {}  # sparse mode: out-of-order id -> code, not merged yet
+        self._generation = 0      # sparse mode with backing file: suffix of the current files
+        if backing_path:
+            self._backing_file = open(backing_path, 'w+b')
+            self._codes = self._map(1 << 16)
+        else:
+            self._codes = array('H')
+
+    # Storage
+
+    def _map(self, length: int):
+        """(Re)map the backing file so it holds `length` codes."""
+        old = self._codes if self._mmap is not None else None
+        if old is not None:
+            old.release()
+            self._mmap.close()
+        self._backing_file.truncate(length * _CODE_SIZE)
+        self._mmap = mmap.mmap(self._backing_file.fileno(), length * _CODE_SIZE)
+        return memoryview(self._mmap).cast('H')
+
+    def _grow(self, entity_id: int):
+        """Make the dense code array long enough to hold entity_id."""
+        length = max(entity_id + 1, 2 * len(self._codes))
+        if self._mmap is not None:
+            self._codes = self._map(length)
+        else:
+            self._codes.frombytes(bytes(_CODE_SIZE * (length - len(self._codes))))
+
+    def _sparse_arrays(self):
+        """New empty id / code arrays, memory-mapped if there is a backing file."""
+        if not self._backing_path:
+            return array('q'), array('H')
+        self._generation += 1
+        prefix = f"{self._backing_path}.{self._generation}"
+        return _MappedArray(prefix + '.ids', 'q'), _MappedArray(prefix + '.codes', 'H')
+
+    def _to_sparse(self):
+        """Convert dense storage into sorted id / code arrays."""
+        ids, codes = self._sparse_arrays()
+        for entity_id, code in enumerate(self._codes):
+            if code:
+                ids.append(entity_id)
+                codes.append(code)
+        self._release_dense()
+        if self._backing_file is not None:
+            self._backing_file.truncate(0)
+        self._ids, self._codes = ids, codes
+
+    def _merge_pending(self):
+        """Merge the out-of-order ids into the sorted id / code arrays, a run of them per gap."""
+        ids, codes = self._ids, self._codes
+        pending = self._pending
+        pending_ids = array('q', sorted(pending))
+        pending_codes = array('H', [pending[entity_id] for entity_id in pending_ids])
+        merged_ids, merged_codes = self._sparse_arrays()
+        start = i = 0
+        while i < len(pending_ids):
+            pos = bisect_left(_buffer(ids), pending_ids[i], start, len(ids))
+            # All pending ids below ids[pos] go in before it
+            j = bisect_left(pending_ids, ids[pos], i + 1) if pos < len(ids) else len(pending_ids)
+            merged_ids.extend(ids[start:pos])
+            merged_codes.extend(codes[start:pos])
+            merged_ids.extend(pending_ids[i:j])
+            merged_codes.extend(pending_codes[i:j])
+            start, i = pos, j
+        merged_ids.extend(ids[start:])
+        merged_codes.extend(codes[start:])
+        self._ids, self._codes = merged_ids, merged_codes
+        self._close_sparse(ids, codes)
+        pending.clear()
+
+    @staticmethod
+    def _close_sparse(*columns):
+        for column in columns:
+            if isinstance(column, _MappedArray):
+                column.close()
+
+    def _release_dense(self):
+        if self._mmap is not None:
+            self._codes.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def _type_code(self, entity_type: str) -> int:
+        code = self._type_codes.get(entity_type)
+        if code is None:
+            code = self._type_codes[entity_type] = len(self.type_names)
+            self.type_names.append(entity_type)
+        return code
+
+    # Mapping interface
+
+    def __setitem__(self, entity_id: int, entity_type: str):
+        code = self._type_code(entity_type)
+        if self._ids is None:
+            if entity_id >= len(self._codes):
+                if entity_id >= SPARSE_MIN_RANGE and entity_id > SPARSE_FACTOR * (self._count + 1):
+                    self._to_sparse()
+                    self.__setitem__(entity_id, entity_type)
+                    return
+                self._grow(entity_id)
+            if not self._codes[entity_id]:
+                self._count += 1
+            self._codes[entity_id] = code
+            return
+
+        ids = self._ids
+        if not ids or entity_id > ids[-1]:
+            # STEP ids mostly come in increasing order
+            ids.append(entity_id)
+            self._codes.append(code)
+            self._count += 1
+            return
+        pos = bisect_left(_buffer(ids), entity_id, 0, len(ids))
+        if pos < len(ids) and ids[pos] == entity_id:
+            self._codes[pos] = code
+            return
+        pending = self._pending
+        if entity_id not in pending:
+            self._count += 1
+        pending[entity_id] = code
+        if len(pending) >= max(PENDING_MIN, len(ids) >> 3):
+            self._merge_pending()
+
+    def get(self, entity_id: int, default=None) -> Optional[str]:
+        if self._ids is None:
+            if 0 <= entity_id < len(self._codes):
+                code = self._codes[entity_id]
+                if code:
+                    return self.type_names[code]
+            return default
+        if self._pending:
+            code = self._pending.get(entity_id)
+            if code:
+                return self.type_names[code]
+        ids = _buffer(self._ids)
+        size = len(self._ids)
+        pos = bisect_left(ids, entity_id, 0, size)
+        if pos < size and ids[pos] == entity_id:
+            return self.type_names[_buffer(self._codes)[pos]]
+        return default
+
+    def __getitem__(self, entity_id: int) -> str:
+        entity_type = self.get(entity_id)
+        if entity_type is None:
+            raise KeyError(entity_id)
+        return entity_type
+
+    def __contains__(self, entity_id: int) -> bool:
+        return self.get(entity_id) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def storage(self) -> str:
+        """Current storage mode: 'dense', 'mmap' or 'sparse'."""
+        if self._ids is not None:
+            return 'sparse'
+        return 'mmap' if self._mmap is not None else 'dense'
+
+    @property
+    def nbytes(self) -> int:
+        """Heap bytes used by the id/code arrays (memory-mapped pages not included)."""
+        if self._mmap is not None or isinstance(self._codes, _MappedArray):
+            return 0
+        size = len(self._codes) * self._codes.itemsize
+        if self._ids is not None:
+            size += len(self._ids) * self._ids.itemsize
+        return size
+
+    def close(self):
+        """Release the memory-mapped backing files, if any."""
+        self._release_dense()
+        if self._ids is not None:
+            self._close_sparse(self._ids, self._codes)
+        if self._backing_file is not None:
+            self._backing_file.close()
+            self._backing_file = None
+            if os.path.exists(self._backing_path):
+                os.remove(self._backing_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
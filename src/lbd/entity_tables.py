@@ -0,0 +1,84 @@
+"""Per-entity-type attribute tables shared by the writers.
+
+The attribute layout of an entity type is fixed by its schema, so the Turtle
+strings that only depend on it (subject prefix, 'a ifc:Type', predicates) are
+built once per (schema, entity type) and reused across instances and files.
+"""
+
+from typing import Dict, NamedTuple, Tuple
+import ifcopenshell.ifcopenshell_wrapper as wrapper
+
+# Attribute kinds
+SCALAR = 0      # single value (literal, enumeration, select or entity reference)
+AGGREGATE = 1   # list/set/array, written as one object per item
+
+
+class EntityTable(NamedTuple):
+    """Precompiled Turtle strings for one entity type."""
+    name: str                    # Entity type name as used in IRIs, e.g. 'IfcWall'
+    subject_prefix: str          # 'inst:IfcWall_' (id is appended)
+    type_triple: str             # ' a ifc:IfcWall'
+    attribute_names: Tuple[str, ...]
+    predicates: Tuple[str, ...]  # 'ifc:GlobalId', ...
+    kinds: Tuple[int, ...]       # SCALAR / AGGREGATE per attribute
+
+
+_schemas: Dict[str, object] = {}
+_tables: Dict[Tuple[str, str], EntityTable] = {}
+
+
+def get_schema(schema_name: str):
+    """Return the (cached) ifcopenshell schema wrapper for a schema identifier."""
+    schema = _schemas.get(schema_name)
+    if schema is None:
+        schema = _schemas[schema_name] = wrapper.schema_by_name(schema_name)
+    return schema
+
+
+def attribute_kind(attr_type) -> int:
+    """
+    Classify an attribute type as SCALAR or AGGREGATE.
+
+    Defined types are resolved to their underlying type, so e.g.
+    IfcCompoundPlaneAngleMeasure (a LIST of INTEGER) is an aggregate.
+    Selects are scalar, as typed values in a select come as a single value.
+    """
+    while True:
+        named = attr_type.as_named_type()
+        if named is None:
+            break
+        type_declaration = named.declared_type().as_type_declaration()
+        if type_declaration is None:
+            break
+        attr_type = type_declaration.declared_type()
+    return AGGREGATE if attr_type.as_aggregation_type() is not None else SCALAR
+
+
+def build_entity_table(schema_name: str, entity_type: str) -> EntityTable:
+    """Build the attribute table for one entity type from the schema wrapper."""
+    declaration = get_schema(schema_name).declaration_by_name(entity_type)
+    attributes = declaration.all_attributes()
+    names = tuple(attr.name() for attr in attributes)
+    return EntityTable(
+        name=entity_type,
+        subject_prefix=f"inst:{entity_type}_",
+        type_triple=f" a ifc:{entity_type}",
+        attribute_names=names,
+        predicates=tuple(f"ifc:{name}" for name in names),
+        kinds=tuple(attribute_kind(attr.type_of_attribute()) for attr in attributes),
+    )
+
+
+def get_entity_table(schema_name: str, entity_type: str) -> EntityTable:
+    """
+    Return the attribute table for an entity type, building it on first use.
+
+    Args:
+        schema_name: Schema identifier accepted by ifcopenshell_wrapper.schema_by_name
+        entity_type: Entity type name as returned by entity_instance.is_a()
+    """
+    key = (schema_name, entity_type)
+    table = _tables.get(key)
+    if table is None:
+        table = _tables[key] = build_entity_table(schema_name, entity_type)
+    return table
@@ -0,0 +1,171 @@
+"""Per-schema attribute tables for the ifcOWL writers (--converter ifcowl).
+
+ifcOWL names predicates after the attribute and its declared type:
+
+    ifc:GlobalId_IfcGloballyUniqueId, ifc:Name_IfcLabel, ifc:OwnerHistory_IfcOwnerHistory,
+    ifc:Coordinates_IfcLengthMeasure (aggregates: the element type), ifc:LengthExponent_INTEGER
+
+Resolving the declared types walks the schema wrapper for every attribute of
+every entity, so the result is built once per schema and persisted as JSON
+under ~/.cache/ifc2lbd/schema_tables (or $IFC2LBD_SCHEMA_TABLES). Later runs
+load the file instead of touching the wrapper. The file name carries the
+IfcOpenShell version, so an upgrade rebuilds the tables. Prebuild them for
+IFC2X3, IFC4 and IFC4X3 with:
+
+    python -m lbd.ifcowl_tables
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+import ifcopenshell
+from lbd.entity_tables import EntityTable, attribute_kind, get_schema
+
+SCHEMA_TABLES_ENV = "IFC2LBD_SCHEMA_TABLES"
+TABLE_FORMAT_VERSION = 1
+DEFAULT_SCHEMAS = ("IFC2X3", "IFC4", "IFC4X3")
+
+# Schema -> entity type -> ((attribute, declared type, kind), ...)
+SchemaTable = Dict[str, Tuple[Tuple[str, str, int], ...]]
+
+_schema_tables: Dict[str, SchemaTable] = {}
+_tables: Dict[Tuple[str, str], EntityTable] = {}
+
+
+def schema_tables_dir() -> Path:
+    """Directory of the persisted schema tables."""
+    directory = os.environ.get(SCHEMA_TABLES_ENV)
+    if directory:
+        return Path(directory)
+    return Path.home() / ".cache" / "ifc2lbd" / "schema_tables"
+
+
+def schema_table_path(schema_name: str) -> Path:
+    return schema_tables_dir() / f"{schema_name}-ifcopenshell-{ifcopenshell.version}-v{TABLE_FORMAT_VERSION}.json"
+
+
+def declared_type_name(attr_type) -> str:
+    """
+    Name of an attribute's declared type as used in ifcOWL predicates.
+
+    Named types (defined types, entities, selects, enumerations) give their
+    name, aggregates the name of their (innermost) element type, simple types
+    their EXPRESS keyword (INTEGER, REAL, ...).
+    """
+    while attr_type.as_aggregation_type() is not None:
+        attr_type = attr_type.as_aggregation_type().type_of_element()
+    named = attr_type.as_named_type()
+    if named is not None:
+        return named.declared_type().name()
+    simple = attr_type.as_simple_type()
+    if simple is not None:
+        return simple.declared_type().upper()
+    return str(attr_type)
+
+
+def build_schema_table(schema_name: str) -> SchemaTable:
+    """Resolve attribute names, declared types and kinds of all entities of a schema."""
+    table = {}
+    for declaration in get_schema(schema_name).entities():
+        table[declaration.name()] = tuple(
+            (attr.name(), declared_type_name(attr.type_of_attribute()), attribute_kind(attr.type_of_attribute()))
+            for attr in declaration.all_attributes()
+        )
+    return table
+
+
+def _read_schema_table(path: Path) -> SchemaTable:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return {entity: tuple(tuple(attribute) for attribute in attributes) for entity, attributes in data.items()}
+
+
+def _write_schema_table(path: Path, table: SchemaTable):
+    """Write atomically (temporary file + rename), so concurrent workers never read half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{path.name}.", dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(table, f, separators=(",", ":"))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def get_schema_table(schema_name: str) -> SchemaTable:
+    """
+    Return the ifcOWL table of a schema: from memory, the persisted file, or built and persisted.
+
+    A table that cannot be persisted (read-only home, ...) is still used.
+    """
+    table = _schema_tables.get(schema_name)
+    if table is not None:
+        return table
+    path = schema_table_path(schema_name)
+    try:
+        table = _read_schema_table(path)
+    except (OSError, ValueError):
+        table = build_schema_table(schema_name)
+        try:
+            _write_schema_table(path, table)
+        except OSError:
+            pass
+    _schema_tables[schema_name] = table
+    return table
+
+
+def get_ifcowl_entity_table(schema_name: str, entity_type: str) -> EntityTable:
+    """
+    Attribute table with ifcOWL predicates ('ifc:Name_IfcLabel') for one entity type.
+
+    Drop-in replacement for lbd.entity_tables.get_entity_table in the writers.
+
+    Raises:
+        KeyError: For entity types the schema does not declare
+    """
+    key = (schema_name, entity_type)
+    table = _tables.get(key)
+    if table is None:
+        attributes = get_schema_table(schema_name)[entity_type]
+        table = _tables[key] = EntityTable(
+            name=entity_type,
+            subject_prefix=f"inst:{entity_type}_",
+            type_triple=f" a ifc:{entity_type}",
+            attribute_names=tuple(name for name, _, _ in attributes),
+            predicates=tuple(f"ifc:{name}_{declared}" for name, declared, _ in attributes),
+            kinds=tuple(kind for _, _, kind in attributes),
+        )
+    return table
+
+
+def ifcowl_predicates(schema_name: str, entity_type: str) -> Dict[str, str]:
+    """Attribute name -> ifcOWL predicate for one entity type (for the streaming writers; empty if unknown)."""
+    try:
+        table = get_ifcowl_entity_table(schema_name, entity_type)
+    except KeyError:
+        return {}
+    return dict(zip(table.attribute_names, table.predicates))
+
+
+def prebuild_schema_tables(schemas: Iterable[str] = DEFAULT_SCHEMAS) -> List[Path]:
+    """Build and persist the tables of several schemas; returns the written files."""
+    paths = []
+    for schema_name in schemas:
+        table = build_schema_table(schema_name)
+        path = schema_table_path(schema_name)
+        _write_schema_table(path, table)
+        _schema_tables[schema_name] = table
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    import sys
+    for written in prebuild_schema_tables(sys.argv[1:] or DEFAULT_SCHEMAS):
+        print(written)
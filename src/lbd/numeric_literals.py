@@ -0,0 +1,39 @@
+"""Batched formatting of numeric tuples (coordinates, direction ratios, ...) as Turtle literals.
+
+Geometry-heavy models hold millions of floats in IfcCartesianPoint.Coordinates,
+IfcDirection.DirectionRatios and similar lists. Instead of formatting them one
+by one through format_turtle_value, a whole tuple is formatted with one
+%-operation on a template that is built once per tuple length:
+
+    (0.0, 1.5, -2.0) -> '"0.0"^^xsd:double , "1.5"^^xsd:double , "-2.0"^^xsd:double'
+
+'%r' of a float is its shortest repr, the same text as f"{val}", so the
+output is identical to the scalar path.
+"""
+
+from typing import Dict, Optional
+
+_FLOAT = frozenset((float,))
+_templates: Dict[int, str] = {}
+
+
+def double_template(n: int) -> str:
+    """Template for n xsd:double literals joined by ' , ' (cached per length)."""
+    template = _templates.get(n)
+    if template is None:
+        template = _templates[n] = " , ".join(['"%r"^^xsd:double'] * n)
+    return template
+
+
+def format_doubles(values) -> Optional[str]:
+    """
+    Format a list or tuple of floats as comma separated xsd:double literals.
+
+    Returns:
+        The Turtle object list, or None if values is empty or not all floats
+        (ints, bools, None, strings, references); the caller then formats the
+        items one by one
+    """
+    if not values or type(values[0]) is not float or not _FLOAT.issuperset(map(type, values)):
+        return None
+    return double_template(len(values)) % (values if type(values) is tuple else tuple(values))
@@ -0,0 +1,234 @@
+"""Buffered UTF-8 output used by the TTL/TriG writers.
+
+Writers hand over whole Turtle blocks as strings. They are collected and
+encoded in large blocks into one reusable bytearray, which is written to an
+unbuffered binary file once it holds buffer_size bytes. This replaces many
+small text-mode f.write calls (each going through the TextIOWrapper) with a
+few large raw writes.
+
+Outputs ending in .gz or .zst are compressed on the fly by a thread pool
+(see lbd.compression), so no uncompressed copy is ever written to disk.
+
+With a pipeline depth > 0 (see ifc.pipeline and ifc.stream_settings) the
+blocks are handed to a writer thread through a bounded queue
+(BackgroundWriter), so disk writes and compression overlap with formatting.
+"""
+
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import List, Optional
+
+from handling_logging.metrics import log_stage
+from ifc.pipeline import pipeline_depth as _pipeline_depth
+from lbd.compression import ParallelCompressedFile, compression_for_path
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024  # 1 MiB
+
+
+class BackgroundWriter:
+    """
+    Binary file-like sink writing to another sink on a writer thread.
+
+    write() copies the data into a queue of at most depth blocks and returns;
+    it only blocks while the queue is full (backpressure). Errors of the writer
+    thread are re-raised by the next write(), flush() or close().
+
+    Args:
+        raw: Unbuffered binary file or ParallelCompressedFile
+        depth: Maximum number of blocks waiting to be written
+        path: Output file reported in the metrics record
+    """
+
+    _END = object()
+
+    def __init__(self, raw, depth: int, path: Optional[str] = None):
+        self.raw = raw
+        self.path = path
+        self.put_wait_ns = 0  # producer blocked on a full queue
+        self.busy_ns = 0  # writer thread inside raw.write
+        self._queue = queue.Queue(maxsize=max(1, depth))
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="output-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            data = self._queue.get()
+            try:
+                if data is self._END:
+                    return
+                if self._error is None:
+                    start = time.perf_counter_ns()
+                    view = memoryview(data)
+                    written = 0
+                    while written < len(view):
+                        written += self.raw.write(view[written:])
+                    self.busy_ns += time.perf_counter_ns() - start
+            except BaseException as exc:
+                # Keep draining, so the producer never blocks on a dead thread
+                self._error = exc
+            finally:
+                self._queue.task_done()
+
+    def _check(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def write(self, data) -> int:
+        """Queue a copy of data for the writer thread; returns len(data) like a raw file."""
+        self._check()
+        block = bytes(data)
+        start = time.perf_counter_ns()
+        self._queue.put(block)
+        self.put_wait_ns += time.perf_counter_ns() - start
+        return len(block)
+
+    def flush(self):
+        """Wait until the writer thread has written everything queued so far."""
+        self._queue.join()
+        self._check()
+
+    def close(self):
+        """Write the remaining blocks, stop the thread and close raw; emits a 'write_backpressure' record."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(self._END)
+            self._thread.join()
+            self._check()
+        finally:
+            self.raw.close()
+        log_stage("write_backpressure", self.put_wait_ns, output_path=self.path)
+        log_stage("writer_thread", self.busy_ns, output_path=self.path)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class BufferedOutput:
+    """
+    File-like writer that encodes text to UTF-8 and flushes it in large blocks.
+
+    Args:
+        path: Output file path
+        buffer_size: Number of bytes collected before writing to disk
+        encoding: Text encoding (default UTF-8)
+        newline: Line ending written for '\\n'. None translates to os.linesep,
+            as text-mode files do, so output matches open(path, 'w').
+        compression: 'auto' (from the suffix: .gz -> gzip, .zst -> zstd), 'gzip', 'zstd' or None
+        pipeline_depth: Blocks queued for a writer thread (default: the stream settings' depth, see
+            ifc.stream_settings.pipeline_depth; 0 writes directly)
+    """
+
+    def __init__(self, path: str, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 encoding: str = "utf-8", newline: Optional[str] = None, compression: Optional[str] = "auto",
+                 pipeline_depth: Optional[int] = None):
+        self.path = path
+        self.buffer_size = max(1, buffer_size)
+        self.encoding = encoding
+        self.newline = os.linesep if newline is None else newline
+        self.bytes_written = 0
+        self.write_ns = 0  # time spent in raw disk writes (with a writer thread: waiting for queue slots)
+        self._parts: List[str] = []
+        self._pending = 0
+        self._buffer = bytearray()
+        if os.path.isfile(path) and os.stat(path).st_nlink > 1:
+            # Do not truncate a file shared via hardlink (e.g. with the conversion cache)
+            os.remove(path)
+        self.compression = compression_for_path(path) if compression == "auto" else compression
+        if self.compression:
+            self._raw = ParallelCompressedFile(path, self.compression)
+        else:
+            self._raw = open(path, 'wb', buffering=0)
+        depth = _pipeline_depth(pipeline_depth)
+        if depth:
+            self._raw = BackgroundWriter(self._raw, depth, path)
+
+    def write(self, text: str) -> None:
+        """Queue text; it is encoded once enough has been collected."""
+        self._parts.append(text)
+        self._pending += len(text)
+        if self._pending >= self.buffer_size:
+            self._encode()
+            if len(self._buffer) >= self.buffer_size:
+                self._flush_buffer()
+
+    def write_bytes(self, data: bytes) -> None:
+        """Write already encoded UTF-8 bytes (e.g. a Turtle fragment) after the queued text."""
+        self._encode()
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            self._flush_buffer()
+
+    def copy_file(self, path: str, chunk_size: int = DEFAULT_BUFFER_SIZE) -> None:
+        """Append the raw bytes of another (already encoded) file."""
+        self.flush()
+        start = time.perf_counter_ns()
+        with open(path, 'rb') as src:
+            shutil.copyfileobj(src, self._raw, chunk_size)
+        self.write_ns += time.perf_counter_ns() - start
+        self.bytes_written += os.path.getsize(path)
+
+    def tell(self) -> int:
+        """Byte position in the (uncompressed) output (queued text is encoded first)."""
+        self._encode()
+        return self.bytes_written + len(self._buffer)
+
+    def _encode(self) -> None:
+        if not self._parts:
+            return
+        text = "".join(self._parts)
+        if self.newline != "\n":
+            text = text.replace("\n", self.newline)
+        self._buffer += text.encode(self.encoding)
+        self._parts.clear()
+        self._pending = 0
+
+    def _flush_buffer(self) -> None:
+        if self._buffer:
+            start = time.perf_counter_ns()
+            view = memoryview(self._buffer)
+            written = 0
+            while written < len(view):
+                written += self._raw.write(view[written:])
+            view.release()
+            self.write_ns += time.perf_counter_ns() - start
+            self.bytes_written += written
+            self._buffer.clear()
+
+    def flush(self) -> None:
+        """Encode queued text and write everything buffered to disk."""
+        self._encode()
+        self._flush_buffer()
+
+    def close(self) -> None:
+        """Flush and close the file; emits the 'flush' metrics record (disk write time, bytes)."""
+        if not self._raw.closed:
+            try:
+                self.flush()
+            finally:
+                self._raw.close()
+            log_stage("flush", self.write_ns, output_path=self.path, bytes_written=self.bytes_written)
+
+    @property
+    def closed(self) -> bool:
+        return self._raw.closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_output(path: str, buffer_size: int = DEFAULT_BUFFER_SIZE, compression: Optional[str] = "auto",
+                pipeline_depth: Optional[int] = None) -> BufferedOutput:
+    """Open an output file for the writers (see BufferedOutput)."""
+    return BufferedOutput(path, buffer_size=buffer_size, compression=compression, pipeline_depth=pipeline_depth)
@@ -0,0 +1,120 @@
+"""Entity type filtering for the writers (--include-types / --exclude-types).
+
+Type names are expanded with all their schema subtypes, so excluding
+IfcRepresentationItem drops IfcCartesianPoint, IfcDirection, IfcPolyLoop, ...
+Presets name common selections and can be mixed with type names:
+
+    TypeFilter("IFC4", exclude=["no-geometry", "IfcPropertySingleValue"])
+
+References to dropped entities are either pruned from the remaining entities
+(dropped_refs='prune') or kept as bare IRIs without a description ('keep').
+"""
+
+from typing import FrozenSet, Iterable, Optional
+
+from ifcopenshell import entity_instance
+from lbd.entity_tables import get_schema
+from lbd.type_presets import DROPPED_REFS, PRESETS, parse_type_list  # noqa: F401 (parse_type_list re-exported)
+
+
+class TypeFilter:
+    """
+    Decides which entity types are written.
+
+    Args:
+        schema_name: Schema identifier used to resolve names and subtypes
+        include: Type names or presets to keep (default: all types)
+        exclude: Type names or presets to drop (applied after include)
+        dropped_refs: 'prune' references to dropped entities, or 'keep' them as IRIs
+
+    Raises:
+        ValueError: For unknown type or preset names
+    """
+
+    def __init__(self, schema_name: str, include: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = None, dropped_refs: str = "prune"):
+        if dropped_refs not in DROPPED_REFS:
+            raise ValueError(f"Unknown dropped_refs mode '{dropped_refs}'. Available: {list(DROPPED_REFS)}")
+        self.schema_name = schema_name
+        self.schema = get_schema(schema_name)
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.prune = dropped_refs == "prune"
+
+        all_types = {declaration.name() for declaration in self.schema.entities()}
+        allowed = self._expand(self.include) if self.include else all_types
+        self.allowed_types: FrozenSet[str] = frozenset(allowed - self._expand(self.exclude))
+
+    def __reduce__(self):
+        # The schema object cannot be pickled; worker processes rebuild the filter
+        return (TypeFilter, (self.schema_name, self.include, self.exclude, "prune" if self.prune else "keep"))
+
+    def _expand(self, names: Iterable[str]) -> set:
+        """Resolve type names and presets to the set of entity names incl. subtypes."""
+        expanded = set()
+        for name in names:
+            if name in PRESETS:
+                # Presets cover several schema versions; skip names a schema lacks
+                for type_name in PRESETS[name]:
+                    declaration = self._declaration(type_name)
+                    if declaration is not None:
+                        self._add_subtypes(declaration, expanded)
+                continue
+            declaration = self._declaration(name)
+            if declaration is None:
+                raise ValueError(f"Unknown entity type or preset '{name}' for schema {self.schema_name}. "
+                                 f"Presets: {list(PRESETS)}")
+            self._add_subtypes(declaration, expanded)
+        return expanded
+
+    def _declaration(self, name: str):
+        try:
+            declaration = self.schema.declaration_by_name(name)
+        except Exception:
+            return None
+        return declaration.as_entity()
+
+    def _add_subtypes(self, declaration, names: set):
+        names.add(declaration.name())
+        for subtype in declaration.subtypes():
+            self._add_subtypes(subtype, names)
+
+    def allows(self, entity_type: str) -> bool:
+        return entity_type in self.allowed_types
+
+    def prune_entity(self, entity_dict: dict, entity_types) -> dict:
+        """
+        Copy of a stream2 entity dict without references to dropped entities.
+
+        Args:
+            entity_dict: Entity dictionary as yielded by the stream reader
+            entity_types: Mapping of entity IDs to types (references of unknown type are kept)
+        """
+        pruned = {}
+        for attr_name, attr_value in entity_dict.items():
+            if isinstance(attr_value, dict):
+                if 'ref' in attr_value and self._dropped(entity_types.get(attr_value['ref'])):
+                    continue
+            elif isinstance(attr_value, (list, tuple)):
+                attr_value = [item for item in attr_value
+                              if not (isinstance(item, dict) and 'ref' in item and self._dropped(entity_types.get(item['ref'])))]
+            pruned[attr_name] = attr_value
+        return pruned
+
+    def _dropped(self, entity_type: Optional[str]) -> bool:
+        return entity_type is not None and entity_type not in self.allowed_types
+
+    def _dropped_instance(self, value) -> bool:
+        # Typed values (IfcLabel('x') in a select) are instances too, but have id 0
+        return isinstance(value, entity_instance) and value.id() != 0 and value.is_a() not in self.allowed_types
+
+    def prune_values(self, inst) -> list:
+        """Attribute values of a loaded instance without references to dropped entities."""
+        values = []
+        for value in inst:
+            if isinstance(value, tuple):
+                value = tuple(item for item in value if not self._dropped_instance(item))
+            elif self._dropped_instance(value):
+                value = None
+            values.append(value)
+        return values
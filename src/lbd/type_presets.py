@@ -0,0 +1,34 @@
+"""Presets and CLI parsing of the --include-types / --exclude-types lists.
+
+Kept apart from lbd.type_filter, which needs ifcopenshell, so the CLI can
+check its arguments without importing it.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+# Preset name -> type names (expanded with their subtypes like any other name)
+PRESETS: Dict[str, List[str]] = {
+    # Geometry, placement and presentation; what LBD consumers do not read
+    "no-geometry": [
+        "IfcRepresentationItem",
+        "IfcRepresentation",
+        "IfcProductRepresentation",
+        "IfcRepresentationMap",
+        "IfcRepresentationContext",
+        "IfcObjectPlacement",
+        "IfcPresentationLayerAssignment",
+        "IfcPresentationStyle",
+        "IfcPresentationStyleAssignment",
+        "IfcShapeAspect",
+    ],
+}
+
+DROPPED_REFS = ("prune", "keep")
+
+
+def parse_type_list(values: Optional[Iterable[str]]) -> List[str]:
+    """Split CLI values ('IfcWall,IfcSlab' 'no-geometry') into a flat list of names."""
+    names = []
+    for value in values or []:
+        names.extend(name.strip() for name in value.split(",") if name.strip())
+    return names